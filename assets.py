@@ -0,0 +1,62 @@
+#   Image assets - each image file is decoded by PIL once and kept, and the tkinter images made from them
+#   are kept in a small least recently used cache, so building a level or pressing the boss key doesn't
+#   go back to the disk. The images the next level needs can be decoded on a background thread during play
+#   PIL is only imported the first time it is needed, tkinter can read PNGs itself so the home screen doesn't wait for it
+
+import os
+import threading
+import tkinter as tk
+from collections import OrderedDict
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__)) # Image files are looked for next to the game
+MAX_IMAGES = 8 # How many tkinter images to keep
+
+
+class AssetManager:
+
+    def __init__(self, max_images=MAX_IMAGES):
+        self.max_images = max_images
+        self.decoded = {} # file -> PIL image, of every file decoded so far
+        self.images = OrderedDict() # file -> tkinter image, least recently used first
+        self.master = None # The window the tkinter images belong to
+        self.lock = threading.Lock() # decoded is shared with the preloading threads
+
+    #-- Methods --
+    def decode(self, file): # The PIL image of a file, only reading it the first time. Safe from any thread
+        with self.lock:
+            image = self.decoded.get(file)
+        if image is None:
+            from PIL import Image
+            image = Image.open(os.path.join(ASSET_DIR, file))
+            image.load() # Decode it now, rather than when it is first drawn
+            with self.lock:
+                image = self.decoded.setdefault(file, image) # Another thread may have beaten us to it
+        return image
+
+    def photo(self, file, master): # A tkinter image of a file for master, from the main thread only as tkinter isn't thread safe
+        # Anything still showing an image keeps its own reference, so dropping one from the cache never blanks it
+        if master is not self.master: # tkinter images belong to one window, so start again for a new one
+            self.images.clear()
+            self.master = master
+        image = self.images.pop(file, None)
+        if image is None and file.endswith(".png") and file not in self.decoded:
+            image = tk.PhotoImage(file=os.path.join(ASSET_DIR, file), master=master)
+        elif image is None:
+            from PIL import ImageTk
+            image = ImageTk.PhotoImage(self.decode(file), master=master)
+        self.images[file] = image # Put it back at the most recently used end
+        while len(self.images) > self.max_images:
+            self.images.popitem(last=False)
+        return image
+
+    def preload(self, files): # Decode files on a background thread, so photo() doesn't have to wait for the disk
+        with self.lock:
+            files = [file for file in files if file not in self.decoded]
+        if files:
+            threading.Thread(target=self.decode_all, args=(files,), daemon=True).start()
+
+    def decode_all(self, files):
+        for file in files:
+            self.decode(file)
+
+manager = AssetManager()
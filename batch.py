@@ -0,0 +1,184 @@
+#   Batch shot simulator using numpy
+#   Steps thousands of shots together through the same rules as physics.Simulation, so the whole aim
+#   space of a level can be swept in one go instead of playing one shot at a time
+
+import numpy as np
+import physics
+import levels
+
+#Outcome codes, the index of each outcome name in OUTCOMES
+OUTCOMES = (physics.MOVING, physics.HOLED, physics.STOPPED)
+MOVING, HOLED, STOPPED = 0, 1, 2
+
+
+class ShotResults: # The final state of every shot in a batch
+
+    def __init__(self, left_pos, bottom_pos, outcome, steps, latched):
+        self.left_pos = left_pos
+        self.bottom_pos = bottom_pos
+        self.outcome = outcome # One of the outcome codes above for each shot
+        self.steps = steps # How many steps each shot took
+        self.latched = latched # order -> whether each shot ended with that once-only collider latched, to carry into the next shot
+
+    def __len__(self):
+        return len(self.outcome)
+
+    def holed(self):
+        return self.outcome == HOLED
+
+
+def aim_at(theta, power, max_hyp): # Vectorized physics.aim_at, the relative x and y with power limited to max_hyp
+    power = np.minimum(np.asarray(power, dtype=float), max_hyp)
+    theta = np.asarray(theta, dtype=float)
+    return power * np.cos(theta), power * np.sin(theta)
+
+def aim_grid(max_hyp, num_angles=180, num_powers=50): # Every (theta, power) over the aim space, as flat arrays
+    theta, power = np.meshgrid(np.linspace(0, np.pi, num_angles), np.linspace(max_hyp/num_powers, max_hyp, num_powers))
+    return theta.ravel(), power.ravel()
+
+def simulate(level, theta, power, max_hyp=None, x=physics.START_X, y=physics.START_Y, max_steps=20000, clock=0, latched=None):
+    # Play every (theta, power) shot from x,y at once until they have all stopped or been holed
+    # x and y can be arrays too, to start each shot from a different place
+    # clock is the steps the level has run for when they are all shot, the same as Simulation's, and latched is
+    # order -> whether each ball starts with that once-only collider latched, as left by its last shot
+    layout = levels.get(level)
+    if max_hyp is None:
+        max_hyp = layout.max_hyp
+    relative_x, relative_y = aim_at(theta, power, max_hyp)
+    relative_x, relative_y, x, y = np.broadcast_arrays(relative_x, relative_y, np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    count = relative_x.size
+
+    # Results for every shot, filled in as each one finishes
+    final_left = np.empty(count)
+    final_bottom = np.empty(count)
+    outcome = np.full(count, MOVING, dtype=np.int8)
+    steps = np.full(count, max_steps, dtype=np.int32)
+
+    # State of the shots still going, these shrink as shots finish
+    index = np.arange(count)
+    left_pos = x.ravel().copy()
+    bottom_pos = y.ravel().copy()
+    x_velocity = relative_x.ravel() / 40
+    y_velocity = -relative_y.ravel() / 40
+    starting = latched or {}
+    latched = {collider.order: np.broadcast_to(starting.get(collider.order, False), (count,)).copy() for collider in layout.colliders if collider.once}
+    final_latched = {order: flags.copy() for order, flags in latched.items()}
+    tables = physics.mover_tables(layout) # The movers are in the same place for every ball, as they all start together
+
+    for step in range(1, max_steps+1):
+        positions = physics.mover_positions(tables, clock + step)
+        step_all(layout, left_pos, bottom_pos, x_velocity, y_velocity, latched, positions)
+        (stopped, holed) = status(layout, left_pos, bottom_pos, x_velocity, y_velocity)
+        finished = stopped | holed
+        if finished.any():
+            done = index[finished]
+            final_left[done] = left_pos[finished]
+            final_bottom[done] = bottom_pos[finished]
+            outcome[done] = np.where(holed[finished], HOLED, STOPPED)
+            steps[done] = step
+            for order, flags in latched.items():
+                final_latched[order][done] = flags[finished]
+            going = ~finished # Drop the finished shots so later steps only work on the ones still moving
+            index, left_pos, bottom_pos = index[going], left_pos[going], bottom_pos[going]
+            x_velocity, y_velocity = x_velocity[going], y_velocity[going]
+            latched = {order: flags[going] for order, flags in latched.items()}
+            if not index.size:
+                break
+
+    final_left[index] = left_pos # Anything left ran out of steps
+    final_bottom[index] = bottom_pos
+    for order, flags in latched.items():
+        final_latched[order][index] = flags
+    return ShotResults(final_left, final_bottom, outcome, steps, final_latched)
+
+def step_all(layout, left_pos, bottom_pos, x_velocity, y_velocity, latched, positions): # Simulation.step for every ball, changed in place
+    # Fast balls split their step up, the same as Simulation.step
+    substeps = np.maximum(1, np.ceil(np.maximum(np.abs(x_velocity), np.abs(y_velocity)) / physics.MAX_TRAVEL))
+    move(layout, left_pos, bottom_pos, x_velocity, y_velocity, substeps, latched, positions)
+    for i in range(1, int(substeps.max())): # Only the balls that need them take the later substeps
+        part = substeps > i
+        state = [left_pos[part], bottom_pos[part], x_velocity[part], y_velocity[part]]
+        part_latched = {order: flags[part] for order, flags in latched.items()}
+        move(layout, *state, substeps[part], part_latched, positions)
+        left_pos[part], bottom_pos[part], x_velocity[part], y_velocity[part] = state
+        for order, flags in part_latched.items():
+            latched[order][part] = flags
+    y_velocity += physics.GRAVITY*physics.INTERVAL
+    x_velocity *= physics.AIR_RESISTANCE
+
+def status(layout, left_pos, bottom_pos, x_velocity, y_velocity): # (stopped, holed) of every ball, the same checks as Simulation.status
+    stopped = (-0.02 < x_velocity) & (x_velocity < 0.02) & (-0.02 < y_velocity) & (y_velocity < 0.2)
+    hole = layout.hole
+    holed = ~stopped & (hole["left"][0] < left_pos) & (left_pos < hole["left"][1]) & (hole["bottom"][0] <= bottom_pos) & (bottom_pos <= hole["bottom"][1]) & (x_velocity < hole["max_speed"])
+    return stopped, holed
+
+#-- Collision detection, the same rules as Simulation but on arrays, changed in place --
+def move(layout, left_pos, bottom_pos, x_velocity, y_velocity, substeps, latched, positions): # Move each ball by one of its substeps
+    left_before = left_pos.copy()
+    bottom_before = bottom_pos.copy()
+    left_pos += x_velocity/substeps
+    bottom_pos += y_velocity/substeps
+    collision_detection_general(left_pos, bottom_pos, x_velocity, y_velocity)
+    collision_detection_level(layout, left_pos, bottom_pos, x_velocity, y_velocity, left_before, bottom_before, latched, positions)
+
+def collision_detection_general(left_pos, bottom_pos, x_velocity, y_velocity):
+    right_pos = left_pos + physics.BALL_SIZE
+    top_pos = bottom_pos - physics.BALL_SIZE
+    right_wall = right_pos >= physics.WIDTH
+    left_wall = ~right_wall & (left_pos <= 0)
+    floor = ~right_wall & ~left_wall & (bottom_pos >= physics.FLOOR)
+    ceiling = ~right_wall & ~left_wall & ~floor & (top_pos <= 0)
+
+    x_velocity[right_wall] *= -0.7
+    left_pos[right_wall] -= right_pos[right_wall] - physics.WIDTH
+    x_velocity[left_wall] *= -0.8
+    left_pos[left_wall] = 0
+    y_velocity[floor] *= -0.7
+    x_velocity[floor] *= 0.93
+    bottom_pos[floor] = physics.FLOOR
+    y_velocity[ceiling] *= -0.8
+    x_velocity[ceiling] *= 0.9
+    bottom_pos[ceiling] -= top_pos[ceiling]
+
+def collision_detection_level(layout, left_pos, bottom_pos, x_velocity, y_velocity, left_before, bottom_before, latched, positions):
+    # Every ball checks every collider here, the grid only pays off for one ball at a time
+    right_pos = left_pos + physics.BALL_SIZE
+    top_pos = bottom_pos - physics.BALL_SIZE
+    previous = (left_before, bottom_before - physics.BALL_SIZE, left_before + physics.BALL_SIZE, bottom_before)
+    unhit = np.ones(len(left_pos), dtype=bool) # Balls that haven't hit anything yet this step
+    for collider in layout.colliders:
+        can_hit = unhit & ~latched[collider.order] if collider.once else unhit
+        gap = positions[collider.gap][0] if collider.gap else None
+        current = (left_pos, top_pos, right_pos, bottom_pos)
+        before = previous
+        (x_offset, y_offset) = (0, 0)
+        if collider.mover: # Check where the balls are compared to the collider, as if it hadn't moved
+            (x_offset, y_offset) = positions[collider.mover][1]
+            current = levels.shift(current, x_offset, y_offset)
+            before = levels.shift(before, x_offset, y_offset)
+            gap = levels.shift(gap, x_offset, y_offset) if gap else None
+        hits = can_hit & collider.matches(*current, gap)
+        if collider.sweeps:
+            (crossed, fraction) = collider.sweep(before, current, gap)
+            swept = can_hit & ~hits & crossed
+            if swept.any(): # These went straight through it, so go back to where they touched it
+                left_pos[swept] = left_before[swept] + fraction[swept]*(left_pos[swept] - left_before[swept])
+                bottom_pos[swept] = bottom_before[swept] + fraction[swept]*(bottom_pos[swept] - bottom_before[swept])
+                right_pos[swept] = left_pos[swept] + physics.BALL_SIZE
+                top_pos[swept] = bottom_pos[swept] - physics.BALL_SIZE
+                hits |= swept
+        if collider.once:
+            # If we land on the floor away from it, allow it to act again
+            latched[collider.order] &= ~(unhit & (bottom_pos - y_offset >= collider.y) & ~collider.over(left_pos - x_offset, right_pos - x_offset))
+            latched[collider.order] |= hits
+        unhit &= ~hits
+        x_velocity[hits] *= collider.x_factor
+        y_velocity[hits] *= collider.y_factor
+        (edge, value) = collider.snap
+        value += y_offset if edge == "bottom" else x_offset
+        if edge == "right":
+            left_pos[hits] -= right_pos[hits] - value
+        elif edge == "left":
+            left_pos[hits] = value
+        else:
+            bottom_pos[hits] = value
@@ -0,0 +1,210 @@
+#   Benchmarks - times the physics, the score store, building levels and starting up, without needing a display,
+#   and writes the results as JSON so runs on different commits can be compared to catch anything getting slower
+#   Everything is seeded, so the same commit always plays the same shots and writes the same score files
+#   Usage: python bench.py [--output FILE] [--compare OLD_FILE] [--sizes 1000,10000,...] [--quick]
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import levels
+import physics
+import scores
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_FILE = "bench.json"
+SEED = 2022
+SHOTS = 40 # Shots played on each level
+SIZES = (1000, 10000, 100000, 1000000, 10000000) # Lines of the synthetic scores files
+REPEAT = 5
+THRESHOLD = 0.1 # How much slower a result has to be to count as a regression
+MODULES = ("physics", "levels", "scores", "main") # Imported cold, each in a new interpreter
+
+
+def timed(function, repeat=REPEAT): # The (best, median) seconds function takes over repeat calls
+    times = []
+    for attempt in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    times.sort()
+    return times[0], times[len(times)//2]
+
+def milliseconds(best_median):
+    return {"best_ms": round(best_median[0]*1000, 3), "median_ms": round(best_median[1]*1000, 3)}
+
+def shots(level, count=SHOTS): # The same spread of shots at a level every run
+    chooser = random.Random(SEED + level)
+    max_hyp = levels.get(level).max_hyp
+    return [physics.aim_at(chooser.uniform(0.1, 1.5), chooser.uniform(0.3, 1.0)*max_hyp, max_hyp) for shot in range(count)]
+
+
+def bench_physics(repeat=REPEAT): # Steps a second through each level's collision checks, and how long a whole shot takes
+    results = {}
+    for level in sorted(levels.get_all()):
+        aims = shots(level)
+        steps = [0]
+        def play():
+            for relative_x, relative_y in aims:
+                simulation = physics.Simulation(level)
+                simulation.shoot(relative_x, relative_y)
+                while True: # The same as Ball.update does each step
+                    simulation.advance()
+                    simulation.step()
+                    steps[0] += 1
+                    if simulation.status() != physics.MOVING:
+                        break
+        (best, median) = timed(play, repeat)
+        steps_per_shot = steps[0] / repeat / len(aims)
+        results[str(level)] = {"steps_per_second": round(steps_per_shot*len(aims)/best), "steps_per_shot": round(steps_per_shot, 1),
+                               "shot_ms": milliseconds((best/len(aims), median/len(aims)))}
+        try:
+            import batch
+        except ImportError: # numpy isn't installed
+            continue
+        (theta, power) = batch.aim_grid(levels.get(level).max_hyp, 60, 20)
+        last = []
+        (best, median) = timed(lambda: last.append(batch.simulate(level, theta, power)), repeat)
+        results[str(level)]["batch_ball_steps_per_second"] = round(int(last[-1].steps.sum())/best)
+    return results
+
+
+def write_scores(path, lines): # A synthetic scores file, in the same format the game writes
+    chooser = random.Random(SEED + lines)
+    names = ["player" + str(number) for number in range(1000)]
+    with open(path, "w", encoding=scores.ENCODING) as file:
+        for start in range(0, lines, 10000): # Written in chunks, as 10M separate writes would take longer than the benchmark
+            file.write("".join(chooser.choice(names) + " " + str(chooser.randint(3, 200)) + " " +
+                               ("Completed" if chooser.random() < 0.2 else str(chooser.randint(1, 3))) + "\n"
+                               for line in range(start, min(lines, start+10000))))
+
+def bench_scores(sizes=SIZES, repeat=REPEAT): # How long the home screen waits on the scores, for logs of each size
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for lines in sizes:
+            path = os.path.join(directory, "scores" + str(lines) + ".txt")
+            write_scores(path, lines)
+            started = time.perf_counter()
+            scores.ScoreStore(path) # No index yet, so the whole log is read once
+            index_build = time.perf_counter() - started
+            results[str(lines)] = {
+                "file_mb": round(os.path.getsize(path)/1e6, 2),
+                "index_build_ms": round(index_build*1000, 3),
+                "fill_leaderboard": milliseconds(timed(lambda: scores.ScoreStore(path).top(10), repeat)), # What fill_leaderboard does
+                "load_game": milliseconds(timed(lambda: scores.ScoreStore(path).latest_save("player7"), repeat)), # What load_game does
+                "save": milliseconds(timed(lambda: scores.ScoreStore(path).add("player7", 50, 2), repeat)), # What save_exit does
+            }
+            os.remove(path)
+    return results
+
+
+def bench_levels(repeat=REPEAT): # Building the levels, from the file, offscreen, and then on a canvas if there is a display
+    results = {"load": milliseconds(timed(levels.load, repeat)), # Reading levels.json and building the collision grids
+               # Loading them again each time, as the mover tables are kept on the movers once worked out
+               "movers": milliseconds(timed(lambda: [physics.mover_tables(layout) for layout in levels.load().values()], repeat))}
+    try:
+        import clips
+    except ImportError: # Pillow isn't installed
+        results["scene"] = {"skipped": "needs Pillow"}
+    else: # Drawing every shape and image of the level at full size, which needs no display so is always compared
+        results["scene"] = {"level" + str(level): milliseconds(timed(lambda: clips.Scene(level, scale=1), repeat)) for level in sorted(levels.get_all())}
+    with tempfile.TemporaryDirectory() as directory:
+        here = os.getcwd()
+        os.chdir(directory) # The home screen reads and writes the scores and saves in the current folder
+        try:
+            results["canvas"] = bench_canvas(repeat)
+        finally:
+            os.chdir(here)
+    return results
+
+def bench_canvas(repeat=REPEAT): # What a new Game does to build each level, on a real window
+    import tkinter as tk
+    try:
+        import main
+        started = time.perf_counter()
+        app = main.App()
+        app.update()
+    except tk.TclError as error: # No display to open a window on
+        return {"skipped": str(error)}
+    try:
+        canvas = {"home_ms": round((time.perf_counter() - started)*1000, 3)}
+        for level in sorted(levels.get_all()):
+            def build(): # format_general and format_level, which a new Game runs
+                app.show(main.Game, "White", level, 0)
+                app.update_idletasks()
+            canvas["game" + str(level)] = milliseconds(timed(build, repeat))
+        return canvas
+    finally:
+        app.screen.close()
+        app.destroy()
+
+
+def bench_startup(repeat=REPEAT): # Importing each module in a new interpreter, with nothing cached in memory
+    def run(code):
+        return timed(lambda: subprocess.run([sys.executable, "-c", code], cwd=HERE, check=True), repeat)
+    results = {"python": milliseconds(run("pass"))} # The interpreter on its own, to take away from the rest
+    for module in MODULES:
+        results[module] = milliseconds(run("import " + module))
+    return results
+
+
+def run(sizes=SIZES, repeat=REPEAT): # Every benchmark, with what they were run on
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    results = {}
+    for name, benchmark in (("physics", lambda: bench_physics(repeat)), ("scores", lambda: bench_scores(sizes, repeat)),
+                            ("levels", lambda: bench_levels(repeat)), ("startup", lambda: bench_startup(repeat))):
+        print("Running", name, "benchmarks", flush=True)
+        results[name] = benchmark()
+    return {"commit": commit, "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "platform": platform.platform(), "seed": SEED, "repeat": repeat, "results": results}
+
+
+def flatten(results, prefix=""): # path -> number, of every number in the results
+    values = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, prefix + key + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[prefix + key] = value
+    return values
+
+def compare(old, new, threshold=THRESHOLD): # Print what got faster or slower between two runs, returning the regressions
+    old_values = flatten(old["results"])
+    regressions = []
+    for path, value in flatten(new["results"]).items():
+        before = old_values.get(path)
+        if not before or not (path.endswith("_ms") or path.endswith("_per_second")) or path.endswith("median_ms"):
+            continue
+        change = value/before - 1 if path.endswith("_ms") else before/value - 1 # Above 0 is slower either way
+        if abs(change) >= threshold:
+            print(("SLOWER " if change > 0 else "faster ") + path, before, "->", value)
+            if change > 0:
+                regressions.append(path)
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the game without a display")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="where to write the results")
+    parser.add_argument("--compare", help="an earlier results file, exits with 1 if anything is more than 10%% slower")
+    parser.add_argument("--sizes", help="lines of the synthetic scores files, comma separated")
+    parser.add_argument("--quick", action="store_true", help="smaller scores files and fewer repeats")
+    arguments = parser.parse_args()
+    sizes = SIZES[:3] if arguments.quick else SIZES
+    if arguments.sizes:
+        sizes = [int(size) for size in arguments.sizes.split(",")]
+    results = run(sizes, 2 if arguments.quick else REPEAT)
+    with open(arguments.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print("Results written to", arguments.output)
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            if compare(json.load(file), results):
+                sys.exit(1)
@@ -0,0 +1,167 @@
+#   Game client - plays a game on server.py in place of the window, either typing in each shot or as any number of
+#   bots that aim with the hint, with a little human error, to try out a tournament
+#   Usage: python client.py NAME [--resume]
+#          python client.py --bots 200 [--seed N]
+
+import argparse
+import asyncio
+import math as m
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import physics
+import server
+
+ANGLE_NOISE = m.radians(3) # The same mistakes par.py plays with
+POWER_NOISE = 0.08
+CELL = 10 # Bots on spots this close together along x share the hint's shot
+
+
+class Client: # One player's connection to the server, keeping what the server has said about their game
+
+    def __init__(self, name):
+        self.name = name
+        self.number = None # Session id
+        self.level = None
+        self.max_hyp = None
+        self.left_pos = float(physics.START_X)
+        self.bottom_pos = float(physics.START_Y)
+        self.clock = 0 # Steps since the level started, as of the last position
+        self.num_shots = 0
+        self.total_num_shots = 0
+        self.finished = False
+        self.rejected = None # Why the last shot wasn't taken, if it wasn't
+        self.received = 0 # Bytes, to see how compact the messages are
+        self.moves = 0
+
+    #-- Methods --
+    async def connect(self, host=server.HOST, port=server.PORT, resume=False):
+        (self.reader, self.writer) = await asyncio.open_connection(host, port)
+        name = self.name.encode()[:255]
+        self.writer.write(b"J" + server.JOIN.pack(resume, len(name)) + name)
+        while self.level is None: # Up to the first level
+            await self.receive()
+
+    async def receive(self): # Read one message from the server and keep what it says, returning its type
+        kind = await self.reader.readexactly(1)
+        values = server.FROM_SERVER[kind].unpack(await self.reader.readexactly(server.FROM_SERVER[kind].size))
+        self.received += 1 + server.FROM_SERVER[kind].size
+        if kind == b"W":
+            (self.number, self.total_num_shots) = values
+        elif kind == b"L":
+            (self.level, self.max_hyp, self.left_pos, self.bottom_pos) = values
+            (self.clock, self.num_shots) = (0, 0)
+        elif kind == b"M":
+            (self.clock, left_pos, bottom_pos) = values
+            (self.left_pos, self.bottom_pos) = (left_pos/server.SCALE, bottom_pos/server.SCALE)
+            self.moves += 1
+        elif kind == b"E":
+            (outcome, self.num_shots, self.total_num_shots, self.left_pos, self.bottom_pos) = values
+            self.outcome = server.OUTCOMES[outcome]
+        elif kind == b"C":
+            self.finished = True
+        elif kind == b"R":
+            self.rejected = server.REASONS[values[0]]
+        return kind
+
+    async def shoot(self, theta, power, moved=None): # Take a shot and wait for it to end, calling moved() each time the ball moves
+        if not (m.isfinite(theta) and m.isfinite(power)):
+            raise ValueError("theta and power must be numbers")
+        self.writer.write(b"S" + server.SHOT.pack(theta, power))
+        self.rejected = None
+        while True:
+            kind = await self.receive()
+            if kind == b"M" and moved is not None:
+                moved(self)
+            elif kind == b"E":
+                break
+            elif kind == b"R": # Not taken, so the ball is where it was
+                return None
+        if self.outcome == physics.HOLED: # Read on to the next level, or the end of the game
+            while await self.receive() not in (b"L", b"C"):
+                pass
+        return self.outcome
+
+    async def save(self): # Save the score and leave, like pressing S
+        self.writer.write(b"Q")
+        await self.close()
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def play(name, host, port, resume): # Type in each shot, with the ball's position printed as it moves
+    loop = asyncio.get_running_loop()
+    client = Client(name)
+    await client.connect(host, port, resume)
+    print("Session", client.number, "starting on level", client.level, "with", client.total_num_shots, "shots")
+    while not client.finished:
+        print("Level", client.level, "- shot", client.num_shots+1, "from", round(client.left_pos), round(client.bottom_pos), "- max power", client.max_hyp)
+        typed = (await loop.run_in_executor(None, input, "Angle in degrees and power, or S to save and quit: ")).split()
+        if typed and typed[0].lower() == "s":
+            await client.save()
+            print("Saved")
+            return
+        try:
+            (angle, power) = (float(typed[0]), float(typed[1]))
+        except (IndexError, ValueError):
+            continue
+        if not (m.isfinite(angle) and m.isfinite(power)): # float() takes "nan" and "inf"
+            continue
+        outcome = await client.shoot(m.radians(angle), power, lambda client: print("  ", round(client.left_pos), round(client.bottom_pos), end="\r"))
+        if outcome is None:
+            print("Shot not taken:", client.rejected)
+            continue
+        print(outcome, "at", round(client.left_pos), round(client.bottom_pos), "- total", client.total_num_shots)
+    print("Completed with", client.total_num_shots, "shots")
+    await client.close()
+
+
+async def bot(name, host, port, seed, plans, searches): # Play a whole game aiming with the hint, searched for in the searches pool
+    import hint # Only the bots need numpy
+    loop = asyncio.get_running_loop()
+    chooser = random.Random(seed)
+    client = Client(name)
+    await client.connect(host, port)
+    last = None
+    while not client.finished:
+        spot = (client.level, int(round(client.left_pos/CELL))*CELL, int(round(client.bottom_pos)))
+        if spot not in plans: # Every bot on the tee wants the same shot, so it is only searched for once, off the event loop
+            plans[spot] = loop.run_in_executor(searches, hint.find_shot, spot[0], spot[1], spot[2], client.max_hyp)
+        (theta, power) = (await plans[spot])[:2]
+        if power < 1 or spot == last: # The hint found nothing, or it didn't get us anywhere, so have a go at anything
+            (theta, power) = (chooser.uniform(0.2, 2.9), chooser.uniform(0.3, 1)*client.max_hyp)
+        last = spot
+        await client.shoot(theta + chooser.gauss(0, ANGLE_NOISE), power*(1 + chooser.gauss(0, POWER_NOISE)))
+        await asyncio.sleep(chooser.uniform(0, 0.5)) # Thinking about the next shot
+    await client.close()
+    return client
+
+async def tournament(bots, host, port, seed): # Play bots games at once, printing how they got on
+    plans = {} # (level, x, y) -> future of the hint's (theta, power, miss), shared by all the bots
+    started = time.perf_counter()
+    with ProcessPoolExecutor() as searches: # The searches would hold up every bot's messages if run on the event loop
+        clients = await asyncio.gather(*[bot("bot" + str(number), host, port, seed + number, plans, searches) for number in range(bots)])
+    taken = time.perf_counter() - started
+    shots = sum(client.total_num_shots for client in clients)
+    print(bots, "games,", shots, "shots in", round(taken, 1), "s")
+    print("Received", round(sum(client.received for client in clients)/shots), "bytes and", round(sum(client.moves for client in clients)/shots, 1), "moves a shot")
+    for client in sorted(clients, key=lambda client: client.total_num_shots)[:10]:
+        print(" ", client.name, client.total_num_shots)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play a game on the game server")
+    parser.add_argument("name", nargs="?")
+    parser.add_argument("--resume", action="store_true", help="carry on from the last save in this name")
+    parser.add_argument("--bots", type=int, help="play this many bots at once instead")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--host", default=server.HOST)
+    parser.add_argument("--port", type=int, default=server.PORT)
+    arguments = parser.parse_args()
+    if arguments.bots:
+        asyncio.run(tournament(arguments.bots, arguments.host, arguments.port, arguments.seed))
+    elif arguments.name:
+        asyncio.run(play(arguments.name, arguments.host, arguments.port, arguments.resume))
+    else:
+        parser.error("give a name to play, or --bots")
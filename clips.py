@@ -0,0 +1,246 @@
+#   Shot clips - replayed shots drawn offscreen with PIL, so highlights can be exported on a machine without a display
+#   Each level's art is drawn the same way Game.draw_level draws it on the canvas, once, into paletted images of what
+#   is under and over the ball. A frame only redraws the ball and movers in the area they moved over, and a GIF
+#   frame is just that area, written straight to the file so a long game is never all held in memory
+#   Usage: python clips.py [NAME] [--png] [--colour COLOUR]
+
+import argparse
+import os
+import struct
+from PIL import Image, ImageColor, ImageDraw, ImageFont, GifImagePlugin
+import assets
+import levels
+import physics
+import replay
+
+WIDTH = 1366 # The size of the game's canvas
+HEIGHT = 768
+BACKGROUND = "lightblue"
+FLOOR = (0, 720, 1366, 768)
+BLACK = (0, 0, 0)
+FONT_SIZE = 14 # About the size tkinter draws the game's labels
+SCALE = 0.5 # Clips are drawn at half the size of the game
+FPS = 25
+HOLD = 1.0 # Seconds the end of each shot is held for
+CLIPS_DIR = "clips"
+
+
+class Scene: # One level drawn offscreen, ready for the ball and movers to be drawn over it frame by frame
+
+    def __init__(self, level, colour="White", scale=SCALE):
+        self.layout = levels.get(level)
+        self.scale = scale
+        self.size = (round(WIDTH*scale), round(HEIGHT*scale))
+        self.font = ImageFont.load_default(max(8, round(FONT_SIZE*scale)))
+        # Under the ball, the same as the canvas: the lowered shapes, then the floor. The shot label is added for each shot
+        background = Image.new("RGB", self.size, BACKGROUND)
+        for shape in self.layout.shapes:
+            if shape.get("lower"):
+                self.draw_shape(background, shape)
+        ImageDraw.Draw(background).rectangle(self.box(*FLOOR), fill="lime", outline="black")
+        # Over the ball: the hole, the level label and the rest of the shapes
+        foreground = Image.new("RGBA", self.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(foreground)
+        draw.pieslice(self.box(*self.layout.hole["arc"]), 0, 180, fill="black", outline="black")
+        self.text(draw, 1020, 60, "Level " + str(level), "black")
+        for shape in self.layout.shapes:
+            if not shape.get("lower"):
+                self.draw_shape(foreground, shape)
+
+        # One palette for all the frames, from the level's art plus the exact colours of the things that move,
+        # so frames are drawn straight in palette indexes and never need quantizing
+        moving = [colour, "black"] + [mover.fill for mover in self.layout.movers if mover.fill is not None]
+        moving = list(dict.fromkeys(ImageColor.getrgb(name)[:3] for name in moving))
+        still = background.copy()
+        still.paste(foreground, mask=foreground)
+        palette = still.quantize(256 - len(moving), dither=Image.Dither.NONE).getpalette()[:3*(256-len(moving))]
+        self.index = {rgb: len(palette)//3 + order for order, rgb in enumerate(moving)} # Colour -> palette index
+        for rgb in moving:
+            palette.extend(rgb)
+        self.palette = Image.new("P", (1, 1))
+        self.palette.putpalette(palette)
+        self.ball_fill = self.index[ImageColor.getrgb(colour)[:3]]
+        self.mover_fills = [(mover.name, self.index[ImageColor.getrgb(mover.fill)[:3]]) for mover in self.layout.movers if mover.fill is not None]
+        self.background = background.quantize(palette=self.palette, dither=Image.Dither.NONE)
+        self.foreground = foreground.convert("RGB").quantize(palette=self.palette, dither=Image.Dither.NONE)
+        self.mask = foreground.getchannel("A").point(lambda alpha: 255 if alpha >= 128 else 0) # Indexes can't be blended
+        self.base = self.frame = self.tile = None
+        self.items = None # (box, fill) of each thing drawn over the background in the last frame
+        self.label = None # Box of the shot label
+
+    #-- Methods --
+    def box(self, *coords): # Canvas coords to the clip's
+        return [round(coord*self.scale) for coord in coords]
+
+    def text(self, draw, x, y, text, fill):
+        draw.text(self.box(x, y), text, fill=fill, font=self.font, anchor="mm")
+
+    def draw_shape(self, image, shape): # Draw one of a level's shapes the way the canvas would
+        draw = ImageDraw.Draw(image)
+        fill = shape.get("fill")
+        width = round(shape.get("width", 1)*self.scale) or (1 if shape.get("width", 1) else 0)
+        outline = shape.get("outline", "black") if width else None
+        if shape["type"] == "image": # Centred on its coords
+            picture = assets.manager.decode(shape["file"]).convert("RGBA")
+            if self.scale != 1:
+                picture = picture.resize((max(1, round(picture.width*self.scale)), max(1, round(picture.height*self.scale))))
+            (x, y) = self.box(*shape["coords"])
+            image.paste(picture, (x - picture.width//2, y - picture.height//2), picture)
+        elif shape["type"] == "arc": # The canvas goes anticlockwise from start, PIL clockwise
+            start = shape.get("start", 0)
+            draw.pieslice(self.box(*shape["coords"]), -(start + shape.get("extent", 90)), -start, fill=fill, outline=outline, width=width)
+        elif shape["type"] == "rectangle":
+            draw.rectangle(self.box(*shape["coords"]), fill=fill, outline=outline, width=width)
+        elif shape["type"] == "oval":
+            draw.ellipse(self.box(*shape["coords"]), fill=fill, outline=outline, width=width)
+        elif shape["type"] == "polygon": # Polygons are filled black with no outline by default
+            draw.polygon(self.box(*shape["coords"]), fill=shape.get("fill", "black"), outline=shape.get("outline"))
+        elif shape["type"] == "line":
+            draw.line(self.box(*shape["coords"]), fill=shape.get("fill", "black"), width=max(1, width))
+        elif shape["type"] == "text":
+            self.text(draw, *shape["coords"], shape.get("text", ""), shape.get("fill", "black"))
+        else:
+            raise ValueError("Can't draw a " + shape["type"] + " offscreen")
+
+    def start(self, number, fresh=True): # Start a shot, with its number in the shot label
+        # Unless fresh, the last frame drawn is still showing, so only the label needs drawing again as well as what moves
+        self.base = self.background.copy()
+        draw = ImageDraw.Draw(self.base)
+        draw.fontmode = "1" # No antialiasing, the pixels are palette indexes
+        self.text(draw, 120, 60, "Shot number " + str(number), self.index[BLACK])
+        label = tuple(draw.textbbox(self.box(120, 60), "Shot number " + str(number), font=self.font, anchor="mm"))
+        if fresh or self.items is None:
+            self.frame = self.base.copy()
+            self.items = None # Draw all of the next frame
+        else:
+            self.items.append((label, None)) # Make the next frame cover the label, and the old label if it was longer
+            self.items.append((self.label, None))
+        self.label = label
+
+    def draw(self, ball, movers): # Draw the ball and movers where they are now, returning the area of the frame that changed, if any
+        items = [(tuple(self.box(*movers[name])), fill) for name, fill in self.mover_fills]
+        items.append((tuple(self.box(*ball)), self.ball_fill))
+        if items == self.items:
+            return None
+        if self.items is None:
+            area = (0, 0) + self.size
+        else: # Everything that moved, where it was and where it is now, with a pixel spare for the outline
+            boxes = [box for box, fill in items + self.items]
+            area = (max(0, min(box[0] for box in boxes) - 1), max(0, min(box[1] for box in boxes) - 1),
+                    min(self.size[0], max(box[2] for box in boxes) + 2), min(self.size[1], max(box[3] for box in boxes) + 2))
+        self.tile = self.base.crop(area)
+        draw = ImageDraw.Draw(self.tile)
+        for (left_pos, top_pos, right_pos, bottom_pos), fill in items[:-1]:
+            draw.rectangle((left_pos - area[0], top_pos - area[1], right_pos - area[0], bottom_pos - area[1]), fill=fill)
+        (left_pos, top_pos, right_pos, bottom_pos) = items[-1][0]
+        draw.ellipse((left_pos - area[0], top_pos - area[1], right_pos - area[0], bottom_pos - area[1]), fill=self.ball_fill, outline=self.index[BLACK])
+        self.tile.paste(self.foreground.crop(area), (0, 0), self.mask.crop(area))
+        self.frame.paste(self.tile, area[:2])
+        self.items = items
+        return area
+
+
+class GifWriter: # An animated GIF written a frame at a time, each frame only the area that changed
+
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.palette = None # The global palette, from the first frame
+        self.pending = None # [tile, area, duration] of the last frame, not written until we know how long it is shown
+
+    #-- Methods --
+    def add(self, scene, area, duration): # Add scene's latest frame, or show the last one for longer if nothing changed
+        if self.palette is None: # Header, with the first scene's palette as the global one, and loop forever
+            self.palette = scene.palette.getpalette()
+            self.palette.extend([0] * (768 - len(self.palette)))
+            self.file.write(b"GIF89a" + struct.pack("<HHBBB", scene.size[0], scene.size[1], 0xF7, 0, 0) + bytes(self.palette))
+            self.file.write(b"!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")
+        if area is None and self.pending is not None:
+            self.pending[2] += duration
+            return
+        self.write_pending()
+        self.pending = [scene.tile, area, duration]
+
+    def write_pending(self):
+        if self.pending is None:
+            return
+        (tile, area, duration) = self.pending
+        own_palette = tile.getpalette() + [0] * (768 - len(tile.getpalette())) != self.palette # Other levels bring their own
+        for data in GifImagePlugin.getdata(tile, area[:2], duration=duration, disposal=1, include_color_table=own_palette):
+            self.file.write(data)
+        self.pending = None
+
+    def close(self):
+        self.write_pending()
+        self.file.write(b";")
+        self.file.close()
+
+
+class ImageSequence: # Numbered PNGs at a steady frame rate, for a video encoder
+
+    def __init__(self, directory, fps=FPS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.fps = fps
+        self.count = 0
+
+    #-- Methods --
+    def add(self, scene, area, duration):
+        for repeat in range(max(1, round(duration*self.fps/1000))):
+            scene.frame.save(os.path.join(self.directory, "frame%05d.png" % self.count), compress_level=1)
+            self.count += 1
+
+    def close(self):
+        pass
+
+
+def export(shots, writer, colour="White", scale=SCALE, fps=FPS, speed=1.0, scenes=None): # Replay shots one after another into writer
+    scenes = {} if scenes is None else scenes # (level, colour, scale) -> Scene, kept by the caller to use for more games
+    duration = 1000 // fps
+    last_scene = None
+    for shot in shots:
+        key = (shot.level, colour, scale)
+        if key not in scenes:
+            scenes[key] = Scene(shot.level, colour, scale)
+        scene = scenes[key]
+        tables = physics.mover_tables(scene.layout)
+        playback = replay.Playback(shot, speed)
+        scene.start(shot.number, scene is not last_scene)
+        last_scene = scene
+        frame = 0
+        while True:
+            seconds = frame / fps
+            (left_pos, bottom_pos) = playback.position(seconds) or (shot.left_pos, shot.bottom_pos)
+            positions = physics.mover_positions(tables, shot.clock + playback.step(seconds))
+            area = scene.draw((left_pos, bottom_pos - physics.BALL_SIZE, left_pos + physics.BALL_SIZE, bottom_pos),
+                              {name: coords for name, (coords, offset) in positions.items()})
+            if playback.finished(seconds):
+                writer.add(scene, area, duration + int(HOLD*1000))
+                break
+            writer.add(scene, area, duration)
+            frame += 1
+
+
+def export_games(name=None, png=False, colour="White", log=None): # A clip of every game in the shot log, or just the ones saved under name
+    (shots, names) = (log or replay.ShotLog()).read()
+    saved = {game: saved_name for game, saved_name, score, level in names}
+    scenes = {}
+    os.makedirs(CLIPS_DIR, exist_ok=True)
+    for game, played in shots.items():
+        if name is not None and saved.get(game) != name:
+            continue
+        label = "".join(char if char.isalnum() else "_" for char in saved.get(game, "unsaved"))
+        path = os.path.join(CLIPS_DIR, "%s_%016x" % (label, game))
+        writer = ImageSequence(path) if png else GifWriter(path + ".gif")
+        try:
+            export(played, writer, colour, scenes=scenes)
+        finally:
+            writer.close()
+        print(path, len(played), "shots")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export clips of the shots in " + replay.SHOTS_FILE)
+    parser.add_argument("name", nargs="?", help="only games saved under this name")
+    parser.add_argument("--png", action="store_true", help="numbered PNGs instead of a GIF")
+    parser.add_argument("--colour", default="White", help="the ball colour, which isn't recorded")
+    arguments = parser.parse_args()
+    export_games(arguments.name, arguments.png, arguments.colour)
@@ -0,0 +1,96 @@
+#   Shot hints - searches for the shot that lands closest to the hole from where the ball is
+#   The search runs in a process pool so the tkinter mainloop never stalls while it works,
+#   and results are kept so going back to the same spot shows the hint straight away
+#   Shots are searched for from where the movers are and which colliders are latched when the hint is asked for,
+#   so on a level with movers the hint is for that moment of their cycle
+
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import batch
+import levels
+import physics
+
+POLL_INTERVAL = 50 # How often to check on a search, in milliseconds
+MAX_HINTS = 1024 # How many spots to keep the best shot of
+
+
+def target(level): # Middle of the level's hole test in Simulation.in_hole, which is what the search aims for
+    hole = levels.get(level).hole
+    return sum(hole["left"])/2, sum(hole["bottom"])/2
+
+def find_shot(level, x, y, max_hyp, clock=0, latched=(), num_angles=90, num_powers=30, rounds=2):
+    # Sweep the aim space from x,y, then zoom in around the best shot a few times
+    # clock and the orders of the latched colliders are the same as Simulation's when the shot is taken
+    (theta, power, miss) = find_shots(level, [x], [y], max_hyp, num_angles, num_powers, rounds, clock, latched)
+    return float(theta[0]), float(power[0]), float(miss[0]) # theta, power and how far from the hole it ends up
+
+def find_shots(level, x, y, max_hyp, num_angles=90, num_powers=30, rounds=2, clock=0, latched=()):
+    # find_shot from every x,y at once, which is far quicker than one at a time as most of the cost is per step, not per ball
+    x = np.asarray(x, dtype=float)[:, None] # One row of shots for each spot
+    y = np.asarray(y, dtype=float)[:, None]
+    rows = np.arange(len(x))
+    theta, power = batch.aim_grid(max_hyp, num_angles, num_powers)
+    theta, power = np.tile(theta, (len(x), 1)), np.tile(power, (len(x), 1))
+    theta_step = np.pi/(num_angles-1)
+    power_step = max_hyp/num_powers
+    best = (np.zeros(len(x)), np.zeros(len(x)), np.full(len(x), np.inf))
+    (hole_x, hole_y) = target(level)
+    latched = {order: True for order in latched} # The same for every shot
+    for i in range(rounds+1):
+        results = batch.simulate(level, theta, power, max_hyp, x, y, clock=clock, latched=latched)
+        miss = np.hypot(results.left_pos - hole_x, results.bottom_pos - hole_y) # How far from the hole each shot stopped
+        miss[results.holed()] = 0
+        miss = miss.reshape(theta.shape)
+        j = np.argmin(miss, axis=1)
+        better = miss[rows, j] < best[2]
+        best = (np.where(better, theta[rows, j], best[0]), np.where(better, power[rows, j], best[1]), np.where(better, miss[rows, j], best[2]))
+        if not best[2].any(): # Can't do better than going in
+            break
+        # Try a finer grid around the best shot so far
+        theta_offset, power_offset = np.meshgrid(np.linspace(-theta_step, theta_step, 15), np.linspace(-power_step, power_step, 15))
+        theta = np.clip(best[0][:, None] + theta_offset.ravel(), 0, np.pi)
+        power = np.clip(best[1][:, None] + power_offset.ravel(), 0, max_hyp)
+        theta_step /= 7
+        power_step /= 7
+    return best # theta, power and miss, for each spot
+
+
+class HintSolver:
+
+    def __init__(self, max_hints=MAX_HINTS):
+        self.pool = None # Only start the worker processes when a hint is first asked for
+        self.max_hints = max_hints
+        self.cache = OrderedDict() # (level, x, y, max_hyp, clock, latched) -> (theta, power, miss), least recently used first
+        self.pending = {} # Searches still running, so asking twice doesn't search twice, even if the first wait was cancelled
+
+    def request(self, level, x, y, max_hyp, clock, latched, schedule, callback): # Call callback(theta, power, miss) once the best shot is known
+        # schedule is an after() style function, tkinter isn't thread safe so we check on the search from the mainloop
+        # The clock only matters as far as where it is in the movers' cycle, so that is all that is kept
+        key = (level, round(x), round(y), max_hyp, clock % physics.mover_cycle(physics.mover_tables(levels.get(level))), tuple(sorted(latched)))
+        if key in self.cache: # We have been here before, so no need to search again
+            self.cache.move_to_end(key)
+            callback(*self.cache[key])
+            return
+        if key not in self.pending:
+            if self.pool is None:
+                # Spawned rather than forked, as a fork would copy Tk and the snapshot writer's thread half way through what they are doing
+                self.pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+            self.pending[key] = self.pool.submit(find_shot, *key)
+        self.wait(key, schedule, callback)
+
+    def wait(self, key, schedule, callback):
+        future = self.pending.get(key)
+        if future is None: # Another request has already collected the result, ask again in case it has since been dropped
+            self.request(*key, schedule, callback)
+        elif not future.done():
+            schedule(POLL_INTERVAL, self.wait, key, schedule, callback)
+        else:
+            del self.pending[key]
+            self.cache[key] = result = future.result()
+            while len(self.cache) > self.max_hints:
+                self.cache.popitem(last=False)
+            callback(*result)
+
+solver = HintSolver() # Shared by every window, so the cache lasts the whole game
@@ -0,0 +1,285 @@
+#   Level loading - each level is described in levels.json, with the shapes to draw, the max power,
+#   the things that move and the surfaces the ball can hit. The surfaces are compiled into a grid so each
+#   physics step only checks the ones near the ball, however many a level has
+#   Everything that moves goes round a fixed path, so where it is at each physics step of one trip round
+#   is worked out once, and the physics just looks it up from how many steps it has taken
+#   The collider checks use & and | so they work on single numbers and on numpy arrays of balls alike
+#   As well as checking where the ball is, walls and roofs check if the ball went straight through them
+#   during a step, so fast balls can't tunnel through the thin bands the checks look in
+
+import json
+import math as m
+import os
+
+LEVELS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels.json")
+CELL_SIZE = 64 # Size of each square of the collision grid, a bit bigger than the ball
+INFINITY = float("inf")
+MAX_PERIOD = 1000000 # The most steps a mover can take to get back to where it started
+
+
+class Mover: # Something in a level that keeps going round the same path, like the slit
+
+    def __init__(self, data):
+        self.name = data["name"]
+        self.coords = tuple(data["coords"]) # Where it starts
+        self.fill = data.get("fill") # Drawn as a rectangle this colour, if it has one
+        self.tables = {} # Step interval -> (coords, offset) after each step of one trip round
+
+    def positions(self, interval): # Where it is after each physics step, worked out the first time we are asked
+        table = self.tables.get(interval)
+        if table is None:
+            table = self.tables[interval] = [(self.moved(x_offset, y_offset), (x_offset, y_offset)) for x_offset, y_offset in self.offsets(interval)]
+        return table
+
+    def moved(self, x_offset, y_offset): # Its coords after moving it by the offset
+        (left_pos, top_pos, right_pos, bottom_pos) = self.coords
+        return left_pos + x_offset, top_pos + y_offset, right_pos + x_offset, bottom_pos + y_offset
+
+
+class Bounce(Mover): # Moves a set distance on every tick of its own clock, turning round at its limits
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.axis = data.get("axis", "y")
+        self.speed = data["speed"] # Pixels moved each tick
+        self.limits = data["limits"] # It turns round once its edges get to these
+        self.interval = data["interval"] # Time between ticks, in seconds
+
+    def offsets(self, interval):
+        # Play it through one step at a time until it is back at the start, going the same way at the same point of its clock
+        # The clocks are kept in whole milliseconds so they line up exactly with the steps
+        step_ms = round(interval*1000)
+        tick_ms = round(self.interval*1000)
+        (low, high) = (1, 3) if self.axis == "y" else (0, 2)
+        offset, speed, clock = 0, self.speed, 0
+        offsets = []
+        while True:
+            offsets.append((0, offset) if self.axis == "y" else (offset, 0))
+            if clock <= 0:
+                offset += speed
+                if self.coords[high] + offset >= self.limits[1] or self.coords[low] + offset <= self.limits[0]:
+                    speed *= -1
+                clock += tick_ms
+            clock -= step_ms
+            if (offset, speed, clock) == (0, self.speed, 0):
+                return offsets
+            if len(offsets) >= MAX_PERIOD:
+                raise ValueError("mover " + self.name + " never gets back to where it started")
+
+
+class Oscillator(Mover): # Swings smoothly back and forth along one axis
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.axis = data.get("axis", "x")
+        self.amplitude = data["amplitude"] # Furthest it gets from where it starts
+        self.period = data["period"] # Seconds to swing there and back
+
+    def offsets(self, interval):
+        steps = max(1, round(self.period/interval))
+        swings = [self.amplitude*m.sin(2*m.pi*step/steps) for step in range(steps)]
+        return [(0, swing) if self.axis == "y" else (swing, 0) for swing in swings]
+
+
+class Rotator(Mover): # Goes round in a circle, staying upright so its colliders still line up with the axes
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.radius = data["radius"] # Starting from the right hand side of the circle
+        self.period = data["period"] # Seconds to go round once, negative goes the other way
+
+    def offsets(self, interval):
+        steps = max(1, round(abs(self.period)/interval))
+        angles = [2*m.pi*step/steps * (1 if self.period > 0 else -1) for step in range(steps)]
+        return [(self.radius*(m.cos(angle)-1), -self.radius*m.sin(angle)) for angle in angles]
+
+MOVER_TYPES = {"bounce": Bounce, "oscillate": Oscillator, "rotate": Rotator}
+
+
+def shift(coords, x_offset, y_offset): # Coords moved back by an offset, so they can be checked against something that has moved by it
+    (left_pos, top_pos, right_pos, bottom_pos) = coords
+    return left_pos - x_offset, top_pos - y_offset, right_pos - x_offset, bottom_pos - y_offset
+
+
+class Collider: # Something in a level the ball can hit, and what happens to it when it does
+
+    def __init__(self, order, data):
+        self.order = order # Colliders are checked in the order they are listed, and only the first hit counts
+        self.name = data.get("name", data["type"])
+        self.once = data.get("once", False) # Floors only - acts once, until the ball lands on the floor somewhere else
+        self.gap = data.get("gap") # The mover it doesn't act where, like the slit
+        self.mover = data.get("mover") # The mover it is carried along by, its numbers are for where the mover starts
+        self.sweeps = False # Whether sweep() can find a ball that went through it
+
+    def outside_gap(self, top_pos, bottom_pos, gap): # gap is the coords of the gap mover, or None
+        if gap is None:
+            return True
+        return (bottom_pos >= gap[3]) | (top_pos <= gap[1])
+
+
+class Floor(Collider): # A patch of floor with its own bounce and friction, like a bunker or ice
+
+    def __init__(self, order, data):
+        super().__init__(order, data)
+        self.y = data["y"]
+        self.x = data["x"] # The ball is on it if any of it is between these
+        self.x_factor = data.get("friction", 1.0)
+        self.y_factor = -data["bounce"] if "bounce" in data else 1.0 # Surfaces without a bounce leave the bounce to the floor
+        self.snap = ("bottom", self.y)
+        self.zone = (self.x[0], self.y, self.x[1], INFINITY) # Anything below the floor counts, so there is nothing to sweep for
+
+    def over(self, left_pos, right_pos):
+        return (right_pos >= self.x[0]) & (left_pos <= self.x[1])
+
+    def matches(self, left_pos, top_pos, right_pos, bottom_pos, gap):
+        return (bottom_pos >= self.y) & self.over(left_pos, right_pos) & self.outside_gap(top_pos, bottom_pos, gap)
+
+
+class Wall(Collider): # The side of something, facing left or right
+
+    def __init__(self, order, data):
+        super().__init__(order, data)
+        self.face = data["face"]
+        self.x = data["x"]
+        self.depth = data["depth"] # How far past the face the ball can get and still be pushed back
+        self.y = data.get("y", [-INFINITY, INFINITY]) # The range the bottom of the ball has to be in
+        self.x_factor = -data["bounce"]
+        self.y_factor = 1.0
+        self.sweeps = True
+        if self.face == "left":
+            self.snap = ("right", self.x)
+            self.zone = (self.x, self.y[0], self.x + self.depth, self.y[1])
+        else:
+            self.snap = ("left", self.x)
+            self.zone = (self.x - self.depth, self.y[0], self.x, self.y[1])
+
+    def sweep(self, previous, current, gap): # Whether the ball crossed the face during the step, and how far through the step it did
+        (left_before, top_before, right_before, bottom_before) = previous
+        (left_pos, top_pos, right_pos, bottom_pos) = current
+        if self.face == "left": # Adding the == stops dividing by zero when the ball didn't move
+            crossed = (right_before < self.x) & (right_pos >= self.x)
+            fraction = (self.x - right_before) / (right_pos - right_before + (right_pos == right_before))
+        else:
+            crossed = (left_before > self.x) & (left_pos <= self.x)
+            fraction = (left_before - self.x) / (left_before - left_pos + (left_before == left_pos))
+        bottom_then = bottom_before + fraction*(bottom_pos - bottom_before) # Where the ball was when it crossed
+        top_then = top_before + fraction*(top_pos - top_before)
+        return crossed & (self.y[0] <= bottom_then) & (bottom_then <= self.y[1]) & self.outside_gap(top_then, bottom_then, gap), fraction
+
+    def matches(self, left_pos, top_pos, right_pos, bottom_pos, gap):
+        if self.face == "left":
+            edge = (self.x + self.depth >= right_pos) & (right_pos >= self.x)
+        else:
+            edge = (self.x - self.depth <= left_pos) & (left_pos <= self.x)
+        return edge & (self.y[0] <= bottom_pos) & (bottom_pos <= self.y[1]) & self.outside_gap(top_pos, bottom_pos, gap)
+
+
+class Roof(Collider): # The top of something the ball can land on
+
+    def __init__(self, order, data):
+        super().__init__(order, data)
+        self.y = data["y"]
+        self.depth = data["depth"]
+        self.x = data["x"] # The range the right of the ball has to be in
+        self.x_factor = data.get("friction", 1.0)
+        self.y_factor = -data["bounce"]
+        self.snap = ("bottom", self.y)
+        self.zone = (self.x[0], self.y, self.x[1], self.y + self.depth)
+        self.sweeps = True
+
+    def sweep(self, previous, current, gap): # Whether the ball fell through the roof during the step, and how far through the step it did
+        (left_before, top_before, right_before, bottom_before) = previous
+        (left_pos, top_pos, right_pos, bottom_pos) = current
+        crossed = (bottom_before < self.y) & (bottom_pos >= self.y)
+        fraction = (self.y - bottom_before) / (bottom_pos - bottom_before + (bottom_pos == bottom_before))
+        right_then = right_before + fraction*(right_pos - right_before)
+        top_then = top_before + fraction*(top_pos - top_before)
+        return crossed & (self.x[0] <= right_then) & (right_then <= self.x[1]) & self.outside_gap(top_then, self.y, gap), fraction
+
+    def matches(self, left_pos, top_pos, right_pos, bottom_pos, gap):
+        return (self.y <= bottom_pos) & (bottom_pos <= self.y + self.depth) & (self.x[0] <= right_pos) & (right_pos <= self.x[1]) & self.outside_gap(top_pos, bottom_pos, gap)
+
+COLLIDER_TYPES = {"floor": Floor, "wall": Wall, "roof": Roof}
+
+
+class CollisionGrid: # Uniform grid of which colliders could be hit from each square
+
+    def __init__(self, colliders, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        # The grid only needs to cover the colliders, anything past its edge goes in the edge squares
+        xs = [int(x // cell_size) for collider in colliders for x in collider.zone[0::2] if abs(x) != INFINITY] or [0]
+        ys = [int(y // cell_size) for collider in colliders for y in collider.zone[1::2] if abs(y) != INFINITY] or [0]
+        self.bounds = (min(xs), min(ys), max(xs), max(ys))
+        self.cells = {}
+        for collider in colliders:
+            (left, top, right, bottom) = self.cell_range(*collider.zone)
+            for cell_x in range(left, right+1):
+                for cell_y in range(top, bottom+1):
+                    self.cells.setdefault((cell_x, cell_y), []).append(collider)
+        self.cache = {} # Candidates for each range of squares we have been asked about
+
+    def cell(self, pos, first, last): # The square a coordinate is in
+        if pos == -INFINITY:
+            return first
+        if pos == INFINITY:
+            return last
+        return min(max(int(pos // self.cell_size), first), last)
+
+    def cell_range(self, left_pos, top_pos, right_pos, bottom_pos): # The squares a box covers
+        (first_x, first_y, last_x, last_y) = self.bounds
+        return (self.cell(left_pos, first_x, last_x), self.cell(top_pos, first_y, last_y),
+                self.cell(right_pos, first_x, last_x), self.cell(bottom_pos, first_y, last_y))
+
+    def candidates(self, left_pos, top_pos, right_pos, bottom_pos): # The colliders near a ball, in the order to check them
+        size = self.cell_size
+        key = (int(left_pos // size), int(top_pos // size), int(right_pos // size), int(bottom_pos // size))
+        found = self.cache.get(key)
+        if found is None: # Only work out the squares the first time the ball covers them
+            (left, top, right, bottom) = self.cell_range(left_pos, top_pos, right_pos, bottom_pos)
+            found = {}
+            for cell_x in range(left, right+1):
+                for cell_y in range(top, bottom+1):
+                    for collider in self.cells.get((cell_x, cell_y), ()):
+                        found[collider.order] = collider
+            found = self.cache[key] = tuple(found[order] for order in sorted(found))
+        return found
+
+
+class Level:
+
+    def __init__(self, number, data, hole):
+        self.number = number
+        self.max_hyp = data["max_hyp"]
+        self.hole = data.get("hole", hole)
+        self.shapes = data.get("shapes", [])
+        self.images = [shape["file"] for shape in self.shapes if shape["type"] == "image"] # Image files the shapes need
+        self.movers = [MOVER_TYPES[mover["path"]](mover) for mover in data.get("movers", [])]
+        self.colliders = [COLLIDER_TYPES[collider["type"]](order, collider) for order, collider in enumerate(data.get("colliders", []))]
+        names = {mover.name for mover in self.movers}
+        for collider in self.colliders:
+            for name in (collider.gap, collider.mover):
+                if name is not None and name not in names:
+                    raise ValueError("level " + str(number) + " has no mover called " + name)
+        # Colliders on movers could be anywhere, so they are checked on every step instead of going in the grid
+        self.moving = tuple(collider for collider in self.colliders if collider.mover is not None)
+        self.grid = CollisionGrid([collider for collider in self.colliders if collider.mover is None])
+
+
+def load(path=LEVELS_FILE): # Read every level in the file, by level number
+    with open(path) as file:
+        data = json.load(file)
+    return {int(number): Level(int(number), level, data["hole"]) for number, level in data["levels"].items()}
+
+loaded = None
+
+def get_all(): # Every level in levels.json, only reading the file the first time
+    global loaded
+    if loaded is None:
+        loaded = load()
+    return loaded
+
+def get(number):
+    return get_all()[number]
+
+def last(): # The number of the final level
+    return max(get_all())
@@ -5,18 +5,73 @@
 
 import tkinter as tk
 import math as m
-from PIL import ImageTk
-
-class Window(tk.Tk): # Inherit an empty window
-
-    def __init__(self, colour, level, score):
+import random
+import sys
+import assets
+import physics
+import levels
+import scores
+import scheduler
+import renderer
+import preview
+import replay
+import profiling
+import snapshots
+
+MAX_PLAYERS = 40 # In a party game
+PARTY_COLOURS = ("Red", "Yellow", "Orange", "Purple", "Pink", "Blue", "Brown", "Cyan", "Magenta", "Grey") # For everyone after the first player
+
+class App(tk.Tk): # The one window for the whole game, showing one screen at a time
+
+    def __init__(self, profile=False):
         super().__init__() # This initialises our empty window, allowing us to call it self
-        self.colour = colour
-
+        self.profiler = profiling.Profiler() if profile else None # Times every frame while it is set, kept here so it lasts between screens
         #Specifying what the window should look like
-        self.title("2D Golf Game")
         self.geometry("1366x768") #One of the standard sizes
         self.resizable(width=False, height=False)
+        self.screen = None
+        self.show(Home)
+        self.focus_force() # Focus onto this window
+
+    #-- Methods --
+    def show(self, screen, *args): # Swap the current screen for a new one, made with args
+        if self.screen is not None:
+            self.screen.close()
+        self.screen = screen(self, *args)
+        self.title(self.screen.window_title)
+        self.screen.place(x=0,y=0,relwidth=1,relheight=1)
+
+
+class Screen(tk.Frame): # A screen of the game, which stops its timers and key binds when it is closed
+    window_title = "2D Golf Game"
+
+    def __init__(self, app, **options):
+        super().__init__(app, **options)
+        self.app = app
+        self.key_binds = {} # sequence -> bind id, of the keys we have bound on the app
+        self.timers = scheduler.Scheduler(self) # Everything we run with after() goes through here, so it can all be stopped
+
+    #-- Methods --
+    def bind_key(self, sequence, callback): # Keys are bound on the app, so they work whatever has focus
+        self.key_binds[sequence] = self.app.bind(sequence, callback)
+
+    def unbind_key(self, sequence):
+        bind_id = self.key_binds.pop(sequence, None)
+        if bind_id is not None:
+            self.app.unbind(sequence, bind_id)
+
+    def close(self): # Stop everything we started, then go away
+        self.timers.cancel_all()
+        for sequence in list(self.key_binds):
+            self.unbind_key(sequence)
+        self.destroy()
+
+
+class Game(Screen): # Playing a level
+
+    def __init__(self, app, colour, level, score, snapshot=None):
+        super().__init__(app)
+        self.colour = colour
 
         #Some parameters with starting values
         self.ball_pos_x = 5 
@@ -28,368 +83,581 @@ class Window(tk.Tk): # Inherit an empty window
         self.total_num_shots = score
         self.current_level = level
         self.max_hyp = 280
+        self.hint_mode = False # Whether to show the best shot from where the ball is
+        self.hint_key = None # Where the last hint was asked for
+        self.preview_mode = False # Whether to show the dotted path of the shot we are aiming
+        self.mouse = None # Where the mouse moved to since the last frame, if it has
+        self.game_id = random.getrandbits(64) # So the shots we record can be found from the score we save
+        self.shot = None # The shot in flight, recorded when it ends
 
         #Creating a canvas
         self.canvas = tk.Canvas(self, width="1366", height="768", bg="lightblue")
         self.canvas.grid() # We can use pack since it fills the entire window
+        self.renderer = renderer.Renderer(self.canvas) # Everything on the canvas is changed through here, once a frame
+        self.level_images = [] # Keep hold of the images, or tkinter will lose them
+        self.mover_items = {} # level -> {name: rectangle}, of the movers we can see, like the slit
         self.format_general()
-        if self.current_level == 1: #In case we are loading a saved game
-            self.format_level1()
-        elif self.current_level == 2:
-            self.format_level2()
-        elif self.current_level == 3:
-            self.format_level3()
-
+        self.format_level() #In case we are loading a saved game
+        self.game_loop = scheduler.GameLoop(self.timers, self.update, self.render) # Moves the ball and movers at a fixed rate
+        self.game_loop.start()
+        self.profile_timer = None # Redraws the frame times, while profiling
+        self.profile()
 
         #Launch the key bindings
-        self.start()
+        if snapshot is None:
+            self.start()
+        else: # Carry on from exactly where the game was saved
+            self.restore(snapshot)
         # Cheat codes and boss- key needs to be always enabled
-        self.boss_key_bind = self.bind("1", self.boss_key)
-        self.bind("2", self.reduce_score)
-        self.bind("3", self.skip_level)
-        self.bind("4", self.increase_max_power)
-        self.focus_force() # Focus onto this window
-        self.mainloop()
+        self.bind_key("1", self.boss_key)
+        self.bind_key("2", self.reduce_score)
+        self.bind_key("3", self.skip_level)
+        self.bind_key("4", self.increase_max_power)
+        self.bind_key("h", self.toggle_hint)
+        self.bind_key("t", self.toggle_preview)
+        self.bind_key("f", self.toggle_profiler)
+        self.bind_key("<F12>", self.dump_trace)
 
     #-- Methods --
     def format_general(self):
-        #Basic layout of any level
-        #Creating the ball
-        self.ball = Ball(self.canvas, self.restart_pointer, self.level_passed, self.current_level, self.colour)
+        #Basic layout of any level, made once and kept for every level
+        #Creating the ball, each level moves it with its own Ball
+        self.ball_item = self.canvas.create_oval(0,0,0,0,fill=self.colour,state=renderer.HIDDEN,tags="ball")#Radius 15px
         #Creating the floor
         self.canvas.create_rectangle(0,720,1366,768,fill="lime")
-        #Creating the hole
-        self.canvas.create_arc(1200,700,1240,740,start=180,extent=180,fill="black")
         #Creating shot counter label
         self.shot_label = self.canvas.create_text(120,60,text="Shot number "+ str(self.num_shots),font="Volleyball")
-        self.canvas.create_text(1020,60,text="Level "+ str(self.current_level),font="Volleyball")
-
-    def format_level1(self):
-        self.canvas.create_arc(400,700,600,740,start=180,extent=180,fill="yellow") #Creating a bunker
-        self.ice_floor = ImageTk.PhotoImage(file="ice_texture.jpg")
-        self.canvas.create_image(800,735, image = self.ice_floor) #Image free to use https://pxhere.com/en/photo/830142?utm_content=shareClip&utm_medium=referral&utm_source=pxhere 
-
-    def format_level2(self):
-        self.building = ImageTk.PhotoImage(file = "building.png") #Image free to use from https://www.cleanpng.com/png-building-png-64617/
-        self.canvas.create_image(600,620,image = self.building) 
-        self.max_hyp = 350 #Setting the max power for this level
-
-    def format_level3(self):
-        self.wall = self.canvas.create_rectangle(500,0,530,768,fill="black",width=0)
-        self.canvas.tag_lower(self.wall) # Dropping this down a layer so the slit goes over it
-        self.max_hyp = 400
-
-
-    def aim_cursor(self, event): # Follow the pointer to where the mouse is aiming
-        x,y = event.x, event.y #x and y are the coordinates of where we aimed
-        self.relative_x = x - self.ball_pos_x #Relative distance x direction from ball to where we aimed
-        self.relative_y = self.ball_pos_y - y #Relative distance y direction from ball to where we aimed
-        if self.relative_x > 0: #Use only positive values for theta
-            self.theta = m.atan(self.relative_y/self.relative_x)
-        elif self.relative_x < 0:
-            self.theta = m.pi + m.atan(self.relative_y/self.relative_x)
-        else:
-            self.theta = m.pi/2 # And have boundary for if we shoot straight up
-        
-        hyp = m.sqrt(self.relative_x**2 + self.relative_y**2) # Calculate the hypotenuse
-        if hyp > self.max_hyp: #If we are shooting too hard, instead shoot at predetermined power
-            x = (self.max_hyp * m.cos(self.theta)) + self.ball_pos_x
-            y = (self.ball_pos_y - (self.max_hyp * m.sin(self.theta)))
-            #Need to set relativex and y so that there is a limit of power
-            self.relative_x = x - self.ball_pos_x
-            self.relative_y = self.ball_pos_y - y
+        #The pointer and messages, hidden until they are needed, and always kept on top
+        self.pointer = self.canvas.create_line(0,0,0,0,fill="black",dash=(5,5),arrow=tk.LAST,state=renderer.HIDDEN,tags="overlay")
+        self.canvas.create_text(650,350,text="GAME PAUSED",font=("Volleyball",20),state=renderer.HIDDEN,tags=("overlay","paused"))
+        self.canvas.create_text(700,400,text="Press S to save and exit",font=("Volleyball",12),state=renderer.HIDDEN,tags=("overlay","paused"))
+        self.canvas.create_text(700,450,text=". . . Or Space to unpause",font=("Volleyball",12),state=renderer.HIDDEN,tags=("overlay","paused"))
+        self.canvas.create_text(650,350,text="LEVEL COMPLETE",font=("Volleyball",20),state=renderer.HIDDEN,tags=("overlay","complete"))
+        self.canvas.create_text(650,400,text="Press Enter for next level",font=("Volleyball",12),state=renderer.HIDDEN,tags=("overlay","next"))
+        self.profile_label = self.canvas.create_text(1356,90,text="",anchor="ne",font=("Courier",10),state=renderer.HIDDEN,tags="overlay")
+        self.preview_dots = [self.canvas.create_oval(0,0,0,0,fill="white",width=0,state=renderer.HIDDEN,tags=("overlay","preview")) for i in range(preview.DOTS)]
+
+    def format_level(self): # Show the layout of the current level, from levels.json, with a new Ball to play it
+        layout = levels.get(self.current_level)
+        self.renderer.show_layer("level" + str(self.current_level), self.draw_level)
+        self.ball = self.new_ball()
+        self.max_hyp = layout.max_hyp #Setting the max power for this level
+        if self.app.profiler is not None:
+            self.app.profiler.instrument(self.ball.physics, **self.ball.stages)
+        if self.current_level < levels.last(): # Get the next level's images ready while this one is played
+            assets.manager.preload(levels.get(self.current_level+1).images)
+
+    def new_ball(self): # The Ball that plays the current level
+        return Ball(self.renderer, self.ball_item, self.mover_items[self.current_level], self.restart_pointer, self.level_passed, self.current_level)
+
+    def draw_level(self, tag): # Make the items of the current level, the first time it is shown
+        layout = levels.get(self.current_level)
+        movers = self.mover_items[self.current_level] = {}
+        for mover in layout.movers:
+            if mover.fill is not None:
+                movers[mover.name] = self.canvas.create_rectangle(*mover.coords,fill=mover.fill,width=0,tags=tag)
+                self.canvas.tag_raise("ball", movers[mover.name]) # Keep the balls visible over them
+        #Creating the hole
+        self.canvas.create_arc(*layout.hole["arc"],start=180,extent=180,fill="black",tags=tag)
+        self.canvas.create_text(1020,60,text="Level "+ str(self.current_level),font="Volleyball",tags=tag)
+        for shape in layout.shapes:
+            options = {key: value for key, value in shape.items() if key not in ("type", "coords", "file", "lower")}
+            if shape["type"] == "image":
+                # Ice texture free to use https://pxhere.com/en/photo/830142?utm_content=shareClip&utm_medium=referral&utm_source=pxhere
+                # Building free to use from https://www.cleanpng.com/png-building-png-64617/
+                self.level_images.append(assets.manager.photo(shape["file"], self.app))
+                options["image"] = self.level_images[-1]
+            item = getattr(self.canvas, "create_" + shape["type"])(*shape["coords"], tags=tag, **options)
+            if shape.get("lower"):
+                self.canvas.tag_lower(item) # Dropping this down a layer so the movers go over it
+        self.canvas.tag_raise("overlay")
+
+    def update(self): # One physics step, run by the game loop
+        self.ball.update()
+
+    def render(self, alpha): # Draw a frame, sending the canvas only what changed
+        self.aim()
+        if self.preview_mode and self.aiming and self.ball.physics.tables: # The movers have moved on, so the shot might go somewhere else now
+            self.draw_preview()
+        self.ball.render(alpha)
+        self.renderer.flush()
+
+    def aim_cursor(self, event): # Remember where the mouse is, the pointer only follows it once a frame
+        self.mouse = (event.x, event.y)
+
+    def aim(self): # Follow the pointer to where the mouse is aiming, if it has moved
+        if self.mouse is None or not self.aiming:
+            return
+        (x, y) = self.mouse
+        self.mouse = None
+        #x and y are the coordinates of where we aimed, if we are shooting too hard the relative x and y are limited to max_hyp
+        self.theta, self.relative_x, self.relative_y = physics.aim(self.ball_pos_x, self.ball_pos_y, x, y, self.max_hyp)
+        x = self.ball_pos_x + self.relative_x
+        y = self.ball_pos_y - self.relative_y
 
         #Updating the coords of the line
-        self.canvas.coords(self.pointer,self.ball_pos_x+15,self.ball_pos_y-15,x,y)#Pointer starts in center of ball
-    
+        self.renderer.coords(self.pointer,self.ball_pos_x+15,self.ball_pos_y-15,x,y)#Pointer starts in center of ball
+        self.draw_preview()
+
+    def draw_preview(self): # Dot the path of the shot we are aiming, if the preview is on
+        points = []
+        if self.preview_mode and self.aiming:
+            points = preview.cache.points(self.current_level, self.ball_pos_x, self.ball_pos_y, self.theta, m.hypot(self.relative_x, self.relative_y), *self.ball_state())
+        for i, dot in enumerate(self.preview_dots):
+            if i < len(points):
+                (x, y) = points[i]
+                self.renderer.coords(dot,x-2,y-2,x+2,y+2)
+                self.renderer.show(dot)
+            else:
+                self.renderer.hide(dot)
+
+    def toggle_preview(self, event): # Turn the shot preview on or off
+        self.preview_mode = not self.preview_mode
+        self.draw_preview()
+
+    def toggle_profiler(self, event): # Start or stop timing frames, showing the times over the level
+        if self.app.profiler is None:
+            self.app.profiler = profiling.Profiler()
+            self.app.profiler.instrument(self.ball.physics, **self.ball.stages)
+        else:
+            self.app.profiler = None
+            profiling.uninstrument(self.ball.physics, *self.ball.stages)
+        self.profile()
+
+    def profile(self): # Time the game loop and drawing with the app's profiler and show the times, or stop if it hasn't one
+        profiler = self.app.profiler
+        self.game_loop.profile(profiler)
+        if self.profile_timer is not None:
+            self.timers.cancel(self.profile_timer)
+            self.profile_timer = None
+        if profiler is None:
+            profiling.uninstrument(self.renderer, *profiling.RENDERER)
+            self.renderer.hide(self.profile_label)
+        else:
+            profiler.instrument(self.renderer, **profiling.RENDERER)
+            self.renderer.show(self.profile_label)
+            self.draw_profile()
+            self.profile_timer = self.timers.every(500, self.draw_profile)
+
+    def draw_profile(self):
+        self.renderer.configure(self.profile_label, text=self.app.profiler.summary())
+
+    def dump_trace(self, event): # Write what the profiler has kept to a trace file, showing where on the overlay
+        if self.app.profiler is not None:
+            self.app.profiler.dump()
+            self.draw_profile()
+
     def fire(self, event): #Prepare the values before firing the ballc
-        self.ball.x_velocity = (self.relative_x)/40 #Lowering the value of the velocity before passing them
-        self.ball.y_velocity = (-self.relative_y)/40
+        self.aim() # Catch up with the mouse, in case it moved since the last frame
         self.canvas.unbind("<Motion>", self.aim_bind) #Unbind so we cant aim while shooting
         self.canvas.unbind("<Button-1>", self.shoot_bind) # Unbind so we cant shoot again until ball has stopped moving
-        self.canvas.delete(self.pointer)
+        self.renderer.hide(self.pointer)
+        self.aiming = False
+        self.draw_preview()
+        self.hint_key = None # Any hint still being searched for is for where we were
         self.num_shots += 1
-        self.canvas.itemconfigure(self.shot_label, text="Shot number "+ str(self.num_shots))
-        self.ball.animate_ball()
+        self.renderer.configure(self.shot_label, text="Shot number "+ str(self.num_shots))
+        self.shoot()
+
+    def shoot(self): # Send the ball off, keeping the shot to record when it ends
+        self.shot = replay.taken(self.game_id, self.num_shots, self.current_level, self.ball.physics, self.relative_x, self.relative_y, self.max_hyp)
+        self.ball.shoot(self.relative_x, self.relative_y)
 
     def start(self): #Rebinding binds after they have been unbound
         self.aim_bind = self.canvas.bind("<Motion>", self.aim_cursor)
         self.shoot_bind = self.canvas.bind("<Button-1>", self.fire)
-        self.pause_bind = self.bind("<space>", self.pause)
-        self.pointer = self.canvas.create_line(self.ball_pos_x+15,self.ball_pos_y-15,self.ball_pos_x+100,self.ball_pos_y-100,fill="black",dash=(5,5),arrow=tk.LAST) #Re-create the pointer, in the center of the ball
+        self.bind_key("<space>", self.pause)
+        self.renderer.coords(self.pointer,self.ball_pos_x+15,self.ball_pos_y-15,self.ball_pos_x+100,self.ball_pos_y-100) #Bring back the pointer, in the center of the ball
+        self.renderer.show(self.pointer)
+        self.aiming = True
+        self.mouse = None # Wait for the mouse to move before following it
+        if self.hint_mode:
+            self.show_hint()
+
+    def record_shot(self): # Add the shot that just ended to the shot log
+        self.shot.finish(self.ball.physics, self.ball.steps)
+        replay.ShotLog().add_shot(self.shot)
 
     def restart_pointer(self): # Restart the pointer after the ball has landed
+        self.record_shot()
         left_pos, bottom_pos = self.ball.get_coordinates() #Get the coordinates of the ball 
         self.ball_pos_x = left_pos #Update the ball_pos_x and y
         self.ball_pos_y = bottom_pos
+        self.autosave()
         self.start()
     
+    def snapshot(self): # Everything needed to carry on from exactly here
+        ball = self.ball.physics
+        max_hyp = self.max_hyp
+        if ball.level != self.current_level: # Between levels, so carry on from the tee of the next one
+            ball = physics.Simulation(self.current_level)
+            max_hyp = levels.get(self.current_level).max_hyp
+        in_flight = self.ball.in_flight and ball is self.ball.physics
+        flags = (snapshots.IN_FLIGHT if in_flight else 0) | (snapshots.HINT if self.hint_mode else 0) | (snapshots.PREVIEW if self.preview_mode else 0)
+        return snapshots.Snapshot(self.game_id, self.current_level, self.num_shots, self.total_num_shots, max_hyp, ball.clock,
+                                  sorted(ball.latched), ball.left_pos, ball.bottom_pos, ball.x_velocity, ball.y_velocity,
+                                  self.ball.steps if in_flight else 0, flags, self.theta, self.relative_x, self.relative_y, self.colour,
+                                  self.shot if in_flight else None)
+
+    def autosave(self): # Keep a snapshot after every shot, to carry on from if the game is closed
+        snapshots.writer.save(snapshots.AUTOSAVE_FILE, self.snapshot().pack())
+
+    def restore(self, snapshot): # Put the game back how the snapshot has it, the level itself is already made
+        self.game_id = snapshot.game
+        self.num_shots = snapshot.num_shots
+        self.max_hyp = snapshot.max_hyp
+        self.hint_mode = snapshot.is_set(snapshots.HINT)
+        self.preview_mode = snapshot.is_set(snapshots.PREVIEW)
+        self.theta, self.relative_x, self.relative_y = snapshot.theta, snapshot.relative_x, snapshot.relative_y
+        self.renderer.configure(self.shot_label, text="Shot number "+ str(self.num_shots))
+        ball = self.ball.physics
+        ball.left_pos, ball.bottom_pos = snapshot.left_pos, snapshot.bottom_pos
+        ball.x_velocity, ball.y_velocity = snapshot.x_velocity, snapshot.y_velocity
+        ball.latched = set(snapshot.latched)
+        ball.clock = snapshot.clock # Puts the movers back where they were
+        ball.positions = physics.mover_positions(ball.tables, ball.clock)
+        self.ball.previous = ball.coords()
+        self.renderer.coords(self.ball_item,*ball.coords())
+        if not snapshot.is_set(snapshots.IN_FLIGHT):
+            self.ball_pos_x, self.ball_pos_y = ball.left_pos, ball.bottom_pos
+            self.start()
+            return
+        # Saved part way through a shot, which can only be done paused, so wait for them to unpause it
+        self.shot = snapshot.shot
+        self.ball.in_flight = True
+        self.ball.steps = snapshot.steps
+        self.aiming = False
+        self.renderer.hide(self.pointer)
+        self.bind_key("<space>", self.pause)
+        self.pause(None)
+
     def pause(self, event): # Call the ball pause method and bind a save key to the window
         self.ball.pause()
-        self.save_bind = self.bind("<s>", self.save)
+        self.renderer.configure("paused", state=renderer.NORMAL if self.ball.is_paused else renderer.HIDDEN) # Show or hide the message
+        self.bind_key("<s>", self.save)
     
     def level_passed(self): # If we enter the hole
-        self.canvas.create_text(650,350,text="LEVEL COMPLETE",font=("Volleyball",20)) # Display a message
+        self.record_shot()
+        self.renderer.show("complete") # Display a message
         self.total_num_shots += self.num_shots # Increase the total score
         self.num_shots = 0 # Reset level score
-        if self.current_level < 3: # Reset the ball and ask if they want to proceed
+        if self.current_level < levels.last(): # Reset the ball and ask if they want to proceed
             self.current_level += 1
             self.ball_pos_x = 5 
             self.ball_pos_y = 720
-            self.canvas.create_text(650,400,text="Press Enter for next level",font=("Volleyball",12))
-            self.next_level_bind = self.bind("<Return>", self.next_level)
-            self.save_bind = self.bind("<s>", self.save)
-        else: # If we just finsihed level 3 then end the game
+            self.renderer.show("next")
+            self.bind_key("<Return>", self.next_level)
+            self.bind_key("<s>", self.save)
+            self.autosave()
+        else: # If we just finsihed the last level then end the game
             self.game_finished()
 
     def save(self, event): # If we save our game - get the user to enter their name
-        self.unbind("<s>", self.save_bind)
-        self.canvas.delete("all") # The ball movement does not kill cleanly like this
-        # Allowing the user to enter their name to save the level they are on
-        self.name_entry = tk.Entry(self, width=30)
-        self.name_label = tk.Label(self, text="Enter your name", bg="lightblue")
-        self.name_label2 = tk.Label(self, text="press enter to save", bg="lightblue")
-        self.name_label.config(font=("Volleyball",15))
-        self.name_label2.config(font=("Volleyball",12))
-        self.canvas.create_window(680,400, window=self.name_entry) # Creating a space for the widgets to be placed
-        self.canvas.create_window(680,300, window=self.name_label)
-        self.canvas.create_window(680,500, window=self.name_label2)
-
-        self.save_exit_bind = self.bind("<Return>", self.save_exit)
-
-    def save_exit(self, event): # Save and exit
-        self.unbind("<Return>", self.save_exit_bind) 
-        self.file = open("scores.txt", "a")
-        data = self.name_entry.get() + " " + str(self.total_num_shots) + " " + str(self.current_level) +"\n" 
-        self.file.write(data) # Write the save data to the file
-        self.file.close()
-        self.destroy()
-        Home() # Re-initiate our game
+        self.app.show(Save, self.current_level, self.total_num_shots, None, self.game_id, self.snapshot())
 
     def next_level(self, event): # Trigger the next level
-        self.unbind("<Return>", self.next_level_bind) # Resetting the canvas and binds
-        self.unbind("<s>", self.save_bind)
-        self.canvas.delete("all") 
-        self.format_general() # Reformatting
-        # Adding to this layout depending on the current level
-        if self.current_level == 2:
-            self.format_level2()
-        elif self.current_level == 3:
-            self.format_level3()
+        self.unbind_key("<Return>") # Resetting the canvas and binds
+        self.unbind_key("<s>")
+        self.clear_level()
+        self.format_level() # Reformatting
         self.start()
 
-    def game_finished(self): # If the game is over, display appropriate messages
-        self.canvas.delete("all")
-        self.canvas.create_text(650,350,text="CONGRATULATIONS",font=("Volleyball",30))
-        #Tkinter prompts to get their name
-        self.name_entry = tk.Entry(self, width=30) # Ask them to enter their name 
-        self.name_label = tk.Label(self, text="Enter your name", bg="lightblue")
-        self.name_label2 = tk.Label(self, text="press enter to save", bg="lightblue")
-        self.name_label.config(font=("Volleyball",15))
-        self.name_label2.config(font=("Volleyball",12))
-        self.canvas.create_window(680,400, window=self.name_entry) # Creating windows to store the tk widgets inside the canvas
-        self.canvas.create_window(680,300, window=self.name_label)
-        self.canvas.create_window(680,500, window=self.name_label2)
-        self.current_level = "Completed" # Change the level to Completed
-        self.save_exit_bind = self.bind("<Return>", self.save_exit) # Re-use the save_exit method
+    def clear_level(self): # Put away anything left over from the last level, ready for the next
+        self.aiming = False
+        self.hint_key = None # Any hint still being searched for is for the last level
+        for tag in ("paused", "complete", "next"):
+            self.renderer.hide(tag)
+        self.draw_preview()
+
+    def game_finished(self): # If the game is over, get their name for the leaderboard
+        snapshots.writer.remove(snapshots.AUTOSAVE_FILE) # Nothing left to carry on from
+        self.app.show(Save, "Completed", self.total_num_shots, "CONGRATULATIONS", self.game_id)
 
     def boss_key(self, event): # A boss key to make it look like we are working
-        self.canvas.delete("all") # Remove all elements from the canvas
-        self.boss_image = ImageTk.PhotoImage(file = "boss_key.png") # Image made by myself
-        self.canvas.create_image(675,384,image = self.boss_image)
-        self.title("VS Code ") # Make it seem like we are in VS Code doing work
-        self.unbind("1", self.boss_key_bind)
-        self.bind("1", self.undo_boss_key) # Create an undo bind so we can return to our game
-    
-    def undo_boss_key(self, event): # A way to undo the boss key, and return to our current level
-        self.destroy() 
-        Window(self.colour,self.current_level,self.total_num_shots) # Reinitiate our game at the current level
+        self.app.show(Boss, Game, self.colour, self.current_level, self.total_num_shots, self.snapshot())
 
     def reduce_score(self, event): # A cheat to reduce the score
         if self.num_shots >= 1: # So we can't have negative scores
             self.num_shots -= 1
-            self.canvas.itemconfigure(self.shot_label, text="Shot number "+ str(self.num_shots)) # Update the label
+            self.renderer.configure(self.shot_label, text="Shot number "+ str(self.num_shots)) # Update the label
 
     def skip_level(self, event): # A cheat to skip the current level
+        if self.current_level >= levels.last(): # There is no level to skip to
+            return
         self.current_level += 1
-        self.canvas.delete("all")
-        self.format_general()
+        self.clear_level()
         self.ball_pos_x = 5 # Reset ball position so, pointer loads correctly
         self.ball_pos_y = 720
-        # Adding to this layout depending on the current level
-        if self.current_level == 2:
-            self.format_level2()
-        elif self.current_level == 3:
-            self.format_level3()
+        self.format_level()
         self.start()
 
     def increase_max_power(self, event): # A cheat to increase how hard we can shoot the ball
         self.max_hyp += 100
+        if self.hint_mode and self.aiming: # The best shot may be different with more power
+            self.show_hint()
+
+    def toggle_hint(self, event): # Turn hints on or off, showing one straight away if we are aiming
+        self.hint_mode = not self.hint_mode
+        if self.hint_mode and self.aiming:
+            self.show_hint()
+
+    def show_hint(self): # Search for the best shot from here in the background
+        import hint # Only load numpy once hints are wanted, so the game starts quicker
+        self.hint_key = (self.current_level, self.ball_pos_x, self.ball_pos_y, self.max_hyp, *self.ball_state())
+        hint.solver.request(*self.hint_key, self.timers.after, lambda theta, power, miss, key=self.hint_key: self.draw_hint(key, theta, power))
+
+    def ball_state(self): # The clock and the orders of the latched colliders of the ball about to be shot
+        return self.ball.physics.clock, sorted(self.ball.physics.latched)
+
+    def draw_hint(self, key, theta, power): # Point the pointer at the suggested shot, if we are still aiming from the same spot
+        if not self.hint_mode or key != self.hint_key:
+            return
+        self.theta = theta
+        self.relative_x, self.relative_y = physics.aim_at(theta, power, self.max_hyp)
+        self.renderer.coords(self.pointer,self.ball_pos_x+15,self.ball_pos_y-15,self.ball_pos_x+self.relative_x,self.ball_pos_y-self.relative_y)
+        self.draw_preview()
+
+
+class PartyGame(Game): # Players taking turns on the same levels, with their balls knocking into each other
+
+    def __init__(self, app, colours, level, scores):
+        self.colours = colours # One for each player, in the order they play
+        self.scores = scores # Total shots of each player, over the levels finished
+        super().__init__(app, colours[0], level, scores[0])
+
+    #-- Methods --
+    def format_general(self): # A ball for every player, and a label saying whose turn it is
+        super().format_general()
+        self.ball_items = [self.ball_item] + [self.canvas.create_oval(0,0,0,0,fill=colour,state=renderer.HIDDEN,tags="ball") for colour in self.colours[1:]]
+        self.player_label = self.canvas.create_text(120,90,text="",font="Volleyball")
+
+    def new_ball(self): # Every player starts the level on the tee, with the first player to shoot
+        self.shots = [0]*len(self.colours) # Taken by each player on this level
+        balls = PartyBalls(self.renderer, self.ball_items, self.mover_items[self.current_level], self.turn_over, self.current_level)
+        self.next_player(0, balls)
+        return balls
+
+    def next_player(self, player, balls): # Hand the shot to player, aiming from where their ball is
+        self.player = player
+        self.num_shots = self.shots[player]
+        self.renderer.configure(self.shot_label, text="Shot number "+ str(self.num_shots))
+        self.renderer.configure(self.player_label, text="Player "+ str(player+1) +"'s turn", fill=self.colours[player])
+        self.ball_pos_x, self.ball_pos_y = balls.get_coordinates(player)
+        balls.show(player)
+
+    def shoot(self): # Party games aren't recorded, as there is no one score to check
+        self.shots[self.player] = self.num_shots
+        self.ball.shoot(self.player, self.relative_x, self.relative_y)
+
+    def record_shot(self):
+        pass
+
+    def ball_state(self): # The movers are shared, but each ball has its own latched colliders
+        balls = self.ball.physics
+        return balls.clock, [order for order, flags in balls.latched.items() if flags[self.player]]
+
+    def autosave(self): # A party game can't be carried on
+        pass
+
+    def turn_over(self): # Once every ball has stopped, the next player whose ball isn't in the hole shoots
+        holed = self.ball.physics.holed
+        if holed.all():
+            self.level_passed()
+            return
+        for player in range(self.player+1, self.player+1+len(self.colours)):
+            if not holed[player % len(self.colours)]:
+                break
+        self.next_player(player % len(self.colours), self.ball)
+        self.start()
+
+    def level_passed(self): # Add everyone's shots to their scores
+        for player, shots in enumerate(self.shots):
+            self.scores[player] += shots
+        super().level_passed()
+
+    def game_finished(self): # Show who won, fewest shots first
+        self.renderer.hide("complete")
+        ranking = sorted(range(len(self.colours)), key=lambda player: self.scores[player])
+        results = ["PLAYER "+ str(ranking[0]+1) +" WINS"] + ["Player "+ str(player+1) +": "+ str(self.scores[player]) +" shots" for player in ranking[:10]]
+        self.canvas.create_text(650,350,text="\n".join(results),font=("Volleyball",20),anchor="n",tags="overlay")
+        self.bind_key("<Return>", self.save)
 
+    def save(self, event): # There is nothing to save a party game under, so just go back home
+        self.app.show(Home)
 
-class Ball:
+    def boss_key(self, event):
+        self.app.show(Boss, PartyGame, self.colours, self.current_level, self.scores)
 
-    def __init__(self, canvas, restart_pointer, level_passed, level, colour= "black"):
+
+class Ball: # Moves the ball's canvas items, the physics itself is done by physics.Simulation
+    stages = profiling.SIMULATION # What the profiler times of the physics
+
+    def __init__(self, renderer, ball, movers, restart_pointer, level_passed, level):
         
-        self.ball_colour = colour
-        self.x_velocity = 5.0 #Initial values for testing, are changed when fired
-        self.y_velocity = -5.0
-        self.canvas = canvas
-        self.ball = self.canvas.create_oval(5,720,35,690,fill=self.ball_colour)#Radius 15px
-        self.interval = 0.012 #Delay between frames of the ball moving
+        self.renderer = renderer
+        self.physics = physics.Simulation(level) # Holds the position and velocity of the ball
+        self.ball = ball # The oval, shared by every level
+        self.renderer.coords(self.ball,*self.physics.coords())
+        self.renderer.show(self.ball)
+        self.previous = self.physics.coords() # Where the ball was before the last step, so we can draw it in between
         self.restart = restart_pointer #Methods from the other class, so we can call them
         self.level_passed = level_passed
         self.is_paused = False
+        self.in_flight = False # Whether we have been shot and haven't stopped yet
+        self.steps = 0 # Steps the last shot has taken
         self.level = level
-        self.on_ice = False # We don't want to exponentially increase speed on a slippery surface
-        if self.level == 3:
-            self.slit = self.canvas.create_rectangle(500,500,530,400,fill="lightblue",width=0)
-            self.slit_velocity = 3
-            self.move_slit()
-        self.canvas.tag_raise(self.ball) # Bring our ball to the top layer, so it is always visible
+        self.movers = movers # name -> rectangle, of the movers we can see
 
     def pause(self):
         self.is_paused = not self.is_paused # Toggle paused state
-        if self.is_paused: # If paused display appropriate message
-            self.paused_label = self.canvas.create_text(650,350,text="GAME PAUSED",font=("Volleyball",20))
-            self.pause_label1 = self.canvas.create_text(700,400,text="Press S to save and exit",font=("Volleyball",12))
-            self.pause_label2 = self.canvas.create_text(700,450,text=". . . Or Space to unpause",font=("Volleyball",12))
-        else: # If unpaused, destroy the message
-            self.canvas.delete(self.paused_label,self.pause_label1,self.pause_label2)
-    
-    def animate_ball(self): # This will run in the background once we shoot
-        if not self.is_paused: # So only move if we are paused
-            try: # Since we dont destroy our ball cleanly and this runs constantly
-                self.canvas.move(self.ball,self.x_velocity,self.y_velocity)
-            except:
-                pass
-            (left_pos,top_pos,right_pos,bottom_pos) = self.canvas.coords(self.ball)
-            self.collision_detection_general() # Do collision detection depending on level
-            if self.level == 1:
-                self.collision_detection1()
-            elif self.level == 2:
-                self.collision_detection2()
-            elif self.level == 3:
-                self.collision_detection3()
-
-            self.y_velocity = self.y_velocity + 9.5*self.interval # suvat equations, g = 9.5, since it looks better
-            self.x_velocity *= 0.999 # Simulate air resistance
-
-        if self.is_moving(): #If we are still moving
-            try: # Since we dont destroy our ball cleanly and this runs constantly
-                (left_pos,top_pos,right_pos,bottom_pos) = self.canvas.coords(self.ball)
-                if 1190 < left_pos < 1225 and 719 <= bottom_pos <= 721 and self.x_velocity < 5: #Check if we are in the hole, not going too fast
-                    self.canvas.delete(self.ball)
-                    self.level_passed()
-                else: # Otherwise keep moving
-                    self.canvas.after(int(self.interval*1000), self.animate_ball)
-            except: # Since we dont destroy our ball cleanly and this runs constantly
-                pass
-        else: #If we are not moving call our restart function
+
+    def shoot(self, relative_x, relative_y): # Fire the ball towards where we aimed
+        self.physics.shoot(relative_x, relative_y)
+        self.previous = self.physics.coords()
+        self.in_flight = True
+        self.steps = 0
+
+    def update(self): # One physics step, run by the game loop
+        if self.is_paused: # So only move if we are not paused
+            return
+        self.physics.advance()
+        if not self.in_flight:
+            return
+        self.previous = self.physics.coords()
+        self.physics.step()
+        self.steps += 1
+        status = self.physics.status()
+        if status == physics.HOLED: #If we are in the hole
+            self.in_flight = False
+            self.renderer.hide(self.ball)
+            self.level_passed()
+        elif status == physics.STOPPED: #If we are not moving call our restart function
+            self.in_flight = False
+            self.renderer.coords(self.ball,*self.physics.coords()) # Make sure we are drawn exactly where we stopped
             self.restart()
 
-    def collision_detection_general(self):
-        (left_pos,top_pos,right_pos,bottom_pos) = self.canvas.coords(self.ball)
-        # The ball may be detected when it is inside the wall so we need to move it back to the wall occasionally
-        if right_pos >= 1366:#Right wall collision detection
-            gap = right_pos - 1366 # Figure out where the ball is
-            self.x_velocity *= -0.7
-            self.canvas.coords(self.ball, left_pos-gap, top_pos,1366,bottom_pos)# Move the ball to where it was when it collided with wall
-        elif left_pos <= 0: # Left wall collision detection
-            gap = left_pos
-            self.x_velocity *= -0.8
-            self.canvas.coords(self.ball, 0, top_pos,right_pos-gap,bottom_pos)
-        elif bottom_pos >= 720: # Floor collision detection
-            self.y_velocity *= -0.7
-            self.x_velocity *= 0.93 #Lose a bit of x velocity with bouncing of floor
-            gap = bottom_pos - 720
-            self.canvas.coords(self.ball, left_pos, top_pos-gap,right_pos,720)
-        elif top_pos <= 0: # Ceiling collision detection
-            self.y_velocity *= -0.8
-            self.x_velocity *= 0.9
-            gap = top_pos
-            self.canvas.coords(self.ball, left_pos, 0,right_pos,bottom_pos-gap)
-
-    def collision_detection1(self):
-        (left_pos,top_pos,right_pos,bottom_pos) = self.canvas.coords(self.ball)
-        if bottom_pos >= 720 and right_pos >= 415 and left_pos <= 585: # If in bunker
-            self.y_velocity *= -0.4
-            self.x_velocity *= 0.4 # Decrease velocity dramatically
-            gap = bottom_pos - 720
-            self.canvas.coords(self.ball, left_pos, top_pos-gap,right_pos,720)
-        elif bottom_pos >= 720 and right_pos >= 724 and left_pos <= 905 and not self.on_ice: # If on ice
-            self.x_velocity *= 1.5 # Increase our x speed if we land on ice 
-            gap = bottom_pos - 720
-            self.on_ice = True # But we only increase once each time we are on the ice
-            self.canvas.coords(self.ball, left_pos, top_pos-gap,right_pos,720)
-        elif bottom_pos >= 720 and not(right_pos >= 724 and left_pos <= 905):
-            self.on_ice = False # If we don't land on ice, allow the speed if we do to increase again
-
-    def collision_detection2(self):
-        (left_pos,top_pos,right_pos,bottom_pos) = self.canvas.coords(self.ball)
-        if 550 >= right_pos >= 511 and 484 <= bottom_pos <= 720: #Left wall of building
-            gap = right_pos - 511
-            self.x_velocity *= -0.8
-            self.canvas.coords(self.ball, left_pos-gap, top_pos,511,bottom_pos)
-        elif 680 <= left_pos <= 687 and 484 <= bottom_pos <= 720:  # Right wall of building
-            gap = left_pos - 687
-            self.x_velocity *= -0.8
-            self.canvas.coords(self.ball, 687, top_pos,right_pos-gap,bottom_pos)
-        elif 470 <= bottom_pos <= 490 and 511 <= right_pos <= 687: # Roof of building
-            self.y_velocity *= -0.7
-            self.x_velocity *= 0.93 #Lose a bit of x velocity with bouncing of floor
-            gap = bottom_pos - 470
-            self.canvas.coords(self.ball, left_pos, top_pos-gap,right_pos,470)
-
-    def collision_detection3(self):
-        (left_pos,top_pos,right_pos,bottom_pos) = self.canvas.coords(self.ball)
-        if 514 >= right_pos >= 500 and (bottom_pos >= self.bottom_slit or top_pos <= self.top_slit): # Left walls of not the slit
-            gap = right_pos - 500
-            self.x_velocity *= -0.8
-            self.canvas.coords(self.ball, left_pos-gap, top_pos,500,bottom_pos)
-        elif 530 >= left_pos >= 516 and (bottom_pos >= self.bottom_slit or top_pos <= self.top_slit): # right walls of not the slit
-            gap = left_pos - 530
-            self.x_velocity *= -0.8
-            self.canvas.coords(self.ball,530, top_pos,right_pos-gap,bottom_pos)
-        elif 500 >= left_pos+15 >= 530 and self.bottom_slit <= bottom_pos <= self.bottom_slit+2: # Bottom of slit
-            self.y_velocity *= -0.7
-            self.x_velocity *= 0.93 #Lose a bit of x velocity with bouncing of floor
-            gap = bottom_pos - self.bottom_slit
-            self.canvas.coords(self.ball, left_pos, top_pos-gap,right_pos,self.bottom_slit)
-        elif 500 >= left_pos+15 >= 530 and self.top_slit >= top_pos >= self.top_slit-2: # Top of slit
-            self.y_velocity *= -0.7
-            self.x_velocity *= 0.93 #Lose a bit of x velocity with bouncing of floor
-            gap = bottom_pos - self.top_slit
-            self.canvas.coords(self.ball, left_pos, self.top_slit,right_pos,bottom_pos-gap)
-
-    def is_moving(self): # Find out if we are moving
-        return not (-0.02 < float(self.x_velocity) < 0.02 and -0.02 < float(self.y_velocity) < 0.2) #We can disregard tiny velocities
+    def render(self, alpha): # Draw the ball alpha of the way from its last position to its new one, and the movers
+        if self.in_flight:
+            self.renderer.coords(self.ball,*[before + alpha*(now-before) for before, now in zip(self.previous, self.physics.coords())])
+        for name, item in self.movers.items():
+            self.renderer.coords(item,*self.physics.mover_coords(name)) # Only sent if it moved
 
     def get_coordinates(self): # Return the coordinates, so x_pos and y_pos can be found by other class
-        (left_pos,top_pos,right_pos,bottom_pos) = self.canvas.coords(self.ball)
-        return left_pos, bottom_pos
-
-    def move_slit(self):
-        if not self.is_paused: # If we are not paused then move the slit
-            self.canvas.move(self.slit,0,self.slit_velocity)
-            try: # Since we dont destroy our slit cleanly and this runs constantly
-                (left_slit,self.top_slit,right_slit,self.bottom_slit) = self.canvas.coords(self.slit)
-            except:
-                pass
-            if self.bottom_slit >= 550 or self.top_slit <= 300:
-                self.slit_velocity *= -1
-
-        self.canvas.after(150, self.move_slit)
+        return self.physics.left_pos, self.physics.bottom_pos
+
+
+class PartyBalls: # Moves the canvas items of every player's ball, the physics is done by multiball.Balls all in one step
+    stages = profiling.BALLS
+
+    def __init__(self, renderer, balls, movers, turn_over, level):
+        import multiball # Only load numpy once a party game is played
+        self.renderer = renderer
+        self.physics = multiball.Balls(level, len(balls))
+        self.balls = balls # An oval for each player, hidden until they take their turn
+        for ball in self.balls:
+            self.renderer.hide(ball)
+        self.previous = (self.physics.left_pos.copy(), self.physics.bottom_pos.copy())
+        self.turn_over = turn_over
+        self.is_paused = False
+        self.in_flight = False # Whether any ball is moving
+        self.steps = 0
+        self.movers = movers
+
+    #-- Methods --
+    def pause(self):
+        self.is_paused = not self.is_paused
+
+    def show(self, player): # Put a ball on the course, for its player to aim
+        self.renderer.coords(self.balls[player],*self.physics.coords(player))
+        self.renderer.show(self.balls[player])
+
+    def shoot(self, player, relative_x, relative_y):
+        self.physics.shoot(player, relative_x, relative_y)
+        self.in_flight = True
+        self.steps = 0
+
+    def update(self): # One physics step for every ball at once, run by the game loop
+        if self.is_paused:
+            return
+        self.physics.advance()
+        if not self.in_flight:
+            return
+        self.previous = (self.physics.left_pos.copy(), self.physics.bottom_pos.copy())
+        for player in self.physics.step():
+            self.renderer.hide(self.balls[player])
+        self.steps += 1
+        if not self.physics.moving.any(): # Everything has stopped, so drawn exactly where it is
+            self.in_flight = False
+            self.render(1)
+            self.turn_over()
+
+    def render(self, alpha): # Draw the balls on the course alpha of the way from their last positions to their new ones, and the movers
+        if self.in_flight or alpha == 1:
+            (left_before, bottom_before) = self.previous
+            left_pos = (left_before + alpha*(self.physics.left_pos - left_before)).tolist()
+            bottom_pos = (bottom_before + alpha*(self.physics.bottom_pos - bottom_before)).tolist()
+            for player in (self.physics.teed & ~self.physics.holed).nonzero()[0].tolist():
+                self.renderer.coords(self.balls[player],left_pos[player],bottom_pos[player]-physics.BALL_SIZE,left_pos[player]+physics.BALL_SIZE,bottom_pos[player])
+        for name, item in self.movers.items():
+            self.renderer.coords(item,*self.physics.mover_coords(name))
+
+    def get_coordinates(self, player):
+        return float(self.physics.left_pos[player]), float(self.physics.bottom_pos[player])
                  
 
-class Home(tk.Tk):
-    def __init__(self):
-        super().__init__() # This initialises our empty window, allowing us to call it self
-        #Specifying what the window should look like
-        self.title("2D Golf Game")
-        self.geometry("1366x768") #One of the standard sizes
-        self.resizable(width=False, height=False)
+class Save(Screen): # Get the user to enter their name, to save their score under
+
+    def __init__(self, app, level, score, heading=None, game=None, snapshot=None):
+        super().__init__(app)
+        self.snapshot = snapshot # The whole game, to carry on from exactly where it was left
+        self.level = level # The level to carry on from, or Completed if the game is over
+        self.score = score
+        self.game = game # The id the game's shots were recorded under
+        self.canvas = tk.Canvas(self, width="1366", height="768", bg="lightblue")
+        self.canvas.grid()
+        if heading is not None:
+            self.canvas.create_text(650,350,text=heading,font=("Volleyball",30))
+        # Allowing the user to enter their name to save the level they are on
+        self.name_entry = tk.Entry(self, width=30)
+        self.name_label = tk.Label(self, text="Enter your name", bg="lightblue")
+        self.name_label2 = tk.Label(self, text="press enter to save", bg="lightblue")
+        self.name_label.config(font=("Volleyball",15))
+        self.name_label2.config(font=("Volleyball",12))
+        self.canvas.create_window(680,400, window=self.name_entry) # Creating a space for the widgets to be placed
+        self.canvas.create_window(680,300, window=self.name_label)
+        self.canvas.create_window(680,500, window=self.name_label2)
+        self.bind_key("<Return>", self.save_exit)
 
+    #-- Methods --
+    def save_exit(self, event): # Save and exit
+        scores.ScoreStore().add(self.name_entry.get(), self.score, self.level) # Write the save data to the file
+        if self.game is not None: # So the score can be checked by replaying the game
+            replay.ShotLog().add_name(self.game, self.name_entry.get(), self.score, self.level)
+        if self.snapshot is not None:
+            snapshots.writer.save(snapshots.path(self.name_entry.get()), self.snapshot.pack())
+        self.app.show(Home) # Back to the start of our game
+
+
+class Boss(Screen): # A boss key to make it look like we are working
+    window_title = "VS Code " # Make it seem like we are in VS Code doing work
+
+    def __init__(self, app, screen, *game):
+        super().__init__(app)
+        self.game = (screen,) + game # What to go back to
+        self.canvas = tk.Canvas(self, width="1366", height="768", bg="lightblue")
+        self.canvas.grid()
+        self.boss_image = assets.manager.photo("boss_key.png", self.app) # Image made by myself
+        self.canvas.create_image(675,384,image = self.boss_image)
+        self.bind_key("1", self.undo_boss_key) # An undo bind so we can return to our game
+
+    #-- Methods --
+    def undo_boss_key(self, event): # A way to undo the boss key, and return to our current level
+        self.app.show(*self.game) # Restart our game at the current level
+
+
+class Home(Screen):
+    def __init__(self, app):
+        super().__init__(app)
         #Defining default ball colour
         self.colour = "White"
         #And other default values
@@ -397,8 +665,9 @@ class Home(tk.Tk):
         self.current_score = 0
 
         #Making the background, using an image
-        self.bg = tk.PhotoImage(file = "background.png") # Image made by me
+        self.bg = assets.manager.photo("background.png", self.app) # Image made by me
         self.label = tk.Label(self,image=self.bg).place(x=0,y=0)#The background goes inside a label
+        assets.manager.preload(levels.get(self.start_level).images + ["boss_key.png"]) # Ready for when they press play
 
         #Creating a frame to store the buttons
         self.button_frame = tk.Frame(self,width=600,height=300,bg="#99D9EA")
@@ -417,6 +686,14 @@ class Home(tk.Tk):
         self.customise_button = tk.Button(self.button_frame, text="CUSTOMISE COLOUR", bg="#99D9EA", command=self.customise_colour)
         self.customise_button.config(font=("Volleyball",20))
         self.customise_button.grid(row=2,padx=150,pady=10)
+        self.party_button = tk.Button(self.button_frame, text="PARTY MODE", bg="#99D9EA", command=self.party_message)
+        self.party_button.config(font=("Volleyball",20))
+        self.party_button.grid(row=6,padx=150,pady=10)
+        self.autosave = snapshots.load(snapshots.AUTOSAVE_FILE) # The last game played, if it wasn't finished
+        if self.autosave is not None:
+            self.continue_button = tk.Button(self.button_frame, text="CONTINUE", bg="#99D9EA", command=self.continue_game)
+            self.continue_button.config(font=("Volleyball",20))
+            self.continue_button.grid(row=7,padx=150,pady=10)
 
         #Leaderboard header
         self.leaderboard_label = tk.Label(self.leaderboard_frame, text="HIGHSCORES", bg="#99D9EA")
@@ -424,12 +701,35 @@ class Home(tk.Tk):
         self.leaderboard_label.grid(row=0,padx=10,pady=10)
 
         self.fill_leaderboard()
-        self.mainloop()
 
+    #-- Methods --
     def start_game(self):
-        self.destroy() # Destroy this tkinter window 
-        Window(self.colour,self.start_level,self.current_score) # Create the game tkinter window
+        self.app.show(Game, self.colour, self.start_level, self.current_score) # Swap to the game
     
+    def continue_game(self): # Carry on from the last autosave
+        self.app.show(Game, self.autosave.colour, self.autosave.level, self.autosave.total_num_shots, self.autosave)
+
+    def party_message(self):
+        # widgets to allow user to enter how many are playing
+        self.party_entry = tk.Entry(self.button_frame, width=30)
+        self.party_label = tk.Label(self.button_frame, text="Enter number of players", bg="#99D9EA")
+        self.party_label2 = tk.Label(self.button_frame, text="press enter to start, up to "+ str(MAX_PLAYERS), bg="#99D9EA")
+        self.party_label.config(font=("Volleyball",12))
+        self.party_label2.config(font=("Volleyball",10))
+        self.party_entry.grid(row=4,padx=150,pady=10)
+        self.party_label.grid(row=3,padx=150,pady=10)
+        self.party_label2.grid(row=5,padx=150,pady=10)
+        self.bind_key("<Return>", self.start_party) # Bind return to start the party game
+
+    def start_party(self, event):
+        players = self.party_entry.get()
+        if not players.isdigit() or not 1 <= int(players) <= MAX_PLAYERS: # Leave the widgets up to try again
+            return
+        self.unbind_key("<Return>")
+        # The first player has their own colour, and the rest go round the party colours
+        colours = [self.colour] + [PARTY_COLOURS[i % len(PARTY_COLOURS)] for i in range(int(players)-1)]
+        self.app.show(PartyGame, colours, self.start_level, [0]*len(colours))
+
     def customise_colour(self):
         # widgets to allow user to enter colour
         self.colour_entry = tk.Entry(self.button_frame, width=30)
@@ -440,10 +740,10 @@ class Home(tk.Tk):
         self.colour_entry.grid(row=4,padx=150,pady=10)
         self.colour_label.grid(row=3,padx=150,pady=10)
         self.colour_label2.grid(row=5,padx=150,pady=10)
-        self.colour_bind = self.bind("<Return>", self.set_colour) # bind return to set this colour
+        self.bind_key("<Return>", self.set_colour) # bind return to set this colour
     
     def set_colour(self, event):
-        self.unbind("<Return>", self.colour_bind) # unbind return
+        self.unbind_key("<Return>") # unbind return
         self.colour = self.colour_entry.get() # Get what the user entered
         self.colour_entry.destroy() # Destroy the widgets
         self.colour_label.destroy()
@@ -452,24 +752,15 @@ class Home(tk.Tk):
         self.saved_colour_label.config(font=("Volleyball",10))
         self.saved_colour_label.grid(row=3,padx=150,pady=10)  
 
-    def fill_leaderboard(self): # Open our scores file and fill the leaderboard
-        file = open("scores.txt", "r")
-        unsorted = []
-        for line in file:
-            record = line.split()
-            if record[2] == "Completed": # If that player actually completed the game
-                record[1] = int(record[1]) # Cast the score to int
-                unsorted.append(record) # Add this record to array to be sorted
-        sorted_leaderboard = sorted(unsorted, key=lambda x: x[1]) # Sort the array by lowest score first
-        for i in range(len(sorted_leaderboard)): # Display these scores
-            leaderboard_data = tk.Label(self.leaderboard_frame, text=sorted_leaderboard[i][0], bg="#99D9EA")
+    def fill_leaderboard(self): # Fill the leaderboard from the index of our scores file
+        leaderboard = scores.ScoreStore().top(10) # We dont want the leaderboard to be too big, only the top scores
+        for i in range(len(leaderboard)): # Display these scores
+            leaderboard_data = tk.Label(self.leaderboard_frame, text=leaderboard[i][0], bg="#99D9EA")
             leaderboard_data.config(font=("Volleyball",12))
             leaderboard_data.grid(row=i+1,padx=10,pady=10,sticky="W")
-            leaderboard_data2 = tk.Label(self.leaderboard_frame, text=str(sorted_leaderboard[i][1]), bg="#99D9EA")
+            leaderboard_data2 = tk.Label(self.leaderboard_frame, text=str(leaderboard[i][1]), bg="#99D9EA")
             leaderboard_data2.config(font=("Volleyball",12))
             leaderboard_data2.grid(row=i+1,column=1,padx=10,pady=10,sticky="W")
-            if i >= 9:
-                break # We dont want the leaderboard to be too big, only the top scores
 
     def load_game_message(self):
         # widgets to allow user to enter their name
@@ -481,22 +772,23 @@ class Home(tk.Tk):
         self.load_entry.grid(row=4,padx=150,pady=10)
         self.load_label.grid(row=3,padx=150,pady=10)
         self.load_label2.grid(row=5,padx=150,pady=10)
-        self.load_bind = self.bind("<Return>", self.load_game) # Bind return to load last saved game
+        self.bind_key("<Return>", self.load_game) # Bind return to load last saved game
 
     def load_game(self, event):
-        self.unbind("<Return>", self.load_bind) # unbind return
+        self.unbind_key("<Return>") # unbind return
         self.name = self.load_entry.get() # Get the name they entered
         self.load_entry.destroy() # Destroy our widgets
         self.load_label.destroy()
         self.load_label2.destroy()
-        for line in reversed(open("scores.txt").readlines()): #Open the file in reversed order, to read the latest save in that name
-            record = line.split()
-
-            if record[0] == self.name and record[2] != "Completed": # If we find a match, that hasnt completed the game
-                self.current_score = int(record[1])
-                self.start_level = int(record[2])
-                self.start_game() # Start the game at that level
-                break # Break so we don't start more than one game
+        snapshot = snapshots.load(snapshots.path(self.name)) # Everything about their last save, if it was saved with one
+        if snapshot is not None:
+            self.app.show(Game, snapshot.colour, snapshot.level, snapshot.total_num_shots, snapshot)
+            return
+        save = scores.ScoreStore().latest_save(self.name) # The latest save in that name, that hasnt completed the game
+        if save is not None: # If we find a match
+            self.current_score, self.start_level = save
+            self.start_game() # Start the game at that level
+            return
         
         not_found_label = tk.Label(self.button_frame, text="User not found", bg="#99D9EA") # Create a label if that user is not found
         not_found_label.config(font=("Volleyball",12))
@@ -504,4 +796,8 @@ class Home(tk.Tk):
 
 
 if __name__ == "__main__":
-    Home()
\ No newline at end of file
+    app = App(profile="--profile" in sys.argv) # Time frames from the start, for machines without a keyboard to press F on
+    app.mainloop()
+    snapshots.writer.flush() # Make sure the last autosave is on the disk
+    if app.profiler is not None:
+        app.profiler.dump()
\ No newline at end of file
@@ -0,0 +1,111 @@
+#   Multi-ball - every ball of a party game kept in one set of numpy arrays, and stepped together through the same
+#   rules as batch.simulate, so dozens of balls cost about the same as one
+#   Balls also knock into each other. Pairs that could be touching are found by sort and sweep, sorting the balls
+#   along x and only comparing each with the next few until they are further apart than a ball, so the cost
+#   grows with the number of balls rather than the number of pairs
+#   Every ball starts on the tee, and is only on the course, and hit by the others, once its first shot is taken
+
+import math as m
+import numpy as np
+import batch
+import levels
+import physics
+
+RESTITUTION = 0.9 # How much of their speed towards each other balls keep when they hit
+MAX_TURN_STEPS = 2500 # Balls still moving after this many steps of a turn (30s) are stopped where they are
+
+
+class Balls: # Any number of balls on one level, with the state of ball i at index i of each array
+
+    def __init__(self, level, count, x=physics.START_X, y=physics.START_Y):
+        self.layout = levels.get(level)
+        self.left_pos = np.full(count, float(x))
+        self.bottom_pos = np.full(count, float(y))
+        self.x_velocity = np.zeros(count)
+        self.y_velocity = np.zeros(count)
+        self.moving = np.zeros(count, dtype=bool) # Shot or knocked, and not stopped yet
+        self.teed = np.zeros(count, dtype=bool) # Taken their first shot
+        self.holed = np.zeros(count, dtype=bool)
+        self.latched = {collider.order: np.zeros(count, dtype=bool) for collider in self.layout.colliders if collider.once}
+        self.tables = physics.mover_tables(self.layout)
+        self.clock = 0 # Steps since the level started, the same as Simulation.clock
+        self.positions = physics.mover_positions(self.tables, self.clock)
+        self.turn_steps = 0
+
+    #-- Methods --
+    def shoot(self, ball, relative_x, relative_y): # The same as Simulation.shoot, for one ball
+        self.x_velocity[ball] = relative_x/40
+        self.y_velocity[ball] = -relative_y/40
+        self.moving[ball] = True
+        self.teed[ball] = True
+        self.turn_steps = 0
+
+    def advance(self): # Move the level's movers on by one step
+        if self.tables:
+            self.clock += 1
+            self.positions = physics.mover_positions(self.tables, self.clock)
+
+    def step(self): # Move every ball that is moving on by one step, returning the balls that went in the hole
+        going = np.flatnonzero(self.moving)
+        if not going.size:
+            return going
+        state = [self.left_pos[going], self.bottom_pos[going], self.x_velocity[going], self.y_velocity[going]]
+        latched = {order: flags[going] for order, flags in self.latched.items()}
+        batch.step_all(self.layout, *state, latched, self.positions)
+        (self.left_pos[going], self.bottom_pos[going], self.x_velocity[going], self.y_velocity[going]) = state
+        for order, flags in latched.items():
+            self.latched[order][going] = flags
+        self.collide()
+
+        going = np.flatnonzero(self.moving) # Including any that were just knocked
+        (stopped, holed) = batch.status(self.layout, self.left_pos[going], self.bottom_pos[going], self.x_velocity[going], self.y_velocity[going])
+        self.turn_steps += 1
+        if self.turn_steps >= MAX_TURN_STEPS: # Balls resting on each other can keep nudging each other forever
+            stopped[:] = ~holed
+        self.moving[going[stopped | holed]] = False
+        self.x_velocity[going[stopped]] = 0
+        self.y_velocity[going[stopped]] = 0
+        self.holed[going[holed]] = True
+        return going[holed]
+
+    def collide(self): # Knock apart every pair of balls that are touching
+        live = np.flatnonzero(self.teed & ~self.holed)
+        order = live[np.argsort(self.left_pos[live], kind="stable")]
+        sorted_left = self.left_pos[order]
+        for gap in range(1, len(order)): # Each ball against the one gap places along, until none are close enough along x
+            close = np.flatnonzero(sorted_left[gap:] - sorted_left[:-gap] < physics.BALL_SIZE)
+            if not close.size:
+                break
+            for first, second in zip(order[close], order[close+gap]):
+                if self.moving[first] or self.moving[second]: # Balls at rest can't start hitting each other
+                    self.bounce(first, second)
+
+    def bounce(self, first, second): # Separate two balls if they overlap, and swap their speed along the line between them
+        x_distance = self.left_pos[second] - self.left_pos[first]
+        y_distance = self.bottom_pos[second] - self.bottom_pos[first]
+        distance = m.hypot(x_distance, y_distance)
+        if distance >= physics.BALL_SIZE:
+            return
+        if distance == 0: # Exactly on top of each other, so push them apart sideways
+            (x_distance, distance) = (1.0, 1.0)
+        (x_normal, y_normal) = (x_distance/distance, y_distance/distance)
+        push = (physics.BALL_SIZE - distance)/2
+        self.left_pos[first] -= push*x_normal
+        self.bottom_pos[first] -= push*y_normal
+        self.left_pos[second] += push*x_normal
+        self.bottom_pos[second] += push*y_normal
+        closing = (self.x_velocity[first] - self.x_velocity[second])*x_normal + (self.y_velocity[first] - self.y_velocity[second])*y_normal
+        if closing > 0: # Still moving towards each other, equal masses so they share the impulse
+            impulse = closing*(1 + RESTITUTION)/2
+            self.x_velocity[first] -= impulse*x_normal
+            self.y_velocity[first] -= impulse*y_normal
+            self.x_velocity[second] += impulse*x_normal
+            self.y_velocity[second] += impulse*y_normal
+        self.moving[first] = self.moving[second] = True
+
+    def coords(self, ball): # The same (left, top, right, bottom) the canvas would give for a ball
+        (left_pos, bottom_pos) = (float(self.left_pos[ball]), float(self.bottom_pos[ball]))
+        return left_pos, bottom_pos - physics.BALL_SIZE, left_pos + physics.BALL_SIZE, bottom_pos
+
+    def mover_coords(self, name): # Where a mover is now
+        return self.positions[name][0]
@@ -0,0 +1,169 @@
+#   Par calibration - plays each level many times headless, aiming like a player following the hint but with
+#   human sized mistakes in the angle and power, to find how many shots each level really takes
+#   All the games of a level take their next shot together through batch.simulate, split into chunks spread over
+#   every core, and the hint's shot from each spot is only searched for once however many games stop there, with all
+#   the new spots of a shot searched together
+#   Each shot is taken at a random point in the movers' cycle, as a player would, drawn from PHASES evenly spaced
+#   points so the games shooting at the same one still go through batch.simulate together. The once-only colliders,
+#   like the ice, stay latched from one shot of a game to the next, the same as in the game
+#   The noise is drawn in this process from a seeded generator, so the results don't depend on the number of cores
+#   Usage: python par.py [--games N] [--levels 1,2,3] [--scales 0.9,1,1.1] [--json FILE]
+
+import argparse
+import json
+import math as m
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import numpy as np
+import batch
+import hint
+import levels
+import physics
+
+GAMES = 50000 # Games played on each level, at each max_hyp scale
+MAX_SHOTS = 10 # Games still going after this many shots are given up on
+ANGLE_NOISE = m.radians(3) # Standard deviation of a player's angle
+POWER_NOISE = 0.08 # And of their power, as a fraction of the power they meant
+CELL = 10 # Spots this close together along x share a planned shot
+PLAN_GRID = (60, 20) # Angles and powers the planned shot is searched over, coarser than the hint as the noise swamps the difference
+SPOTS = 32 # Most spots planned by each task
+REGION = 200 # Width of the starting regions the holed share is reported for
+SCALES = (0.9, 1.0, 1.1) # max_hyp is scaled by these, to see how much par depends on it
+CHUNK = 4000 # Shots simulated by each task
+PHASES = 16 # Points in the movers' cycle a shot can be taken at
+SEED = 1
+
+
+def cell(x, y): # The spot a shot is planned from
+    return int(round(x/CELL))*CELL, int(round(y))
+
+def plan(level, max_hyp, spots): # The hint's (theta, power) from each of spots, run in the pool
+    (theta, power, miss) = hint.find_shots(level, [x for x, y in spots], [y for x, y in spots], max_hyp, *PLAN_GRID)
+    return list(zip(spots, zip(theta.tolist(), power.tolist())))
+
+def play(level, max_hyp, theta, power, x, y, clock, latched): # One shot each from a chunk of games, all at the same clock, run in the pool
+    results = batch.simulate(level, theta, power, max_hyp, x, y, clock=clock, latched=latched)
+    return results.outcome, results.left_pos, results.bottom_pos, results.latched
+
+
+class Calibration: # Shots to hole of a set of games on one level, and how often shots from each region went in
+
+    def __init__(self, level, max_hyp, shots, region_shots, region_holed):
+        self.level = level
+        self.max_hyp = max_hyp
+        self.shots = shots # Shots each game took to hole, MAX_SHOTS+1 if it never did
+        self.region_shots = region_shots # Shots taken from each REGION wide strip of x
+        self.region_holed = region_holed # And how many of them went in
+
+    #-- Methods --
+    def holed(self):
+        return self.shots <= MAX_SHOTS
+
+    def par(self): # Shots at least half the games hole in
+        return int(np.median(self.shots))
+
+    def mean(self): # Average shots, of the games that holed
+        return float(self.shots[self.holed()].mean()) if self.holed().any() else float("nan")
+
+    def report(self): # Everything as plain numbers, for printing or JSON
+        counts = np.bincount(self.shots, minlength=MAX_SHOTS+2)
+        regions = {str(number*REGION) + "-" + str((number+1)*REGION - 1): {"shots": int(taken), "holed": round(float(holed/taken), 4)}
+                   for number, (taken, holed) in enumerate(zip(self.region_shots, self.region_holed)) if taken}
+        return {"level": self.level, "max_hyp": self.max_hyp, "games": len(self.shots), "par": self.par(), "mean": round(self.mean(), 3),
+                "p90": int(np.percentile(self.shots, 90)), "not_holed": round(float(1 - self.holed().mean()), 4),
+                "shots_taken": int(self.region_shots.sum()),
+                "distribution": {str(shots): int(counts[shots]) for shots in range(1, MAX_SHOTS+1)}, "regions": regions}
+
+
+def calibrate(pool, level, max_hyp, games=GAMES, seed=SEED, angle_noise=ANGLE_NOISE, power_noise=POWER_NOISE):
+    # Play games of a level, a shot at a time for every game still going, until they have all holed or given up
+    generator = np.random.default_rng([seed, level, int(max_hyp)])
+    x = np.full(games, float(physics.START_X))
+    y = np.full(games, float(physics.START_Y))
+    shots = np.full(games, MAX_SHOTS+1)
+    going = np.arange(games) # Games not holed yet
+    latched = {collider.order: np.zeros(games, dtype=bool) for collider in levels.get(level).colliders if collider.once}
+    steps = physics.mover_cycle(physics.mover_tables(levels.get(level)))
+    plans = {} # spot -> (theta, power)
+    region_shots = np.zeros(physics.WIDTH//REGION + 1, dtype=np.int64)
+    region_holed = np.zeros_like(region_shots)
+    for shot in range(1, MAX_SHOTS+1):
+        spots = [cell(left_pos, bottom_pos) for left_pos, bottom_pos in zip(x[going], y[going])]
+        needed = sorted(set(spots).difference(plans))
+        size = max(1, min(SPOTS, m.ceil(len(needed) / (os.cpu_count() or 1)))) # Enough tasks to keep every core busy
+        for found in pool.map(plan, repeat(level), repeat(max_hyp), [needed[start:start+size] for start in range(0, len(needed), size)]):
+            plans.update(found)
+        planned = np.array([plans[spot] for spot in spots])
+        theta = np.clip(planned[:, 0] + generator.normal(0, angle_noise, len(spots)), 0, m.pi)
+        power = np.clip(planned[:, 1] * (1 + generator.normal(0, power_noise, len(spots))), 1, max_hyp) # Nobody can hit harder than max_hyp
+
+        phase = generator.integers(0, PHASES, len(spots)) if steps > 1 else np.zeros(len(spots), dtype=int)
+
+        (start_x, start_y) = (x[going], y[going])
+        tasks = []
+        for number in np.unique(phase): # batch.simulate takes one clock, so the games at each phase are chunked separately
+            members = np.flatnonzero(phase == number)
+            for start in range(0, len(members), CHUNK):
+                part = members[start:start+CHUNK]
+                tasks.append((part, pool.submit(play, level, max_hyp, theta[part], power[part], start_x[part], start_y[part], int(number)*steps//PHASES,
+                                                {order: flags[going[part]] for order, flags in latched.items()})))
+        outcome = np.empty(len(going), dtype=np.int8)
+        for part, task in tasks:
+            (outcome[part], x[going[part]], y[going[part]], ended) = task.result()
+            for order, flags in ended.items():
+                latched[order][going[part]] = flags
+        holed = outcome == batch.HOLED
+        regions = np.clip(start_x // REGION, 0, len(region_shots)-1).astype(int)
+        region_shots += np.bincount(regions, minlength=len(region_shots))
+        region_holed += np.bincount(regions[holed], minlength=len(region_shots))
+        shots[going[holed]] = shot
+        going = going[~holed]
+        if not going.size:
+            break
+    return Calibration(level, max_hyp, shots, region_shots, region_holed)
+
+
+def sensitivity(calibrations, max_hyp): # Change in mean shots for each 10% more max_hyp, from a straight line through the scales
+    if len(calibrations) < 2:
+        return None
+    scales = [calibration.max_hyp/max_hyp for calibration in calibrations]
+    return round(float(np.polyfit(scales, [calibration.mean() for calibration in calibrations], 1)[0]) / 10, 3)
+
+def run(level_numbers, scales=SCALES, games=GAMES, seed=SEED, workers=None, angle_noise=ANGLE_NOISE, power_noise=POWER_NOISE):
+    report = {}
+    with ProcessPoolExecutor(workers) as pool:
+        for level in level_numbers:
+            max_hyp = levels.get(level).max_hyp
+            calibrations = [calibrate(pool, level, round(max_hyp*scale), games, seed, angle_noise, power_noise) for scale in scales]
+            report[str(level)] = {"runs": [calibration.report() for calibration in calibrations], "mean_per_10_percent_max_hyp": sensitivity(calibrations, max_hyp)}
+            print_level(level, max_hyp, report[str(level)])
+    return report
+
+def print_level(level, max_hyp, result):
+    print("Level", level, "(max_hyp", str(max_hyp) + ")")
+    for run in result["runs"]:
+        print("  max_hyp %4d: par %d, mean %.2f of those holed, p90 %d, %.1f%% not holed in %d, %d shots played" %
+              (run["max_hyp"], run["par"], run["mean"], run["p90"], run["not_holed"]*100, MAX_SHOTS, run["shots_taken"]))
+        print("    shots to hole:", " ".join(shots + ":" + str(count) for shots, count in run["distribution"].items() if count))
+        print("    holed from x:", ", ".join(region + " " + str(round(share["holed"]*100, 1)) + "%" for region, share in run["regions"].items()))
+    if result["mean_per_10_percent_max_hyp"] is not None:
+        print("  mean shots change by", result["mean_per_10_percent_max_hyp"], "for each 10% more max_hyp")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find par for each level by playing it many times with noisy aim")
+    parser.add_argument("--games", type=int, default=GAMES, help="games per level at each max_hyp scale")
+    parser.add_argument("--levels", help="comma separated, every level by default")
+    parser.add_argument("--scales", default=",".join(str(scale) for scale in SCALES), help="max_hyp scales to try, comma separated")
+    parser.add_argument("--angle-noise", type=float, default=m.degrees(ANGLE_NOISE), help="standard deviation of the angle, in degrees")
+    parser.add_argument("--power-noise", type=float, default=POWER_NOISE, help="standard deviation of the power, as a fraction")
+    parser.add_argument("--workers", type=int, help="processes to use, every core by default")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--json", help="also write the results to this file")
+    arguments = parser.parse_args()
+    level_numbers = [int(level) for level in arguments.levels.split(",")] if arguments.levels else sorted(levels.get_all())
+    report = run(level_numbers, [float(scale) for scale in arguments.scales.split(",")], arguments.games, arguments.seed,
+                 arguments.workers, m.radians(arguments.angle_noise), arguments.power_noise)
+    if arguments.json:
+        with open(arguments.json, "w") as file:
+            json.dump(report, file, indent=2)
@@ -0,0 +1,206 @@
+#   Headless physics for the golf ball, with no tkinter needed
+#   Holds the ball state, the gravity/air resistance integration and the collision rules for each level
+#   so shots can be simulated on servers and in tests, and the Ball class only has to draw the result
+#   Moving obstacles are looked up from the step count, so they are always exactly in step with the ball
+
+import math as m
+from operator import attrgetter
+import levels
+
+#Some constants describing the world
+WIDTH = 1366
+HEIGHT = 768
+FLOOR = 720 # 0,768 is bottom left
+BALL_SIZE = 30 # Radius 15px
+START_X = 5
+START_Y = 720
+INTERVAL = 0.012 # Time between physics steps, in seconds
+GRAVITY = 9.5 # g = 9.5, since it looks better
+AIR_RESISTANCE = 0.999
+MAX_TRAVEL = BALL_SIZE/2 # The furthest the ball moves between collision checks, faster balls split their step up
+
+#What can happen to a ball after a step
+MOVING = "moving"
+HOLED = "holed"
+STOPPED = "stopped"
+
+
+def aim(ball_pos_x, ball_pos_y, x, y, max_hyp): # Work out the angle and power of aiming at x,y, limited to max_hyp
+    relative_x = x - ball_pos_x #Relative distance x direction from ball to where we aimed
+    relative_y = ball_pos_y - y #Relative distance y direction from ball to where we aimed
+    if relative_x > 0: #Use only positive values for theta
+        theta = m.atan(relative_y/relative_x)
+    elif relative_x < 0:
+        theta = m.pi + m.atan(relative_y/relative_x)
+    else:
+        theta = m.pi/2 # And have boundary for if we shoot straight up
+
+    hyp = m.sqrt(relative_x**2 + relative_y**2) # Calculate the hypotenuse
+    if hyp > max_hyp: #If we are shooting too hard, instead shoot at predetermined power
+        relative_x, relative_y = aim_at(theta, max_hyp, max_hyp)
+    return theta, relative_x, relative_y
+
+def aim_at(theta, power, max_hyp): # The relative x and y of a shot at angle theta, with the power limited to max_hyp
+    power = min(power, max_hyp)
+    return power * m.cos(theta), power * m.sin(theta)
+
+def mover_tables(layout): # (name, positions) of each mover in a level, for mover_positions
+    return [(mover.name, mover.positions(INTERVAL)) for mover in layout.movers]
+
+def mover_positions(tables, clock): # name -> (coords, offset) of each mover, clock steps after the level started
+    return {name: table[clock % len(table)] for name, table in tables}
+
+def mover_cycle(tables): # Steps before every mover is back where it started, 1 if nothing moves
+    return m.lcm(*[len(table) for name, table in tables])
+
+
+class Simulation:
+
+    def __init__(self, level, x=START_X, y=START_Y, clock=0):
+        self.level = level
+        self.layout = levels.get(level) # What is in the level, from levels.json
+        self.left_pos = float(x) # The ball is stored by its bottom left corner, the same as ball_pos_x and y
+        self.bottom_pos = float(y)
+        self.x_velocity = 0.0
+        self.y_velocity = 0.0
+        self.latched = set() # Colliders that only act once, like the ice, that have already acted
+        self.clock = clock # Steps since the level started, which is all it takes to know where the movers are
+        self.tables = mover_tables(self.layout)
+        self.positions = mover_positions(self.tables, self.clock)
+
+    #-- Methods --
+    def coords(self): # The same (left, top, right, bottom) the canvas would give for the ball
+        return self.left_pos, self.bottom_pos - BALL_SIZE, self.left_pos + BALL_SIZE, self.bottom_pos
+
+    def set_coords(self, left_pos, top_pos, right_pos, bottom_pos): # Move the ball, the same way canvas.coords would
+        self.left_pos = left_pos
+        self.bottom_pos = bottom_pos
+
+    def shoot(self, relative_x, relative_y): # Lowering the value of the velocity of the aim before firing
+        self.x_velocity = relative_x/40
+        self.y_velocity = -relative_y/40
+
+    def step(self): # Move the ball forward by one interval
+        # Steps are only ever split, never joined for slow balls: a step is one tick of the game loop, and every
+        # recorded shot, snapshot and batch result relies on the ball being in exactly the same place after each one
+        substeps = max(1, m.ceil(max(abs(self.x_velocity), abs(self.y_velocity)) / MAX_TRAVEL)) # Slow balls move in one go
+        for i in range(substeps):
+            previous = self.coords()
+            self.left_pos += self.x_velocity/substeps
+            self.bottom_pos += self.y_velocity/substeps
+            self.collision_detection_general() # Do collision detection depending on level
+            self.collision_detection_level(previous)
+
+        self.y_velocity = self.y_velocity + GRAVITY*INTERVAL # suvat equations
+        self.x_velocity *= AIR_RESISTANCE # Simulate air resistance
+
+    def status(self): # Find out what the last step did to the ball
+        if not self.is_moving():
+            return STOPPED
+        if self.in_hole():
+            return HOLED
+        return MOVING
+
+    def is_moving(self): # Find out if we are moving
+        return not (-0.02 < self.x_velocity < 0.02 and -0.02 < self.y_velocity < 0.2) #We can disregard tiny velocities
+
+    def in_hole(self): # Check if we are in the hole, not going too fast
+        hole = self.layout.hole
+        return hole["left"][0] < self.left_pos < hole["left"][1] and hole["bottom"][0] <= self.bottom_pos <= hole["bottom"][1] and self.x_velocity < hole["max_speed"]
+
+    def play_shot(self, relative_x, relative_y, max_steps=100000): # Play a whole shot headless, returning what happened and how many steps it took
+        self.shoot(relative_x, relative_y)
+        for steps in range(1, max_steps+1):
+            self.advance()
+            self.step()
+            status = self.status()
+            if status != MOVING:
+                return status, steps
+        return MOVING, max_steps
+
+    def collision_detection_general(self):
+        (left_pos,top_pos,right_pos,bottom_pos) = self.coords()
+        # The ball may be detected when it is inside the wall so we need to move it back to the wall occasionally
+        if right_pos >= WIDTH:#Right wall collision detection
+            gap = right_pos - WIDTH # Figure out where the ball is
+            self.x_velocity *= -0.7
+            self.set_coords(left_pos-gap, top_pos,WIDTH,bottom_pos)# Move the ball to where it was when it collided with wall
+        elif left_pos <= 0: # Left wall collision detection
+            gap = left_pos
+            self.x_velocity *= -0.8
+            self.set_coords(0, top_pos,right_pos-gap,bottom_pos)
+        elif bottom_pos >= FLOOR: # Floor collision detection
+            self.y_velocity *= -0.7
+            self.x_velocity *= 0.93 #Lose a bit of x velocity with bouncing of floor
+            gap = bottom_pos - FLOOR
+            self.set_coords(left_pos, top_pos-gap,right_pos,FLOOR)
+        elif top_pos <= 0: # Ceiling collision detection
+            self.y_velocity *= -0.8
+            self.x_velocity *= 0.9
+            gap = top_pos
+            self.set_coords(left_pos, 0,right_pos,bottom_pos-gap)
+
+    def collision_detection_level(self, previous): # Check the colliders near the ball, only the first one hit acts
+        (left_pos,top_pos,right_pos,bottom_pos) = self.coords()
+        (left_before,top_before,right_before,bottom_before) = previous # Where the ball was before this step
+        hit = None
+        nearby = self.layout.grid.candidates(min(left_pos,left_before),min(top_pos,top_before),max(right_pos,right_before),max(bottom_pos,bottom_before))
+        if self.layout.moving: # Colliders on movers are always checked, in their place in the order
+            nearby = sorted(nearby + self.layout.moving, key=attrgetter("order"))
+        current = (left_pos,top_pos,right_pos,bottom_pos)
+        for collider in nearby:
+            if collider.once and collider.order in self.latched:
+                continue
+            gap = self.positions[collider.gap][0] if collider.gap else None
+            (ball, ball_before, x_offset, y_offset) = (current, previous, 0, 0)
+            if collider.mover: # Check where the ball is compared to the collider, as if it hadn't moved
+                (x_offset, y_offset) = self.positions[collider.mover][1]
+                ball = levels.shift(current, x_offset, y_offset)
+                ball_before = levels.shift(previous, x_offset, y_offset)
+                gap = levels.shift(gap, x_offset, y_offset) if gap else None
+            if collider.matches(*ball, gap):
+                self.bounce(collider, left_pos,top_pos,right_pos,bottom_pos, x_offset, y_offset)
+            elif collider.sweeps:
+                (crossed, fraction) = collider.sweep(ball_before, ball, gap)
+                if not crossed:
+                    continue
+                # We went straight through it, so go back to where we touched it
+                self.left_pos = left_before + fraction*(left_pos-left_before)
+                self.bottom_pos = bottom_before + fraction*(bottom_pos-bottom_before)
+                self.bounce(collider, *self.coords(), x_offset, y_offset)
+            else:
+                continue
+            if collider.once:
+                self.latched.add(collider.order)
+            hit = collider.order
+            break
+        for order in list(self.latched): # If we land on the floor away from it, allow it to act again
+            collider = self.layout.colliders[order]
+            (x_offset, y_offset) = self.offset(collider)
+            if (hit is None or hit > order) and bottom_pos - y_offset >= collider.y and not collider.over(left_pos - x_offset, right_pos - x_offset):
+                self.latched.discard(order)
+
+    def bounce(self, collider, left_pos, top_pos, right_pos, bottom_pos, x_offset=0, y_offset=0): # Act on hitting a collider, moved by the offset
+        self.x_velocity *= collider.x_factor
+        self.y_velocity *= collider.y_factor
+        (edge, value) = collider.snap # Move the ball back to the edge of what it hit
+        value += y_offset if edge == "bottom" else x_offset
+        if edge == "right":
+            self.set_coords(left_pos-(right_pos-value), top_pos,value,bottom_pos)
+        elif edge == "left":
+            self.set_coords(value, top_pos,right_pos-(left_pos-value),bottom_pos)
+        else:
+            self.set_coords(left_pos, top_pos-(bottom_pos-value),right_pos,value)
+
+    def advance(self): # Move the level's movers on by one step, which happens whether or not the ball is moving
+        self.clock += 1
+        if self.tables:
+            self.positions = mover_positions(self.tables, self.clock)
+
+    def offset(self, collider): # How far the mover carrying a collider has moved it from where it started
+        if collider.mover is None:
+            return (0, 0)
+        return self.positions[collider.mover][1]
+
+    def mover_coords(self, name): # Where a mover is now
+        return self.positions[name][0]
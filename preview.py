@@ -0,0 +1,54 @@
+#   Trajectory preview - where a shot would go, played through the same physics as the real shot
+#   Paths are kept for aims rounded to a small grid, so a mouse that shakes a little keeps drawing the
+#   same few paths instead of playing the shot again every frame
+#   The preview starts from the ball's clock and latched colliders, so on a level with movers it shows where the
+#   shot would go if taken now, and is drawn again every frame as the movers go round
+
+import math as m
+from collections import OrderedDict
+import levels
+import physics
+
+ANGLE_STEP = m.radians(0.5) # Aims are rounded to this angle
+POWER_STEP = 2 # And this power
+STEPS = 120 # How far ahead to look, in physics steps
+DOT_EVERY = 6 # Steps between dots
+DOTS = STEPS // DOT_EVERY
+MAX_PATHS = 256 # How many paths to keep
+
+
+def trajectory(level, x, y, theta, power, clock=0, latched=(), steps=STEPS, every=DOT_EVERY): # Centres of the ball every few steps of a shot from x,y
+    # clock and the orders of the latched colliders are the same as Simulation's when the shot is taken
+    simulation = physics.Simulation(level, x, y, clock)
+    simulation.latched = set(latched)
+    simulation.shoot(*physics.aim_at(theta, power, power))
+    points = []
+    for step in range(1, steps+1):
+        simulation.advance() # The same order as Ball.update
+        simulation.step()
+        if step % every == 0:
+            points.append((simulation.left_pos + physics.BALL_SIZE/2, simulation.bottom_pos - physics.BALL_SIZE/2))
+        if simulation.status() != physics.MOVING:
+            break
+    return points
+
+
+class TrajectoryCache:
+
+    def __init__(self, max_paths=MAX_PATHS):
+        self.max_paths = max_paths
+        self.paths = OrderedDict() # (level, x, y, angle, power, clock, latched) -> points, least recently used first
+
+    #-- Methods --
+    def points(self, level, x, y, theta, power, clock=0, latched=()): # The preview of a shot, worked out for the nearest aim on the grid
+        # The clock only matters as far as where it is in the movers' cycle, so that is all that is kept
+        key = (level, x, y, round(theta/ANGLE_STEP), round(power/POWER_STEP), clock % physics.mover_cycle(physics.mover_tables(levels.get(level))), tuple(sorted(latched)))
+        points = self.paths.pop(key, None)
+        if points is None:
+            points = trajectory(level, x, y, key[3]*ANGLE_STEP, key[4]*POWER_STEP, key[5], key[6])
+        self.paths[key] = points # Put it back at the most recently used end
+        while len(self.paths) > self.max_paths:
+            self.paths.popitem(last=False)
+        return points
+
+cache = TrajectoryCache()
@@ -0,0 +1,100 @@
+#   Frame time profiling - times each part of a frame into fixed size ring buffers while the game runs, so the
+#   frame rate and the slowest frames can be shown on the canvas, and a trace of the last few seconds can be
+#   dumped to open in chrome://tracing or Perfetto, with F12 or on closing a game started with --profile. Where it
+#   went is shown on the overlay. Nothing is timed until it is switched on, with the F key or by starting the game
+#   with python main.py --profile
+#   Stages: late is how much later than asked the timer ran the frame, reschedule is asking for the next one,
+#   update is each fixed step of the game loop, step is the ball's physics in it with general, level and hole
+#   inside (or collide, in a party game), and render includes flush. Moving the ball is whatever of step isn't general or level
+
+import json
+import os
+import time
+from array import array
+
+SAMPLES = 2048 # Kept for each stage, a few seconds of the busiest ones
+STAGES = ("frame", "late", "reschedule", "update", "step", "general", "level", "hole", "collide", "render", "flush")
+SHOWN = ("frame", "late", "update", "render", "flush") # On the overlay, under the frame rate
+TRACE_FILE = "trace.json"
+SIMULATION = {"step": "step", "collision_detection_general": "general", "collision_detection_level": "level", "status": "hole"} # Method -> stage
+BALLS = {"step": "step", "collide": "collide"} # Of a party game's multiball.Balls
+RENDERER = {"flush": "flush"}
+
+
+class RingBuffer: # The last size (start, duration) samples of one stage, the oldest overwritten first
+
+    def __init__(self, size=SAMPLES):
+        self.size = size
+        self.starts = array("d", bytes(8*size)) # Flat arrays, so keeping samples doesn't make objects for the garbage collector
+        self.durations = array("d", bytes(8*size))
+        self.count = 0 # Samples ever added
+
+    #-- Methods --
+    def add(self, start, duration):
+        position = self.count % self.size
+        self.starts[position] = start
+        self.durations[position] = duration
+        self.count += 1
+
+    def samples(self): # (start, duration) of each sample kept, oldest first
+        first = max(0, self.count - self.size)
+        return [(self.starts[number % self.size], self.durations[number % self.size]) for number in range(first, self.count)]
+
+    def percentile(self, fraction): # The duration fraction of the kept samples are shorter than
+        kept = sorted(self.durations[:min(self.count, self.size)])
+        if not kept:
+            return 0.0
+        return kept[min(len(kept)-1, int(fraction*len(kept)))]
+
+
+class Profiler:
+
+    def __init__(self, size=SAMPLES):
+        self.stages = {stage: RingBuffer(size) for stage in STAGES}
+        self.started = time.perf_counter()
+        self.trace = None # Where the last trace was written, to show on the overlay
+
+    #-- Methods --
+    def add(self, stage, start, duration):
+        self.stages[stage].add(start, duration)
+
+    def timed(self, stage, function): # function, adding how long each call takes to stage
+        buffer = self.stages[stage]
+        clock = time.perf_counter
+        def run(*args):
+            start = clock()
+            result = function(*args)
+            buffer.add(start, clock() - start)
+            return result
+        return run
+
+    def instrument(self, target, **stages): # Time methods of just this object, given as method name=stage
+        for name, stage in stages.items():
+            setattr(target, name, self.timed(stage, getattr(target, name)))
+
+    def fps(self): # Frames drawn in the last second
+        now = time.perf_counter()
+        return sum(1 for start, duration in self.stages["frame"].samples() if start > now - 1)
+
+    def summary(self): # Lines of text for the overlay
+        lines = ["FPS " + str(self.fps())]
+        for stage in SHOWN:
+            buffer = self.stages[stage]
+            lines.append("%-7s p50 %5.2f  p99 %5.2f ms" % (stage, buffer.percentile(0.5)*1000, buffer.percentile(0.99)*1000))
+        if self.trace is not None:
+            lines.append("Trace written to " + self.trace)
+        return "\n".join(lines)
+
+    def dump(self, path=TRACE_FILE): # Write the samples kept as a Chrome trace, returning where it went
+        events = [{"name": stage, "ph": "X", "pid": 1, "tid": 1, "ts": round((start - self.started)*1e6, 1), "dur": round(duration*1e6, 1)}
+                  for stage, buffer in self.stages.items() for start, duration in buffer.samples()]
+        events.sort(key=lambda event: (event["ts"], -event["dur"])) # Outer stages before the ones inside them
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+        self.trace = os.path.abspath(path)
+        return path
+
+
+def uninstrument(target, *names): # Put back the methods instrument replaced
+    for name in names:
+        target.__dict__.pop(name, None)
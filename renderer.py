@@ -0,0 +1,56 @@
+#   Retained mode drawing - the items on a screen's canvas are made once and kept, with the art of each level
+#   in its own tagged layer that is hidden and shown again rather than deleted and drawn from scratch
+#   Changes to items are held until flush(), which the game loop runs once a frame, and only the ones that
+#   actually change anything are sent to tkinter
+
+NORMAL = "normal"
+HIDDEN = "hidden"
+
+
+class Renderer:
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.layers = set() # Tags of the layers built so far
+        self.current = None # The layer showing
+        self.coords_drawn = {} # item -> coords tkinter has for it
+        self.options_drawn = {} # item -> {option: value} tkinter has for it
+        self.pending_coords = {} # item -> coords to send on the next flush
+        self.pending_options = {} # item -> {option: value} to send on the next flush
+
+    #-- Methods --
+    def show_layer(self, tag, build): # Show the layer with this tag instead of the one showing, calling build(tag) to make it the first time
+        if self.current is not None and self.current != tag:
+            self.canvas.itemconfigure(self.current, state=HIDDEN)
+        if tag in self.layers:
+            self.canvas.itemconfigure(tag, state=NORMAL)
+        else:
+            build(tag)
+            self.layers.add(tag)
+        self.current = tag
+
+    def coords(self, item, *coords): # Move an item, on the next flush
+        self.pending_coords[item] = coords
+
+    def configure(self, item, **options): # Change an item's options, on the next flush
+        self.pending_options.setdefault(item, {}).update(options)
+
+    def show(self, item):
+        self.configure(item, state=NORMAL)
+
+    def hide(self, item):
+        self.configure(item, state=HIDDEN)
+
+    def flush(self): # Send tkinter everything that changed since the last flush
+        for item, coords in self.pending_coords.items():
+            if self.coords_drawn.get(item) != coords:
+                self.canvas.coords(item, *coords)
+                self.coords_drawn[item] = coords
+        for item, options in self.pending_options.items():
+            drawn = self.options_drawn.setdefault(item, {})
+            changed = {key: value for key, value in options.items() if drawn.get(key) != value}
+            if changed:
+                self.canvas.itemconfigure(item, **changed)
+                drawn.update(changed)
+        self.pending_coords.clear()
+        self.pending_options.clear()
@@ -0,0 +1,173 @@
+#   Shot recording and replay - every shot is kept as the state it started from and how it was aimed, in a compact
+#   binary log next to the scores, and the physics is deterministic so the whole shot can be played again from that
+#   When a game is saved the log also gets the name and score it was saved under, so a disputed score can be
+#   checked by replaying every shot of the game, far faster than real time
+#   Usage: python replay.py NAME [SCORE]
+
+import struct
+import sys
+import time
+from array import array
+import physics
+
+SHOTS_FILE = "shots.bin"
+COMPLETED = 0 # Level stored for a completed game
+# Shot: game, shot number, level, clock, number of latched colliders, left, bottom, relative x, relative y, max_hyp, outcome, steps,
+# final left, final bottom, followed by the order of each latched collider
+SHOT = struct.Struct("<QHBIHddddIBIdd")
+ORDER = struct.Struct("<I")
+# Name: game, score, level, name length, followed by the name
+NAME = struct.Struct("<QIBB")
+OUTCOMES = (physics.MOVING, physics.HOLED, physics.STOPPED) # Stored as the index
+
+
+class Shot: # One shot of a game, from where it started to how it ended
+
+    def __init__(self, game, number, level, clock, latched, left_pos, bottom_pos, relative_x, relative_y, max_hyp,
+                 outcome=physics.MOVING, steps=0, final_left=0.0, final_bottom=0.0):
+        self.game = game # Random id of the game it was played in
+        self.number = number
+        self.level = level
+        self.clock = clock # Steps the level had run for, which says where the movers were
+        self.latched = tuple(latched) # Orders of the colliders that had already acted once, like the ice
+        self.left_pos = left_pos
+        self.bottom_pos = bottom_pos
+        self.relative_x = relative_x # The aim, already limited to max_hyp
+        self.relative_y = relative_y
+        self.max_hyp = max_hyp
+        self.outcome = outcome
+        self.steps = steps
+        self.final_left = final_left
+        self.final_bottom = final_bottom
+
+    def start(self): # A Simulation in the state the shot was taken from
+        simulation = physics.Simulation(self.level, self.left_pos, self.bottom_pos, self.clock)
+        simulation.latched = set(self.latched)
+        return simulation
+
+    def finish(self, simulation, steps): # Fill in how the shot ended
+        self.outcome = simulation.status()
+        self.steps = steps
+        self.final_left = simulation.left_pos
+        self.final_bottom = simulation.bottom_pos
+
+    def pack(self):
+        return b"S" + SHOT.pack(self.game, self.number, self.level, self.clock, len(self.latched), self.left_pos, self.bottom_pos,
+                                self.relative_x, self.relative_y, self.max_hyp, OUTCOMES.index(self.outcome), self.steps,
+                                self.final_left, self.final_bottom) + b"".join(ORDER.pack(order) for order in self.latched)
+
+def unpack(data, offset=0): # (Shot, offset after it) of the shot packed at offset in data after its type byte, or None if it is cut short
+    if offset + SHOT.size > len(data):
+        return None
+    fields = list(SHOT.unpack_from(data, offset))
+    fields[10] = OUTCOMES[fields[10]]
+    end = offset + SHOT.size + fields[4]*ORDER.size
+    if end > len(data):
+        return None
+    fields[4] = [ORDER.unpack_from(data, offset + SHOT.size + number*ORDER.size)[0] for number in range(fields[4])]
+    return Shot(*fields), end
+
+def taken(game, number, level, simulation, relative_x, relative_y, max_hyp): # A Shot about to be taken from a Simulation
+    return Shot(game, number, level, simulation.clock, sorted(simulation.latched), simulation.left_pos, simulation.bottom_pos, relative_x, relative_y, max_hyp)
+
+
+class ShotLog: # The binary log of shots and saved games
+
+    def __init__(self, path=SHOTS_FILE):
+        self.path = path
+
+    #-- Methods --
+    def add_shot(self, shot):
+        self.write(shot.pack())
+
+    def add_name(self, game, name, score, level): # Say which name and score a game was saved under
+        name = name.encode()[:255]
+        self.write(b"N" + NAME.pack(game, score, COMPLETED if level == "Completed" else level, len(name)) + name)
+
+    def write(self, record): # Each record is written in one go, so other game instances don't split it
+        with open(self.path, "ab") as file:
+            file.write(record)
+
+    def read(self): # Every (shots, names) in the log, shots as game -> [Shot] and names as [(game, name, score, level)]
+        try:
+            with open(self.path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            data = b""
+        shots = {}
+        names = []
+        offset = 0
+        while offset < len(data):
+            kind = data[offset:offset+1]
+            offset += 1
+            unpacked = unpack(data, offset) if kind == b"S" else None
+            if unpacked is not None:
+                (shot, offset) = unpacked
+                shots.setdefault(shot.game, []).append(shot)
+            elif kind == b"N" and offset + NAME.size <= len(data):
+                (game, score, level, length) = NAME.unpack_from(data, offset)
+                offset += NAME.size
+                names.append((game, data[offset:offset+length].decode(errors="replace"), score, "Completed" if level == COMPLETED else level))
+                offset += length
+            else: # Half written or broken, nothing after it can be trusted
+                break
+        return shots, names
+
+
+def replay(shot, max_steps=100000): # Play a shot again, returning its outcome, steps and where the ball was after each step
+    simulation = shot.start()
+    simulation.shoot(shot.relative_x, shot.relative_y)
+    path = array("d") # left, bottom after each step, one flat array rather than a tuple a step
+    for steps in range(1, max_steps+1):
+        simulation.advance() # The same order as Ball.update
+        simulation.step()
+        path.append(simulation.left_pos)
+        path.append(simulation.bottom_pos)
+        status = simulation.status()
+        if status != physics.MOVING:
+            return status, steps, path
+    return physics.MOVING, max_steps, path
+
+def matches(shot, outcome, steps, path): # Whether a replay ended the same way as the recorded shot
+    return (outcome, steps, path[-2], path[-1]) == (shot.outcome, shot.steps, shot.final_left, shot.final_bottom)
+
+
+class Playback: # A replayed shot played back at speed times real time, for drawing or skipping through
+
+    def __init__(self, shot, speed=1.0):
+        (self.outcome, self.steps, self.path) = replay(shot)
+        self.speed = speed
+
+    #-- Methods --
+    def step(self, seconds): # How many steps of the shot have been played, seconds of playback after it was taken
+        return min(int(seconds*self.speed/physics.INTERVAL), self.steps)
+
+    def position(self, seconds): # Where the ball is, seconds of playback after the shot was taken
+        step = self.step(seconds) - 1
+        if step < 0:
+            return None # Still where it started
+        return self.path[2*step], self.path[2*step+1]
+
+    def finished(self, seconds):
+        return seconds*self.speed/physics.INTERVAL >= self.steps
+
+
+def check(name, score=None, log=None): # Replay every game saved under name, printing whether each shot plays out as recorded
+    (shots, names) = (log or ShotLog()).read()
+    for game, saved_name, saved_score, level in names:
+        if saved_name != name or (score is not None and saved_score != score):
+            continue
+        played = shots.get(game, [])
+        print(name, saved_score, level, "-", len(played), "shots recorded")
+        started = time.perf_counter()
+        total_steps = 0
+        for shot in played:
+            (outcome, steps, path) = replay(shot)
+            total_steps += steps
+            print("  shot", shot.number, "level", shot.level, outcome, steps, "steps", "ok" if matches(shot, outcome, steps, path) else "DIFFERENT")
+        taken = time.perf_counter() - started
+        if taken > 0:
+            print("  replayed at", int(total_steps*physics.INTERVAL/taken), "times real time")
+
+if __name__ == "__main__":
+    check(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None)
@@ -0,0 +1,95 @@
+#   Scheduling - every after() callback of a window goes through one Scheduler, so they can all be
+#   cancelled when a level or window is torn down, and the game loop runs the physics at a fixed
+#   step whatever the timer actually does, drawing in between steps
+
+import itertools
+import time
+import physics
+
+FRAME_INTERVAL = 16 # Time between frames, in milliseconds
+MAX_FRAME_TIME = 0.25 # If we fall this far behind, drop the time rather than trying to catch up
+
+
+class Scheduler:
+
+    def __init__(self, widget):
+        self.widget = widget # The widget whose after() we use
+        self.handles = itertools.count()
+        self.timers = {} # handle -> after id, of everything still to run
+        self.profiler = None # Times rescheduling the game loop, when profiling
+
+    #-- Methods --
+    def after(self, ms, callback, *args): # Run callback once, after ms
+        handle = next(self.handles)
+        def run():
+            del self.timers[handle]
+            callback(*args)
+        self.timers[handle] = self.widget.after(ms, run)
+        return handle
+
+    def every(self, ms, callback): # Run callback every ms, until cancelled
+        handle = next(self.handles)
+        def run():
+            if self.profiler is None:
+                self.timers[handle] = self.widget.after(ms, run) # Reschedule first, so callback can cancel itself
+            else:
+                start = time.perf_counter()
+                self.timers[handle] = self.widget.after(ms, run)
+                self.profiler.add("reschedule", start, time.perf_counter() - start)
+            callback()
+        self.timers[handle] = self.widget.after(ms, run)
+        return handle
+
+    def active(self, handle): # Whether something is still scheduled to run
+        return handle in self.timers
+
+    def cancel(self, handle):
+        after_id = self.timers.pop(handle, None)
+        if after_id is not None:
+            self.widget.after_cancel(after_id)
+
+    def cancel_all(self): # Stop everything, before the level or window goes away
+        for handle in list(self.timers):
+            self.cancel(handle)
+
+
+class GameLoop: # Calls step() once per physics interval of real time, and render() once per frame
+
+    def __init__(self, scheduler, step, render, interval=physics.INTERVAL):
+        self.scheduler = scheduler
+        self.step = self.plain_step = step
+        self.render = self.plain_render = render # Given how far we are between the last step and the next, from 0 to 1
+        self.interval = interval
+        self.handle = None
+        self.profiler = None
+
+    def start(self):
+        self.accumulator = 0.0 # Real time not yet simulated
+        self.last_time = time.perf_counter()
+        self.handle = self.scheduler.every(FRAME_INTERVAL, self.tick)
+
+    def stop(self):
+        self.scheduler.cancel(self.handle)
+
+    def profile(self, profiler): # Time every frame with profiler from now on, or stop timing them if it is None
+        self.profiler = self.scheduler.profiler = profiler
+        if profiler is None:
+            (self.step, self.render) = (self.plain_step, self.plain_render)
+        else:
+            (self.step, self.render) = (profiler.timed("update", self.plain_step), profiler.timed("render", self.plain_render))
+
+    def tick(self):
+        now = time.perf_counter()
+        if self.profiler is not None: # How much later than asked the timer ran us, where a slow machine's stutter shows first
+            expected = self.last_time + FRAME_INTERVAL/1000
+            self.profiler.add("late", expected, max(0.0, now - expected))
+        self.accumulator += min(now - self.last_time, MAX_FRAME_TIME)
+        self.last_time = now
+        while self.accumulator >= self.interval:
+            self.step()
+            self.accumulator -= self.interval
+            if not self.scheduler.active(self.handle): # The step tore the level down
+                return
+        self.render(self.accumulator / self.interval)
+        if self.profiler is not None:
+            self.profiler.add("frame", now, time.perf_counter() - now)
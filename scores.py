@@ -0,0 +1,146 @@
+#   Score storage - scores.txt stays an append only log of "name score level" lines, and an index file next to it
+#   keeps the top scores of completed games and each player's latest save, so the home screen can answer
+#   both without reading the whole log. Any lines added since the index was written are caught up on first
+#   The log is written as UTF-8, so names read back the same on every machine. Lines from older versions of the game,
+#   which wrote in the machine's own encoding, are read in that encoding if they aren't valid UTF-8
+
+import json
+import os
+import bisect
+import locale
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+SCORES_FILE = "scores.txt"
+ENCODING = "utf-8"
+TOP_K = 10 # How many completed games the index keeps
+CHUNK_SIZE = 1 << 20 # Bytes of the log read at a time, so catching up on a huge log doesn't need it all in memory
+
+
+def lock(file): # Block until we are the only game instance using the scores
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+def unlock(file):
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def parse(line): # Turn a line of the log into (name, score, level), or None if it isn't a record
+    try:
+        line = line.decode(ENCODING)
+    except UnicodeDecodeError: # Written by an older version, like cp1252 on Windows
+        line = line.decode(locale.getpreferredencoding(False), errors="replace")
+    record = line.rsplit(None, 2) # Split from the right, so names can have spaces in
+    if len(record) != 3 or not record[1].isdigit():
+        return None
+    if record[2] != "Completed":
+        if not record[2].isdigit():
+            return None
+        record[2] = int(record[2])
+    return record[0], int(record[1]), record[2]
+
+
+class ScoreStore:
+
+    def __init__(self, path=SCORES_FILE, top_k=TOP_K):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.lock_path = path + ".lock" # Separate from the log, so the log can be swapped out while we hold it
+        self.top_k = top_k
+        self.refresh()
+
+    #-- Methods --
+    def refresh(self): # Bring the index up to date with the log
+        with open(self.lock_path, "a+b") as lock_file:
+            lock(lock_file)
+            try:
+                self.update()
+            finally:
+                unlock(lock_file)
+
+    def add(self, name, score, level): # Append a record to the log, and to the index
+        with open(self.lock_path, "a+b") as lock_file:
+            lock(lock_file)
+            try:
+                with open(self.path, "a", encoding=ENCODING) as file:
+                    file.write(name + " " + str(score) + " " + str(level) + "\n")
+                self.update()
+            finally:
+                unlock(lock_file)
+
+    def top(self, n=TOP_K): # The best completed games, lowest score first, as (name, score)
+        return [(name, score) for score, seq, name in self.leaderboard[:n]]
+
+    def latest_save(self, name): # The latest (score, level) saved by name that hasn't completed the game, or None
+        save = self.saves.get(name)
+        return tuple(save) if save is not None else None
+
+    def update(self): # Load the index, and read only the part of the log written after it. Must hold the lock
+        self.load_index()
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            size = 0
+        if size < self.offset: # The log has been replaced, so start again
+            self.reset()
+        if size == self.offset:
+            return
+        with open(self.path, "rb") as file:
+            file.seek(self.offset)
+            lines = file.readlines(CHUNK_SIZE) # Whole lines, about CHUNK_SIZE bytes of them
+            while lines:
+                for line in lines:
+                    if not line.endswith(b"\n"): # Half written, leave it for next time
+                        break
+                    record = parse(line)
+                    if record is not None:
+                        self.index(*record)
+                    self.offset += len(line)
+                lines = file.readlines(CHUNK_SIZE)
+        self.save_index()
+
+    def index(self, name, score, level): # Add one record to the index
+        if level == "Completed": # Only completed games go on the leaderboard
+            entry = [score, self.count, name] # The count keeps ties in the order they were played, like a stable sort
+            if len(self.leaderboard) < self.top_k or entry < self.leaderboard[-1]:
+                bisect.insort(self.leaderboard, entry)
+                del self.leaderboard[self.top_k:]
+        else:
+            self.saves[name] = [score, level]
+        self.count += 1
+
+    def reset(self):
+        self.offset = 0
+        self.count = 0
+        self.leaderboard = [] # Sorted [score, count, name] lists, at most top_k long
+        self.saves = {} # name -> [score, level], one for each player who has saved, so it grows with the players, not the log
+
+    def load_index(self):
+        try:
+            with open(self.index_path, encoding=ENCODING) as file:
+                index = json.load(file)
+        except (FileNotFoundError, ValueError):
+            index = None
+        if index is None or index.get("top_k", 0) < self.top_k: # Missing, broken or too small, so rebuild it from the log
+            self.reset()
+            return
+        self.offset = index["offset"]
+        self.count = index["count"]
+        self.leaderboard = index["leaderboard"][:self.top_k]
+        self.saves = index["saves"]
+
+    def save_index(self): # Write to a temporary file then rename it, so other instances never see half an index
+        index = {"offset": self.offset, "count": self.count, "top_k": self.top_k, "leaderboard": self.leaderboard, "saves": self.saves}
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w", encoding=ENCODING) as file:
+            json.dump(index, file)
+        os.replace(temp_path, self.index_path)
@@ -0,0 +1,258 @@
+#   Game server - hosts any number of games in one asyncio process with no window, for tournaments where hundreds
+#   of players share one machine. Each connection plays one game, the same as a Game screen does: shots come in,
+#   the ball is stepped on the server, and where it is goes back as small binary messages
+#   Every session is stepped by one shared GameLoop, only the balls in flight are touched each step, and the movers
+#   are never sent as a client can work them out from the level's clock. Positions are only sent once a frame, and
+#   only when they have moved by at least 1/16 of a pixel
+#   Scores are saved to the same score store as the game, and the shots to the same shot log, by one background
+#   thread so the files are written in order without holding up the steps
+#   Usage: python server.py [--host 127.0.0.1] [--port 4500]
+
+import argparse
+import asyncio
+import itertools
+import math as m
+import random
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import levels
+import physics
+import replay
+import scheduler
+import scores
+
+HOST = "127.0.0.1" # Only local clients, there is no login
+PORT = 4500
+SCALE = 16 # Positions are sent in 1/16ths of a pixel
+MAX_SHOT_STEPS = 10000 # A ball still moving after this many steps (2 minutes) is stopped where it is
+
+# Messages are a type byte followed by a struct, and names have their length in bytes in front
+# From clients
+JOIN = struct.Struct("<BB") # Carry on from their last save, name length, then the name
+SHOT = struct.Struct("<dd") # Theta, power
+SAVE = struct.Struct("<") # Save the score and leave, like pressing S
+# From the server
+WELCOME = struct.Struct("<II") # Session id, total shots of the levels already played
+LEVEL = struct.Struct("<BHdd") # Level, max_hyp, left, bottom, with the level's clock starting at 0
+MOVE = struct.Struct("<Ihh") # Steps since the level started, which says where the movers are, left and bottom in 1/SCALE pixels
+END = struct.Struct("<BHIdd") # Outcome, shots taken on the level, total shots, exact left and bottom
+COMPLETED = struct.Struct("<I") # Final score, after which the connection is closed
+REJECTED = struct.Struct("<B") # Why a shot wasn't taken, as the index into REASONS, with the ball left where it was
+FROM_CLIENT = {b"J": JOIN, b"S": SHOT, b"Q": SAVE}
+FROM_SERVER = {b"W": WELCOME, b"L": LEVEL, b"M": MOVE, b"E": END, b"C": COMPLETED, b"R": REJECTED}
+OUTCOMES = (physics.MOVING, physics.HOLED, physics.STOPPED) # Sent as the index
+REASONS = ("ball still moving", "not a number", "game over")
+
+
+def pack(kind, *values):
+    return kind + FROM_SERVER[kind].pack(*values)
+
+def quantise(value): # A position in 1/SCALE pixels, kept inside a short
+    return max(-32768, min(32767, round(value*SCALE)))
+
+
+class Timers: # after() and after_cancel() on the asyncio event loop, in place of a tkinter widget's, for scheduler.Scheduler
+
+    def __init__(self, loop):
+        self.loop = loop
+
+    #-- Methods --
+    def after(self, ms, callback):
+        return self.loop.call_later(ms/1000, callback)
+
+    def after_cancel(self, handle):
+        handle.cancel()
+
+
+class Session: # One player's game, holding what a Game screen and its Ball would
+
+    def __init__(self, server, number, name, writer, level=1, score=0):
+        self.server = server
+        self.number = number
+        self.name = name
+        self.writer = writer
+        self.game_id = random.getrandbits(64) # So the shots recorded can be found from the score saved
+        self.current_level = level
+        self.num_shots = 0
+        self.total_num_shots = score
+        self.closed = False # Saved, completed or gone, so no more shots
+        self.start_level()
+
+    #-- Methods --
+    def start_level(self): # A new ball on the tee, with the level's clock starting now
+        self.started = self.server.clock
+        self.simulation = physics.Simulation(self.current_level)
+        self.max_hyp = levels.get(self.current_level).max_hyp
+        self.in_flight = False
+        self.shot = None
+        self.steps = 0
+        self.sent = (quantise(self.simulation.left_pos), quantise(self.simulation.bottom_pos))
+        self.send(pack(b"L", self.current_level, self.max_hyp, self.simulation.left_pos, self.simulation.bottom_pos))
+
+    def shoot(self, theta, power): # Fire the ball, or tell the client why not
+        if self.closed:
+            reason = 2
+        elif self.in_flight:
+            reason = 0
+        elif not (m.isfinite(theta) and m.isfinite(power)):
+            reason = 1
+        else:
+            reason = None
+        if reason is not None:
+            self.send(pack(b"R", reason))
+            return
+        # Catch the movers up with the shared clock, as only balls in flight are stepped
+        self.simulation.clock = self.server.clock - self.started
+        self.simulation.positions = physics.mover_positions(self.simulation.tables, self.simulation.clock)
+        (relative_x, relative_y) = physics.aim_at(theta, max(0.0, power), self.max_hyp) # Nobody can hit harder than max_hyp, or backwards
+        self.num_shots += 1
+        self.shot = replay.taken(self.game_id, self.num_shots, self.current_level, self.simulation, relative_x, relative_y, self.max_hyp)
+        self.simulation.shoot(relative_x, relative_y)
+        self.in_flight = True
+        self.steps = 0
+        self.server.flying.add(self)
+
+    def step(self): # One physics step, the same as Ball.update
+        self.simulation.advance()
+        self.simulation.step()
+        self.steps += 1
+        status = self.simulation.status()
+        if status != physics.MOVING:
+            self.finish(status)
+        elif self.steps >= MAX_SHOT_STEPS: # Recorded as still moving, but the player gets to shoot again from here
+            self.finish(physics.STOPPED)
+
+    def finish(self, status): # The ball stopped or went in, so record the shot and tell the client
+        self.in_flight = False
+        self.server.flying.discard(self)
+        self.shot.finish(self.simulation, self.steps)
+        self.server.write(replay.ShotLog().add_shot, self.shot)
+        self.send_move() # So the last MOVE is where it stopped, before the exact position
+        if status == physics.HOLED:
+            self.total_num_shots += self.num_shots
+        self.send(pack(b"E", OUTCOMES.index(status), self.num_shots, self.total_num_shots, self.simulation.left_pos, self.simulation.bottom_pos))
+        if status != physics.HOLED:
+            return
+        self.num_shots = 0
+        if self.current_level < levels.last():
+            self.current_level += 1
+            self.start_level()
+        else: # Finished the last level, so on to the leaderboard
+            self.send(pack(b"C", self.total_num_shots))
+            self.save("Completed")
+
+    def send_move(self): # Where the ball is, if it has moved since it was last sent
+        position = (quantise(self.simulation.left_pos), quantise(self.simulation.bottom_pos))
+        if position != self.sent:
+            self.sent = position
+            self.send(pack(b"M", self.simulation.clock, *position))
+
+    def save(self, level): # Save the score under the player's name, the same as the Save screen, and end the game
+        self.server.write(scores.ScoreStore().add, self.name, self.total_num_shots, level)
+        self.server.write(replay.ShotLog().add_name, self.game_id, self.name, self.total_num_shots, level)
+        self.close()
+
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write(message)
+
+    def close(self):
+        self.closed = True
+        self.server.leave(self)
+        self.writer.close()
+
+
+class Server:
+
+    def __init__(self, host=HOST, port=PORT):
+        self.host = host
+        self.port = port
+        self.sessions = {} # number -> Session, of everyone connected
+        self.flying = set() # Sessions with a ball in flight, the only ones stepped
+        self.numbers = itertools.count(1)
+        self.clock = 0 # Steps since the server started, which every level's clock is counted from
+        self.files = ThreadPoolExecutor(1) # One thread, so records are written in the order they happen
+
+    #-- Methods --
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        self.timers = scheduler.Scheduler(Timers(loop))
+        self.game_loop = scheduler.GameLoop(self.timers, self.step, self.render) # The shared tick, for every session at once
+        self.game_loop.start()
+        server = await asyncio.start_server(self.connect, self.host, self.port)
+        print("Serving on", self.host, "port", self.port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.timers.cancel_all()
+            self.files.shutdown()
+
+    def step(self): # One physics step of every ball in flight
+        self.clock += 1
+        for session in list(self.flying): # A session leaves the set when its shot ends
+            try:
+                session.step()
+            except Exception as error: # Only end the game that broke, not everyone's
+                print("Session", session.number, "closed:", repr(error), file=sys.stderr)
+                session.close()
+
+    def render(self, alpha): # Once a frame, send everyone in flight where their ball is
+        for session in self.flying:
+            session.send_move()
+
+    def write(self, function, *args): # Write to the score store or shot log in the background
+        asyncio.get_running_loop().run_in_executor(self.files, function, *args)
+
+    def leave(self, session):
+        self.sessions.pop(session.number, None)
+        self.flying.discard(session)
+
+    async def connect(self, reader, writer): # Play one game for as long as the client is connected
+        session = None
+        try:
+            while True:
+                kind = await reader.readexactly(1)
+                if kind not in FROM_CLIENT:
+                    break
+                values = FROM_CLIENT[kind].unpack(await reader.readexactly(FROM_CLIENT[kind].size))
+                if kind == b"J" and session is None:
+                    (resume, length) = values
+                    name = (await reader.readexactly(length)).decode(errors="replace")
+                    session = await self.join(name, resume, writer)
+                elif kind == b"S" and session is not None:
+                    session.shoot(*values)
+                elif kind == b"Q" and session is not None:
+                    session.save(session.current_level)
+                    session = None
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError): # They went away, like closing the window without saving
+            pass
+        finally:
+            if session is not None:
+                self.leave(session)
+            writer.close()
+
+    async def join(self, name, resume, writer): # Start a game, from their last save if they asked to carry on
+        (level, score) = (1, 0)
+        if resume:
+            save = await asyncio.get_running_loop().run_in_executor(self.files, lambda: scores.ScoreStore().latest_save(name))
+            if save is not None:
+                (score, level) = save
+        number = next(self.numbers)
+        writer.write(pack(b"W", number, score))
+        session = self.sessions[number] = Session(self, number, name, writer, level, score)
+        return session
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Host games for clients on this machine")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    arguments = parser.parse_args()
+    try:
+        asyncio.run(Server(arguments.host, arguments.port).serve())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,197 @@
+#   Snapshots - everything about a game in about a hundred bytes, the ball's position and speed, the shots taken,
+#   max_hyp and where the movers are, so a saved game carries on from exactly where it was left just by reading
+#   one small file, with nothing to replay
+#   Files are written by a background thread. Each is written to a temporary file and renamed over the old one, so a
+#   crash leaves the old snapshot or the new one and never half of one. Saves that come in close together are written
+#   as one batch with a single fsync of the folder, and a file saved again before it is written is only written once,
+#   so the game can autosave after every shot for no more than it costs to pack the struct
+
+import os
+import struct
+import sys
+import threading
+import time
+import levels
+import replay
+
+SNAPSHOT_DIR = "saves"
+AUTOSAVE_FILE = os.path.join(SNAPSHOT_DIR, "autosave.snap") # Overwritten after every shot
+BATCH_DELAY = 0.5 # Seconds the writer waits for more saves to join a batch
+RETRY_DELAY = 1 # Seconds before a batch that couldn't be written is tried again, doubling each time it fails
+MAX_RETRY_DELAY = 30
+MAGIC = b"GSNP"
+VERSION = 1
+HEADER = struct.Struct("<4sB") # Magic, version
+# State: game, level, shots on the level, total shots, max_hyp, clock, number of latched colliders, left, bottom, x velocity,
+# y velocity, steps of the shot in flight, flags, theta, relative x, relative y, colour length, followed by the colour, the
+# order of each latched collider as in the shot log, and then the shot in flight if there is one, as it would be in the shot log
+STATE = struct.Struct("<QBHIIIHddddIBdddB")
+IN_FLIGHT = 1 # Flags
+HINT = 2
+PREVIEW = 4
+
+
+class Snapshot: # A game at one moment, as much as Game needs to carry on from it
+
+    def __init__(self, game, level, num_shots, total_num_shots, max_hyp, clock, latched, left_pos, bottom_pos, x_velocity, y_velocity,
+                 steps, flags, theta, relative_x, relative_y, colour, shot=None):
+        self.game = game # Random id the game's shots are recorded under
+        self.level = level
+        self.num_shots = num_shots
+        self.total_num_shots = total_num_shots
+        self.max_hyp = max_hyp # Kept, as the cheat can raise it
+        self.clock = clock # Steps since the level started, which says where the movers are
+        self.latched = tuple(latched) # Orders of the colliders that have already acted once, like the ice
+        self.left_pos = left_pos
+        self.bottom_pos = bottom_pos
+        self.x_velocity = x_velocity
+        self.y_velocity = y_velocity
+        self.steps = steps
+        self.flags = flags
+        self.theta = theta # Where the pointer was aimed
+        self.relative_x = relative_x
+        self.relative_y = relative_y
+        self.colour = colour
+        self.shot = shot # The replay.Shot in flight, so it is still recorded when it ends
+
+    #-- Methods --
+    def is_set(self, flag):
+        return bool(self.flags & flag)
+
+    def pack(self):
+        colour = self.colour.encode()[:255]
+        data = HEADER.pack(MAGIC, VERSION) + STATE.pack(self.game, self.level, self.num_shots, self.total_num_shots, self.max_hyp, self.clock,
+                                                        len(self.latched), self.left_pos, self.bottom_pos, self.x_velocity, self.y_velocity, self.steps,
+                                                        self.flags, self.theta, self.relative_x, self.relative_y, len(colour)) + colour
+        data += b"".join(replay.ORDER.pack(order) for order in self.latched)
+        if self.shot is not None:
+            data += self.shot.pack()
+        return data
+
+def unpack(data): # The Snapshot in data, or None if it isn't one this version of the game can carry on from
+    if len(data) < HEADER.size + STATE.size or HEADER.unpack_from(data) != (MAGIC, VERSION):
+        return None
+    fields = list(STATE.unpack_from(data, HEADER.size))
+    offset = HEADER.size + STATE.size
+    length = fields.pop()
+    fields.append(data[offset:offset+length].decode(errors="replace"))
+    offset += length
+    if len(data) < offset + fields[6]*replay.ORDER.size:
+        return None
+    fields[6] = [replay.ORDER.unpack_from(data, offset + number*replay.ORDER.size)[0] for number in range(fields[6])]
+    offset += len(fields[6])*replay.ORDER.size
+    if fields[12] & IN_FLIGHT:
+        unpacked = replay.unpack(data, offset+1) if data[offset:offset+1] == b"S" else None
+        if unpacked is None:
+            return None
+        fields.append(unpacked[0])
+    if fields[1] not in levels.get_all(): # From a different set of levels
+        return None
+    return Snapshot(*fields)
+
+
+def path(name): # Where the snapshot saved under a name goes, with the name as hex so any name makes a valid file name
+    return os.path.join(SNAPSHOT_DIR, name.encode().hex() + ".snap")
+
+def load(path): # The Snapshot at path, including one still waiting to be written, or None
+    data = writer.read(path)
+    return unpack(data) if data is not None else None
+
+def write_all(batch): # Replace every file in batch (path -> bytes, or None to delete it) so each is all old or all new
+    for path, data in batch.items():
+        if data is not None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path + ".tmp", "wb") as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno()) # On the disk before the rename can be
+    for path, data in batch.items():
+        if data is not None:
+            os.replace(path + ".tmp", path)
+        elif os.path.exists(path):
+            os.remove(path)
+    if os.name != "nt": # So the renames survive a crash too, Windows can't open a folder to do this
+        for folder in {os.path.dirname(path) or "." for path in batch}:
+            if os.path.isdir(folder):
+                handle = os.open(folder, os.O_RDONLY)
+                try:
+                    os.fsync(handle)
+                finally:
+                    os.close(handle)
+
+
+class SnapshotWriter: # Writes snapshots on a background thread, so saving never holds up a frame
+
+    def __init__(self, delay=BATCH_DELAY):
+        self.delay = delay
+        self.pending = {} # path -> bytes, or None to delete it, of everything not written yet
+        self.writing = {} # The batch being written now
+        self.hurry = False # Whether someone is waiting in flush(), so don't wait for more saves
+        self.attempts = 0 # Batches tried
+        self.failed = 0 # The last attempt that couldn't be written
+        self.retry = 0.0 # Seconds to wait before trying again after a failure
+        self.condition = threading.Condition() # Guards everything above, shared with the writing thread
+        self.thread = None # Only started by the first save
+
+    #-- Methods --
+    def save(self, path, data):
+        self.queue(path, data)
+
+    def remove(self, path):
+        self.queue(path, None)
+
+    def queue(self, path, data):
+        with self.condition:
+            self.pending[path] = data # Replacing anything waiting for the same file
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+
+    def read(self, path): # The newest bytes saved to path, written yet or not, or None if there are none
+        with self.condition:
+            for batch in (self.pending, self.writing):
+                if path in batch:
+                    return batch[path]
+        try:
+            with open(path, "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def flush(self): # Wait until everything saved so far is on the disk, or a try at writing it has failed, before the game closes
+        with self.condition:
+            started = self.attempts
+            while (self.pending or self.writing) and self.failed <= started:
+                self.hurry = True
+                self.condition.notify_all()
+                self.condition.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                deadline = time.monotonic() + max(self.delay, self.retry) # Give other saves a chance to join the batch
+                while not self.hurry and time.monotonic() < deadline:
+                    self.condition.wait(deadline - time.monotonic())
+                (self.writing, self.pending, self.hurry) = (self.pending, {}, False)
+                self.attempts += 1
+            try:
+                write_all(self.writing)
+                failed = False
+            except OSError as error: # Not worth stopping the game over, the batch is tried again later
+                print("Could not save snapshots:", error, file=sys.stderr)
+                failed = True
+            with self.condition:
+                if failed: # Back in the queue, unless the same file has been saved again since
+                    for path, data in self.writing.items():
+                        self.pending.setdefault(path, data)
+                    self.failed = self.attempts
+                    self.retry = min(max(2*self.retry, RETRY_DELAY), MAX_RETRY_DELAY)
+                else:
+                    self.retry = 0.0
+                self.writing = {}
+                self.condition.notify_all()
+
+writer = SnapshotWriter() # Shared by every window, so flush() can wait for all of them
@@ -0,0 +1,14 @@
+#   Shared test setup - the game's modules are imported from the folder above, and every test runs in its own empty
+#   folder so nothing reads or writes the real scores, shot log or saves
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def folder(tmp_path, monkeypatch): # The scores, shot log and saves all use paths relative to the current folder
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,66 @@
+#   Batch simulator - every shot played together through batch.simulate must end exactly where physics.Simulation
+#   ends it, as par and the hint trust the batch to stand in for the game
+
+import itertools
+import random
+import pytest
+import levels
+import physics
+from test_physics import SHOTS
+
+np = pytest.importorskip("numpy")
+import batch
+
+
+def scalar(level, theta, power, max_hyp, x=physics.START_X, y=physics.START_Y, clock=0): # (outcome, steps, left, bottom) of one shot
+    simulation = physics.Simulation(level, x, y, clock)
+    (outcome, steps) = simulation.play_shot(*physics.aim_at(theta, power, max_hyp))
+    return outcome, steps, simulation.left_pos, simulation.bottom_pos
+
+def ends(results): # The same for every shot in a batch
+    return [(batch.OUTCOMES[outcome], int(steps), left_pos, bottom_pos)
+            for outcome, steps, left_pos, bottom_pos in zip(results.outcome, results.steps, results.left_pos.tolist(), results.bottom_pos.tolist())]
+
+def group(shot): # batch.simulate takes one level, max_hyp and clock for the whole batch
+    return shot["level"], shot["max_hyp"], shot["clock"]
+
+@pytest.mark.parametrize("key, shots", [(key, list(shots)) for key, shots in itertools.groupby(sorted(SHOTS, key=group), group)])
+def test_batch_matches_scalar_on_recorded_shots(key, shots):
+    (level, max_hyp, clock) = key
+    results = batch.simulate(level, np.array([shot["theta"] for shot in shots]), np.array([shot["power"] for shot in shots]), max_hyp,
+                             np.array([shot["x"] for shot in shots]), np.array([shot["y"] for shot in shots]), clock=clock)
+    assert ends(results) == [scalar(level, shot["theta"], shot["power"], max_hyp, shot["x"], shot["y"], clock) for shot in shots]
+
+@pytest.mark.parametrize("level", [1, 2, 3])
+def test_batch_matches_scalar_on_fast_shots(level): # Harder than max_hyp allows, so the balls split their steps up
+    generator = random.Random(level)
+    aims = [(generator.uniform(0, 3.1), generator.uniform(400, 1000), generator.uniform(0, 1300)) for number in range(30)]
+    results = batch.simulate(level, np.array([aim[0] for aim in aims]), np.array([aim[1] for aim in aims]), 1000, np.array([aim[2] for aim in aims]))
+    assert ends(results) == [scalar(level, theta, power, 1000, x) for theta, power, x in aims]
+
+def test_latched_colliders_carry_into_the_next_shot(): # Level 1 has a floor that only acts once
+    generator = random.Random(5)
+    orders = [collider.order for collider in levels.get(1).colliders if collider.once]
+    for number in range(20):
+        simulation = physics.Simulation(1)
+        simulation.latched = {order for order in orders if generator.random() < 0.5}
+        latched = {order: np.array([order in simulation.latched]) for order in orders}
+        (theta, power) = (generator.uniform(0, 3.1), generator.uniform(20, 280))
+        (outcome, steps) = simulation.play_shot(*physics.aim_at(theta, power, 280))
+        results = batch.simulate(1, np.array([theta]), np.array([power]), 280, latched=latched)
+        assert (results.left_pos[0], results.bottom_pos[0], int(results.steps[0])) == (simulation.left_pos, simulation.bottom_pos, steps)
+        assert {order for order, flags in results.latched.items() if flags[0]} == simulation.latched
+
+def test_power_is_limited_to_max_hyp():
+    (relative_x, relative_y) = batch.aim_at(np.array([0.3, 2.0]), np.array([50, 900]), 300)
+    assert np.hypot(relative_x, relative_y).tolist() == pytest.approx([50, 300])
+
+def test_aim_grid_covers_every_angle_and_power():
+    (theta, power) = batch.aim_grid(300, 18, 5)
+    assert len(theta) == len(power) == 90
+    assert (theta.min(), theta.max()) == (0, pytest.approx(np.pi))
+    assert sorted(set(power.tolist())) == pytest.approx([60, 120, 180, 240, 300])
+
+def test_shots_that_never_stop_are_left_moving():
+    results = batch.simulate(2, np.array([1.0]), np.array([300]), max_steps=5)
+    assert (batch.OUTCOMES[results.outcome[0]], int(results.steps[0])) == (physics.MOVING, 5)
@@ -0,0 +1,54 @@
+#   Swept collisions - a ball moving further in one step than a wall is deep must still hit it, by splitting the
+#   step up and by sweeping walls and roofs for balls that crossed them between checks
+
+import pytest
+import levels
+import physics
+
+
+def fired(level, left_pos, bottom_pos, x_velocity, y_velocity):
+    simulation = physics.Simulation(level, left_pos, bottom_pos)
+    (simulation.x_velocity, simulation.y_velocity) = (x_velocity, y_velocity)
+    return simulation
+
+def test_wall_sweep_finds_where_the_ball_crossed():
+    wall = levels.Wall(0, {"type": "wall", "face": "left", "x": 100, "depth": 5, "bounce": 0.5})
+    (crossed, fraction) = wall.sweep((60, 670, 90, 700), (80, 670, 110, 700), None)
+    assert crossed and fraction == pytest.approx(0.5)
+    (crossed, fraction) = wall.sweep((80, 670, 110, 700), (60, 670, 90, 700), None) # Going away from it
+    assert not crossed
+
+def test_roof_sweep_finds_where_the_ball_crossed():
+    roof = levels.Roof(0, {"type": "roof", "y": 400, "depth": 5, "x": [0, 200], "bounce": 0.5})
+    (crossed, fraction) = roof.sweep((50, 330, 80, 360), (50, 390, 80, 420), None)
+    assert crossed and fraction == pytest.approx(2/3)
+    (crossed, fraction) = roof.sweep((250, 330, 280, 360), (250, 390, 280, 420), None) # Past the end of it
+    assert not crossed
+
+def test_fast_ball_bounces_off_a_wall():
+    simulation = fired(2, 400, 700, 300, 0) # The building's left wall is 39 deep, this would jump right over it
+    simulation.step()
+    assert simulation.left_pos + physics.BALL_SIZE <= 511
+    assert simulation.x_velocity < 0
+
+def test_fast_ball_lands_on_a_roof():
+    simulation = fired(2, 550, 300, 0, 250) # The roof is only 20 deep
+    simulation.step()
+    assert simulation.bottom_pos <= 470 # Bounced back up off it for the rest of the step
+    assert simulation.y_velocity < 0
+
+def test_fast_ball_bounces_off_a_thin_wall_below_the_slit():
+    simulation = fired(3, 440, 700, 60, 0) # The walls either side of the slit are 14 deep
+    simulation.step()
+    assert simulation.left_pos + physics.BALL_SIZE <= 500
+    assert simulation.x_velocity < 0
+
+def test_fast_ball_goes_through_the_slit():
+    simulation = fired(3, 460, 480, 60, 0) # The slit starts at 400 to 500, so the ball fits through
+    simulation.step()
+    assert (simulation.left_pos, simulation.x_velocity > 0) == (520, True)
+
+def test_split_steps_move_the_same_distance_in_open_air():
+    simulation = fired(1, 300, 300, 50, -40)
+    simulation.step()
+    assert (simulation.left_pos, simulation.bottom_pos) == (pytest.approx(350), pytest.approx(260))
@@ -0,0 +1,68 @@
+#   Levels - levels.json is read into the same colliders every time, and the collision grid must hand back every
+#   collider a ball could touch, so checking only those gives exactly what checking all of them would
+
+import json
+import math as m
+import random
+import pytest
+import levels
+import physics
+
+
+class Everything: # A grid that hands back every collider, as the game did before there was one
+
+    def __init__(self, colliders):
+        self.colliders = tuple(colliders)
+
+    def candidates(self, left_pos, top_pos, right_pos, bottom_pos):
+        return self.colliders
+
+
+def touches(zone, box): # Whether a collider's zone and a box share any point
+    return zone[0] <= box[2] and box[0] <= zone[2] and zone[1] <= box[3] and box[1] <= zone[3]
+
+@pytest.mark.parametrize("level", [1, 2, 3])
+def test_grid_finds_every_collider_a_box_touches(level):
+    layout = levels.get(level)
+    static = [collider for collider in layout.colliders if collider.mover is None]
+    generator = random.Random(level)
+    for number in range(2000):
+        (left_pos, top_pos) = (generator.uniform(-100, physics.WIDTH), generator.uniform(-100, physics.HEIGHT))
+        box = (left_pos, top_pos, left_pos + generator.uniform(0, 200), top_pos + generator.uniform(0, 200)) # Up to a whole fast step
+        found = layout.grid.candidates(*box)
+        assert [collider.order for collider in found] == sorted(collider.order for collider in found)
+        assert {collider.order for collider in static if touches(collider.zone, box)} <= {collider.order for collider in found}
+        assert layout.grid.candidates(*box) is found # Kept for the next ball over the same squares
+
+@pytest.mark.parametrize("level", [1, 2, 3])
+def test_grid_plays_the_same_as_checking_everything(level, monkeypatch):
+    generator = random.Random(level)
+    aims = [(generator.uniform(0, m.pi), generator.uniform(20, 1000), generator.uniform(0, 1300)) for number in range(30)]
+    def play():
+        ends = []
+        for theta, power, x in aims:
+            simulation = physics.Simulation(level, x)
+            ends.append((simulation.play_shot(*physics.aim_at(theta, power, 1000)), simulation.left_pos, simulation.bottom_pos))
+        return ends
+    with_grid = play()
+    layout = levels.get(level)
+    monkeypatch.setattr(layout, "grid", Everything(collider for collider in layout.colliders if collider.mover is None))
+    assert play() == with_grid
+
+def test_load_fills_in_the_shared_hole(tmp_path):
+    data = {"hole": {"left": [10, 20], "bottom": [719, 721], "max_speed": 5},
+            "levels": {"1": {"max_hyp": 100, "colliders": [{"type": "wall", "face": "left", "x": 300, "depth": 10, "bounce": 0.5}]},
+                       "2": {"max_hyp": 200, "hole": {"left": [30, 40], "bottom": [719, 721], "max_speed": 2}}}}
+    (tmp_path / "levels.json").write_text(json.dumps(data))
+    loaded = levels.load(str(tmp_path / "levels.json"))
+    assert sorted(loaded) == [1, 2]
+    assert (loaded[1].hole["left"], loaded[2].hole["left"]) == ([10, 20], [30, 40])
+    wall = loaded[1].colliders[0]
+    assert (wall.order, wall.snap, wall.x_factor, wall.zone) == (0, ("right", 300), -0.5, (300, -levels.INFINITY, 310, levels.INFINITY))
+    assert loaded[1].grid.candidates(295, 100, 305, 130) == (wall,)
+
+def test_colliders_must_name_a_real_mover(tmp_path):
+    data = {"hole": {}, "levels": {"1": {"max_hyp": 100, "colliders": [{"type": "floor", "x": [0, 10], "y": 700, "gap": "door"}]}}}
+    (tmp_path / "levels.json").write_text(json.dumps(data))
+    with pytest.raises(ValueError):
+        levels.load(str(tmp_path / "levels.json"))
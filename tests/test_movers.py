@@ -0,0 +1,44 @@
+#   Movers - every mover's path is worked out once as a table of where it is after each physics step, which must go
+#   round in a loop and stay inside its limits, so the clock alone says where everything is
+#   That the slit's table matches the original 150ms timer is checked by the level 3 shots in shots.json
+
+import math as m
+import pytest
+import levels
+import physics
+
+
+def bounce(**data):
+    return levels.Bounce(dict({"name": "door", "coords": [100, 400, 130, 500], "axis": "y", "speed": 3, "limits": [300, 550], "interval": 0.15}, **data))
+
+def test_bounce_moves_on_its_own_ticks_and_turns_at_its_limits():
+    mover = bounce()
+    table = mover.positions(physics.INTERVAL)
+    offsets = [offset[1] for coords, offset in table]
+    assert offsets[0] == 0
+    moves = [after - before for before, after in zip(offsets, offsets[1:])]
+    assert set(moves) == {0, 3, -3}
+    assert sum(1 for move in moves if move) == pytest.approx(len(table)*physics.INTERVAL/0.15, abs=1) # Once a tick
+    assert min(coords[1] for coords, offset in table) >= 300 - 3
+    assert max(coords[3] for coords, offset in table) <= 550 + 3
+    assert table[0][0] == (100, 400, 130, 500)
+
+def test_oscillator_and_rotator_go_round_once_a_period():
+    oscillator = levels.Oscillator({"name": "swing", "coords": [0, 0, 10, 10], "amplitude": 50, "period": 1.2})
+    table = oscillator.positions(physics.INTERVAL)
+    assert len(table) == 100
+    assert max(offset[0] for coords, offset in table) == pytest.approx(50)
+    rotator = levels.Rotator({"name": "wheel", "coords": [0, 0, 10, 10], "radius": 40, "period": -0.6})
+    table = rotator.positions(physics.INTERVAL)
+    assert len(table) == 50
+    assert all(m.hypot(x_offset + 40, y_offset) == pytest.approx(40) for coords, (x_offset, y_offset) in table)
+
+def test_positions_follow_the_clock():
+    tables = physics.mover_tables(levels.get(3))
+    cycle = physics.mover_cycle(tables)
+    assert physics.mover_positions(tables, 17) == physics.mover_positions(tables, 17 + cycle)
+    simulation = physics.Simulation(3, clock=cycle - 5)
+    for step in range(10):
+        simulation.advance()
+        assert simulation.positions == physics.mover_positions(tables, cycle - 4 + step)
+    assert physics.mover_cycle([]) == 1
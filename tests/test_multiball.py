@@ -0,0 +1,75 @@
+#   Multi-ball - a ball on its own must play as Simulation does, and sort and sweep must find every pair of balls
+#   that are touching, as checking every pair would
+
+import itertools
+import json
+import math as m
+import os
+import random
+import pytest
+np = pytest.importorskip("numpy")
+import multiball
+import physics
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "shots.json")) as file:
+    SHOTS = [shot for shot in json.load(file) if shot["clock"] == 0]
+
+
+def play(balls, limit=5000): # Step the balls until none are moving, returning how many steps it took
+    for steps in range(1, limit):
+        balls.advance()
+        balls.step()
+        if not balls.moving.any():
+            return steps
+
+def scatter(balls, seed): # Every ball teed and moving at a random spot, close enough for plenty of them to touch
+    rng = random.Random(seed)
+    for ball in range(len(balls.left_pos)):
+        balls.left_pos[ball] = rng.uniform(100, 300)
+        balls.bottom_pos[ball] = rng.uniform(500, 560)
+        balls.teed[ball] = True
+        balls.moving[ball] = rng.random() < 0.5
+
+
+@pytest.mark.parametrize("shot", SHOTS[::5])
+def test_one_ball_plays_as_the_simulation_does(shot):
+    balls = multiball.Balls(shot["level"], 1, shot["x"], shot["y"])
+    balls.shoot(0, *physics.aim_at(shot["theta"], shot["power"], shot["max_hyp"]))
+    assert play(balls) == shot["steps"]
+    assert balls.holed[0] == (shot["outcome"] == physics.HOLED)
+    if not balls.holed[0]:
+        assert (balls.left_pos[0], balls.bottom_pos[0]) == pytest.approx((shot["left"], shot["bottom"]), abs=1e-6)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sort_and_sweep_finds_every_touching_pair(seed, monkeypatch):
+    balls = multiball.Balls(1, 40)
+    scatter(balls, seed)
+    found = []
+    monkeypatch.setattr(balls, "bounce", lambda first, second: found.append(frozenset((first, second))))
+    balls.collide()
+    touching = {frozenset(pair) for pair in itertools.combinations(range(40), 2)
+                if m.hypot(balls.left_pos[pair[0]] - balls.left_pos[pair[1]], balls.bottom_pos[pair[0]] - balls.bottom_pos[pair[1]]) < physics.BALL_SIZE
+                and (balls.moving[pair[0]] or balls.moving[pair[1]])}
+    assert touching and touching <= set(found)
+    assert len(found) == len(set(found)) # No pair is bounced twice
+
+def test_balls_on_the_tee_or_holed_are_left_alone(monkeypatch):
+    balls = multiball.Balls(1, 3)
+    balls.teed[:] = [True, False, True]
+    balls.holed[2] = True
+    balls.moving[0] = True
+    monkeypatch.setattr(balls, "bounce", lambda first, second: pytest.fail("bounced %d and %d" % (first, second)))
+    balls.collide()
+
+def test_a_ball_knocks_another_along():
+    balls = multiball.Balls(1, 2, 100, 720)
+    balls.left_pos[1] = 100 + physics.BALL_SIZE + 5
+    balls.teed[1] = True
+    balls.shoot(0, *physics.aim_at(0, 200, 400)) # Straight along the ground at the other ball
+    momentum = balls.x_velocity.sum()
+    balls.advance()
+    while not balls.moving[1]:
+        balls.step()
+    assert balls.x_velocity[1] > 0 and balls.x_velocity[1] > balls.x_velocity[0]
+    assert m.hypot(balls.left_pos[1] - balls.left_pos[0], balls.bottom_pos[1] - balls.bottom_pos[0]) >= physics.BALL_SIZE - 1e-9
+    assert balls.x_velocity.sum() <= momentum
@@ -0,0 +1,45 @@
+#   Physics - the shots in shots.json were recorded from the original Ball.update, moving the ball on a stand-in canvas
+#   with the slit on its own 150ms timer, before the physics was taken out of main.py. Simulation must end every one
+#   the same way after the same number of steps, to within the rounding of keeping all four corners on the canvas
+
+import json
+import math as m
+import os
+import pytest
+import physics
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "shots.json")) as file:
+    SHOTS = json.load(file) # From the tee and from random spots, at random clocks on level 3, on every level
+
+
+@pytest.mark.parametrize("shot", SHOTS)
+def test_shot_ends_as_the_original_did(shot):
+    simulation = physics.Simulation(shot["level"], shot["x"], shot["y"], shot["clock"])
+    (outcome, steps) = simulation.play_shot(*physics.aim_at(shot["theta"], shot["power"], shot["max_hyp"]))
+    assert (outcome, steps) == (shot["outcome"], shot["steps"])
+    if outcome == physics.STOPPED: # The original deleted the ball as it went in, so only where it stopped was kept
+        assert simulation.left_pos == pytest.approx(shot["left"], abs=1e-6)
+        assert simulation.bottom_pos == pytest.approx(shot["bottom"], abs=1e-6)
+
+def test_same_shot_twice_is_identical():
+    paths = []
+    for attempt in range(2):
+        simulation = physics.Simulation(3, clock=123)
+        simulation.shoot(*physics.aim_at(1.0, 300, 400))
+        path = []
+        while not path or simulation.status() == physics.MOVING:
+            simulation.advance()
+            simulation.step()
+            path.append((simulation.left_pos, simulation.bottom_pos, simulation.clock))
+        paths.append(path)
+    assert paths[0] == paths[1]
+
+def test_power_is_limited_to_max_hyp():
+    (relative_x, relative_y) = physics.aim_at(0.7, 1000, 250)
+    assert m.hypot(relative_x, relative_y) == pytest.approx(250)
+
+def test_coords_are_the_canvas_corners():
+    simulation = physics.Simulation(1, 100, 700)
+    assert simulation.coords() == (100, 670, 130, 700)
+    simulation.set_coords(200, 400, 230, 430)
+    assert (simulation.left_pos, simulation.bottom_pos) == (200, 430)
@@ -0,0 +1,51 @@
+#   Shot preview - the dots must be where the real shot goes, from the same clock and latched colliders, and paths
+#   are kept for aims on a small grid, dropping the least recently used
+
+import physics
+import preview
+
+
+def played(level, x, y, theta, power, clock=0, latched=()): # Centres every DOT_EVERY steps of the real shot, the way Ball plays it
+    simulation = physics.Simulation(level, x, y, clock)
+    simulation.latched = set(latched)
+    simulation.shoot(*physics.aim_at(theta, power, power))
+    points = []
+    for step in range(1, preview.STEPS+1):
+        simulation.advance()
+        simulation.step()
+        if step % preview.DOT_EVERY == 0:
+            points.append((simulation.left_pos + physics.BALL_SIZE/2, simulation.bottom_pos - physics.BALL_SIZE/2))
+        if simulation.status() != physics.MOVING:
+            break
+    return points
+
+def test_preview_follows_the_real_shot():
+    for level, clock, latched in ((1, 0, ()), (1, 0, (1,)), (3, 0, ()), (3, 700, ())):
+        assert preview.trajectory(level, 200, 720, 0.5, 380, clock, latched) == played(level, 200, 720, 0.5, 380, clock, latched)
+
+def test_preview_depends_on_where_the_slit_is():
+    assert preview.trajectory(3, 200, 720, 0.9, 400, 0) != preview.trajectory(3, 200, 720, 0.9, 400, 700)
+
+def test_aims_close_together_share_a_path():
+    cache = preview.TrajectoryCache()
+    first = cache.points(2, 5, 720, 0.8, 300)
+    assert cache.points(2, 5, 720, 0.8 + preview.ANGLE_STEP/4, 300.5) is first
+    assert first == played(2, 5, 720, round(0.8/preview.ANGLE_STEP)*preview.ANGLE_STEP, 300)
+    assert cache.points(2, 5, 720, 0.8 + preview.ANGLE_STEP, 300) is not first
+
+def test_clock_is_kept_as_the_point_in_the_movers_cycle():
+    cache = preview.TrajectoryCache()
+    cycle = physics.mover_cycle(physics.mover_tables(physics.levels.get(3)))
+    first = cache.points(3, 200, 720, 0.5, 380, 700)
+    assert cache.points(3, 200, 720, 0.5, 380, 700 + cycle) is first
+    assert cache.points(3, 200, 720, 0.5, 380, 701) is not first
+    assert cache.points(2, 200, 720, 0.5, 380, 5) is cache.points(2, 200, 720, 0.5, 380, 9) # Nothing moves on level 2
+
+def test_least_recently_used_path_is_dropped():
+    cache = preview.TrajectoryCache(max_paths=2)
+    first = cache.points(1, 5, 720, 0.5, 200)
+    cache.points(1, 5, 720, 0.6, 200)
+    cache.points(1, 5, 720, 0.5, 200) # Used again, so the 0.6 path is the oldest
+    cache.points(1, 5, 720, 0.7, 200)
+    assert len(cache.paths) == 2
+    assert cache.points(1, 5, 720, 0.5, 200) is first
@@ -0,0 +1,45 @@
+#   Profiler - each stage keeps its last few samples in a ring buffer, and everything kept can be dumped as a trace
+
+import json
+import pytest
+import profiling
+
+
+def test_ring_buffer_keeps_the_newest_samples_oldest_first():
+    buffer = profiling.RingBuffer(size=4)
+    assert buffer.samples() == [] and buffer.percentile(0.5) == 0.0
+    for number in range(6):
+        buffer.add(float(number), number/10)
+    assert buffer.samples() == [(2.0, 0.2), (3.0, 0.3), (4.0, 0.4), (5.0, 0.5)]
+    assert buffer.count == 6
+
+def test_percentiles_are_of_the_samples_kept():
+    buffer = profiling.RingBuffer(size=100)
+    for number in range(150): # The first 50 are overwritten
+        buffer.add(0.0, float(number))
+    assert (buffer.percentile(0), buffer.percentile(0.5), buffer.percentile(0.99), buffer.percentile(1)) == (50, 100, 149, 149)
+
+def test_instrument_times_only_that_object():
+    class Thing:
+        def work(self, value):
+            return value*2
+    (timed, untouched) = (Thing(), Thing())
+    profiler = profiling.Profiler(size=8)
+    profiler.instrument(timed, work="step")
+    assert timed.work(4) == 8 and untouched.work(1) == 2
+    assert profiler.stages["step"].count == 1
+    profiling.uninstrument(timed, "work")
+    timed.work(1)
+    assert profiler.stages["step"].count == 1
+
+def test_trace_has_every_sample_and_is_shown(tmp_path):
+    profiler = profiling.Profiler(size=8)
+    profiler.add("frame", profiler.started + 1, 0.010)
+    profiler.add("update", profiler.started + 1.001, 0.002)
+    profiler.add("render", profiler.started + 1.004, 0.005)
+    path = profiler.dump(str(tmp_path / "trace.json"))
+    with open(path) as file:
+        events = json.load(file)["traceEvents"]
+    assert [(event["name"], event["ts"], event["dur"]) for event in events] == [("frame", 1e6, 1e4), ("update", 1.001e6, 2e3), ("render", 1.004e6, 5e3)]
+    assert profiler.summary().splitlines()[-1] == "Trace written to " + str(tmp_path / "trace.json")
+    assert profiler.summary().splitlines()[0].startswith("FPS ")
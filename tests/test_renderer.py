@@ -0,0 +1,60 @@
+#   Renderer - changes are only sent to the canvas on flush, once per item, and only if they change what is drawn
+
+import renderer
+
+
+class Canvas: # Records what would have been sent to tkinter
+
+    def __init__(self):
+        self.calls = []
+
+    def coords(self, item, *coords):
+        self.calls.append(("coords", item, coords))
+
+    def itemconfigure(self, item, **options):
+        self.calls.append(("itemconfigure", item, options))
+
+
+def test_nothing_is_sent_until_flush():
+    canvas = Canvas()
+    drawing = renderer.Renderer(canvas)
+    drawing.coords(1, 0, 0, 10, 10)
+    drawing.configure(2, text="Shot number 1")
+    assert canvas.calls == []
+    drawing.flush()
+    assert canvas.calls == [("coords", 1, (0, 0, 10, 10)), ("itemconfigure", 2, {"text": "Shot number 1"})]
+
+def test_only_the_last_change_of_a_frame_is_sent():
+    canvas = Canvas()
+    drawing = renderer.Renderer(canvas)
+    for x in range(5):
+        drawing.coords(1, x, 0, x+10, 10)
+    drawing.hide(2)
+    drawing.show(2)
+    drawing.configure(2, fill="red")
+    drawing.flush()
+    assert canvas.calls == [("coords", 1, (4, 0, 14, 10)), ("itemconfigure", 2, {"state": renderer.NORMAL, "fill": "red"})]
+
+def test_unchanged_items_are_not_sent_again():
+    canvas = Canvas()
+    drawing = renderer.Renderer(canvas)
+    drawing.coords(1, 0, 0, 10, 10)
+    drawing.configure(2, text="a", fill="red")
+    drawing.flush()
+    canvas.calls.clear()
+    drawing.coords(1, 0, 0, 10, 10)
+    drawing.configure(2, text="a", fill="blue")
+    drawing.flush()
+    drawing.flush() # Nothing pending
+    assert canvas.calls == [("itemconfigure", 2, {"fill": "blue"})]
+
+def test_layers_are_built_once_then_shown_and_hidden():
+    canvas = Canvas()
+    drawing = renderer.Renderer(canvas)
+    built = []
+    drawing.show_layer("level1", built.append)
+    drawing.show_layer("level2", built.append)
+    drawing.show_layer("level1", built.append)
+    assert built == ["level1", "level2"]
+    assert canvas.calls == [("itemconfigure", "level1", {"state": renderer.HIDDEN}), ("itemconfigure", "level2", {"state": renderer.HIDDEN}),
+                            ("itemconfigure", "level1", {"state": renderer.NORMAL})]
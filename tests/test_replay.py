@@ -0,0 +1,50 @@
+#   Shot log - shots must come back out of the log exactly as they went in, and replay to the same end
+
+import random
+import physics
+import replay
+
+
+def play(level, theta, power, clock=0): # Take a shot the way Ball does, recording it like the game
+    simulation = physics.Simulation(level, clock=clock)
+    (relative_x, relative_y) = physics.aim_at(theta, power, 400)
+    shot = replay.taken(77, 1, level, simulation, relative_x, relative_y, 400)
+    (outcome, steps) = simulation.play_shot(relative_x, relative_y)
+    shot.finish(simulation, steps)
+    return shot
+
+def test_pack_and_unpack():
+    shot = replay.Shot(2**63, 3, 2, 12345, [0, 15, 16, 70000], 10.5, 700.25, 120.0, -80.0, 350, physics.HOLED, 411, 1200.0, 650.0)
+    data = shot.pack()
+    (unpacked, end) = replay.unpack(data, 1)
+    assert vars(unpacked) == vars(shot)
+    assert end == len(data)
+    assert replay.unpack(data[:-1], 1) is None # Cut short in the latched orders
+    assert replay.unpack(data[:10], 1) is None
+
+def test_log_reads_back_what_was_written():
+    log = replay.ShotLog()
+    shots = [play(level, 0.4 + level/5, 150 + level*40, clock=level*100) for level in (1, 2, 3)]
+    for shot in shots:
+        log.add_shot(shot)
+    log.add_name(77, "ann", 14, "Completed")
+    log.add_name(78, "bob", 3, 2)
+    with open(log.path, "ab") as file:
+        file.write(shots[0].pack()[:20]) # A record still being written by another instance
+    (read, names) = log.read()
+    assert [vars(shot) for shot in read[77]] == [vars(shot) for shot in shots]
+    assert names == [(77, "ann", 14, "Completed"), (78, "bob", 3, 2)]
+
+def test_replays_match_the_recording():
+    generator = random.Random(2)
+    for number in range(30):
+        shot = play(generator.choice((1, 2, 3)), generator.uniform(0, 3.1), generator.uniform(20, 400), generator.randrange(3000))
+        (outcome, steps, path) = replay.replay(shot)
+        assert replay.matches(shot, outcome, steps, path)
+        assert replay.replay(shot)[2] == path # And the same every time
+
+def test_latched_colliders_are_replayed():
+    shot = play(1, 1.2, 200)
+    shot.latched = tuple(collider.order for collider in physics.Simulation(1).layout.colliders if collider.once)
+    simulation = shot.start()
+    assert simulation.latched == set(shot.latched)
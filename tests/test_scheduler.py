@@ -0,0 +1,102 @@
+#   Scheduler and game loop - timers run once or repeatedly until cancelled, and the game loop steps the physics
+#   once for each interval of real time whatever the frame timer does, on a clock the tests move by hand
+
+import types
+import pytest
+import physics
+import scheduler
+
+
+class Widget: # after() and after_cancel() on a clock moved by hand, in place of a tkinter widget's
+
+    def __init__(self):
+        self.now = 0 # Milliseconds
+        self.timers = {} # after id -> (when, callback)
+        self.ids = 0
+
+    def after(self, ms, callback):
+        self.ids += 1
+        self.timers[self.ids] = (self.now + ms, callback)
+        return self.ids
+
+    def after_cancel(self, after_id):
+        del self.timers[after_id]
+
+    def run(self, ms): # Move the clock on by ms, running every timer that comes due in order
+        end = self.now + ms
+        while self.timers:
+            (after_id, (when, callback)) = min(self.timers.items(), key=lambda timer: (timer[1][0], timer[0]))
+            if when > end:
+                break
+            del self.timers[after_id]
+            self.now = max(self.now, when) # Late if the clock was moved past it
+            callback()
+        self.now = end
+
+@pytest.fixture
+def widget(monkeypatch):
+    widget = Widget()
+    monkeypatch.setattr(scheduler, "time", types.SimpleNamespace(perf_counter=lambda: widget.now/1000))
+    return widget
+
+def test_after_runs_once(widget):
+    timers = scheduler.Scheduler(widget)
+    calls = []
+    handle = timers.after(50, calls.append, "ran")
+    assert timers.active(handle)
+    widget.run(49)
+    assert calls == []
+    widget.run(100)
+    assert calls == ["ran"] and not timers.active(handle)
+
+def test_every_repeats_until_cancelled(widget):
+    timers = scheduler.Scheduler(widget)
+    calls = []
+    def tick():
+        calls.append(widget.now)
+        if len(calls) == 3:
+            timers.cancel(handle) # From inside the callback
+    handle = timers.every(10, tick)
+    widget.run(100)
+    assert calls == [10, 20, 30]
+    assert not widget.timers
+
+def test_cancel_all(widget):
+    timers = scheduler.Scheduler(widget)
+    calls = []
+    timers.after(10, calls.append, 1)
+    timers.every(10, lambda: calls.append(2))
+    timers.cancel(timers.after(5, calls.append, 3))
+    timers.cancel_all()
+    widget.run(100)
+    assert calls == [] and not widget.timers and not timers.timers
+
+def test_game_loop_steps_once_an_interval(widget):
+    (steps, alphas) = ([], [])
+    loop = scheduler.GameLoop(scheduler.Scheduler(widget), lambda: steps.append(widget.now), alphas.append)
+    loop.start()
+    widget.run(1200)
+    assert len(steps) == pytest.approx(1.2/physics.INTERVAL, abs=1)
+    assert len(alphas) == 1200 // scheduler.FRAME_INTERVAL
+    assert all(0 <= alpha < 1 for alpha in alphas)
+    loop.stop()
+    widget.run(1000)
+    assert len(steps) == pytest.approx(1.2/physics.INTERVAL, abs=1)
+
+def test_game_loop_drops_time_after_a_stall(widget):
+    steps = []
+    loop = scheduler.GameLoop(scheduler.Scheduler(widget), lambda: steps.append(1), lambda alpha: None)
+    loop.start()
+    widget.now += 5000 # The window was dragged, or the machine slept
+    widget.run(0) # Just the frame that was due
+    assert len(steps) == int(scheduler.MAX_FRAME_TIME/physics.INTERVAL)
+
+def test_game_loop_stops_when_a_step_tears_it_down(widget):
+    (steps, renders) = ([], [])
+    def step():
+        steps.append(1)
+        loop.stop()
+    loop = scheduler.GameLoop(scheduler.Scheduler(widget), step, renders.append)
+    loop.start()
+    widget.run(100)
+    assert (len(steps), renders) == (1, [])
@@ -0,0 +1,88 @@
+#   Score store - the index must always say what reading the whole log would, however the log was added to
+
+import os
+import scores
+
+
+def write_log(lines, path=scores.SCORES_FILE):
+    with open(path, "a") as file:
+        file.write("".join(line + "\n" for line in lines))
+
+def test_top_and_latest_save():
+    store = scores.ScoreStore()
+    store.add("ann", 12, "Completed")
+    store.add("bob", 3, 2)
+    store.add("bob", 9, "Completed")
+    store.add("ann", 5, 3)
+    assert store.top() == [("bob", 9), ("ann", 12)]
+    assert store.latest_save("ann") == (5, 3)
+    assert store.latest_save("bob") == (3, 2)
+    assert store.latest_save("cat") is None
+
+def test_ties_stay_in_the_order_they_were_played():
+    store = scores.ScoreStore(top_k=3)
+    for name in ("ann", "bob", "cat", "dan"):
+        store.add(name, 7, "Completed")
+    store.add("eve", 6, "Completed")
+    assert store.top() == [("eve", 6), ("ann", 7), ("bob", 7)]
+
+def test_names_with_spaces_and_broken_lines():
+    write_log(["ann marie 10 Completed", "not a record", "bob x Completed", "cat 4 two"])
+    assert scores.ScoreStore().top() == [("ann marie", 10)]
+
+def test_other_instances_are_caught_up():
+    first = scores.ScoreStore()
+    second = scores.ScoreStore()
+    first.add("ann", 8, "Completed")
+    write_log(["bob 6 Completed"]) # As an old version of the game would
+    second.refresh()
+    assert second.top() == [("bob", 6), ("ann", 8)]
+    assert second.offset == os.path.getsize(scores.SCORES_FILE)
+
+def test_half_written_line_is_left_for_later():
+    with open(scores.SCORES_FILE, "w") as file:
+        file.write("ann 8 Completed\nbob 6 Comp")
+    store = scores.ScoreStore()
+    assert store.top() == [("ann", 8)]
+    with open(scores.SCORES_FILE, "a") as file:
+        file.write("leted\n")
+    store.refresh()
+    assert store.top() == [("bob", 6), ("ann", 8)]
+
+def test_index_matches_a_rebuild(monkeypatch):
+    monkeypatch.setattr(scores, "CHUNK_SIZE", 64) # Many chunks, with lines split across them
+    store = scores.ScoreStore(top_k=5)
+    for number in range(300):
+        write_log([("player" + str(number % 37)) + " " + str(number*7 % 101) + " " + ("Completed" if number % 3 else str(number % 4 + 1))])
+        if number % 41 == 0:
+            store.refresh()
+    store.refresh()
+    os.remove(store.index_path)
+    rebuilt = scores.ScoreStore(top_k=5)
+    assert store.top() == rebuilt.top()
+    assert store.saves == rebuilt.saves
+    assert (store.offset, store.count) == (rebuilt.offset, rebuilt.count) == (os.path.getsize(scores.SCORES_FILE), 300)
+
+def test_replaced_log_is_read_again():
+    store = scores.ScoreStore()
+    write_log(["ann 8 Completed", "bob 9 Completed"])
+    store.refresh()
+    with open(scores.SCORES_FILE, "w") as file:
+        file.write("cat 1 Completed\n")
+    store.refresh()
+    assert store.top() == [("cat", 1)]
+
+def test_names_outside_ascii_read_back_the_same():
+    store = scores.ScoreStore()
+    store.add("Zoë Łukasz", 7, 2)
+    store.add("Zoë Łukasz", 11, "Completed")
+    assert scores.ScoreStore().latest_save("Zoë Łukasz") == (7, 2)
+    assert scores.ScoreStore().top() == [("Zoë Łukasz", 11)]
+
+def test_lines_in_the_old_locale_encoding_are_still_read(monkeypatch):
+    monkeypatch.setattr(scores.locale, "getpreferredencoding", lambda do_setlocale=True: "cp1252")
+    with open(scores.SCORES_FILE, "wb") as file:
+        file.write("Renée 9 Completed\n".encode("cp1252"))
+    store = scores.ScoreStore()
+    store.add("Zoë", 12, "Completed")
+    assert store.top() == [("Renée", 9), ("Zoë", 12)]
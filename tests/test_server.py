@@ -0,0 +1,103 @@
+#   Game server - a client connected over a real socket must see its shots end where Simulation says, every shot it
+#   sends must be answered, and nothing can be shot once its game is over
+
+import asyncio
+import math as m
+import pytest
+import client
+import physics
+import replay
+import scheduler
+import scores
+import server
+
+
+def hosted(test): # Run test(server, port) against a server on a free port, with the shared game loop going
+    async def run():
+        host = server.Server("127.0.0.1", 0)
+        host.timers = scheduler.Scheduler(server.Timers(asyncio.get_running_loop()))
+        host.game_loop = scheduler.GameLoop(host.timers, host.step, host.render, physics.INTERVAL/10) # Ten times as fast, the steps are the same
+        host.game_loop.start()
+        listener = await asyncio.start_server(host.connect, "127.0.0.1", 0)
+        try:
+            await asyncio.wait_for(test(host, listener.sockets[0].getsockname()[1]), 30)
+            await asyncio.sleep(0.05) # Let the server see the clients go
+        finally:
+            host.timers.cancel_all()
+            listener.close()
+            await listener.wait_closed()
+            host.files.shutdown() # Waits for the scores and shots to be written
+    asyncio.run(run())
+
+async def joined(port, name="amy"):
+    player = client.Client(name)
+    await player.connect("127.0.0.1", port)
+    return player
+
+
+def test_shot_ends_where_the_simulation_does():
+    async def test(host, port):
+        player = await joined(port)
+        assert (player.number, player.level, player.total_num_shots) == (1, 1, 0)
+        assert (player.left_pos, player.bottom_pos) == (physics.START_X, physics.START_Y)
+        simulation = physics.Simulation(1)
+        simulation.play_shot(*physics.aim_at(1.2, 150, player.max_hyp))
+        assert await player.shoot(1.2, 150) == physics.STOPPED
+        assert (player.left_pos, player.bottom_pos, player.num_shots) == (simulation.left_pos, simulation.bottom_pos, 1)
+        assert player.moves > 0 and host.flying == set()
+        await player.close()
+    hosted(test)
+
+@pytest.mark.parametrize("theta, power", [(m.nan, 100), (1.0, m.inf), (-m.inf, m.nan)])
+def test_shots_that_are_not_numbers_are_rejected(theta, power):
+    async def test(host, port):
+        player = await joined(port)
+        player.writer.write(b"S" + server.SHOT.pack(theta, power)) # Client.shoot won't send them
+        assert await player.receive() == b"R"
+        assert player.rejected == "not a number"
+        assert not host.flying and host.sessions[player.number].num_shots == 0
+        assert await player.shoot(1.2, 150) == physics.STOPPED # Still playing
+        await player.close()
+    hosted(test)
+
+def test_client_refuses_to_send_shots_that_are_not_numbers():
+    async def test(host, port):
+        player = await joined(port)
+        with pytest.raises(ValueError):
+            await player.shoot(m.nan, 100)
+        await player.close()
+    hosted(test)
+
+def test_shot_while_the_ball_is_moving_is_rejected():
+    async def test(host, port):
+        player = await joined(port)
+        player.writer.write(b"S" + server.SHOT.pack(1.2, 150) + b"S" + server.SHOT.pack(0.5, 300))
+        kinds = []
+        while not kinds or kinds[-1] != b"E":
+            kinds.append(await player.receive())
+        assert kinds.count(b"R") == 1 and player.rejected == "ball still moving"
+        assert player.num_shots == 1
+        await player.close()
+    hosted(test)
+
+def test_no_shots_once_the_game_is_over():
+    async def test(host, port):
+        player = await joined(port)
+        session = host.sessions[player.number]
+        await player.save()
+        await asyncio.sleep(0.05)
+        assert session.closed and player.number not in host.sessions
+        session.shoot(1.2, 150) # A shot that was already on its way
+        assert not host.flying and not session.in_flight
+    hosted(test)
+    assert scores.ScoreStore().latest_save("amy") == (0, 1)
+
+def test_shots_and_names_are_logged():
+    async def test(host, port):
+        player = await joined(port, "bob")
+        await player.shoot(1.2, 150)
+        await player.save()
+    hosted(test)
+    (shots, names) = replay.ShotLog().read()
+    assert [(name, score, level) for game, name, score, level in names] == [("bob", 0, 1)]
+    assert [(shot.number, shot.level) for shot in shots[names[0][0]]] == [(1, 1)]
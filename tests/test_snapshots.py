@@ -0,0 +1,67 @@
+#   Snapshots - a game saved to a snapshot must come back exactly as it was, and anything else must be turned away
+
+import os
+import replay
+import snapshots
+
+
+def snapshot(shot=None):
+    return snapshots.Snapshot(2**64-1, 3, 4, 17, 420, 98765, [1, 2, 70000], 640.5, 610.25, -3.5, 1.25, 88,
+                              snapshots.HINT | (snapshots.IN_FLIGHT if shot else 0), 0.75, 150.0, -60.0, "Green", shot)
+
+def test_round_trip():
+    saved = snapshot()
+    loaded = snapshots.unpack(saved.pack())
+    assert vars(loaded) == vars(saved)
+    assert loaded.is_set(snapshots.HINT) and not loaded.is_set(snapshots.IN_FLIGHT)
+
+def test_round_trip_in_flight():
+    shot = replay.Shot(5, 2, 3, 1000, [70000], 100.0, 720.0, 200.0, 150.0, 420)
+    loaded = snapshots.unpack(snapshot(shot).pack())
+    assert vars(loaded.shot) == vars(shot)
+    assert loaded.latched == (1, 2, 70000)
+
+def test_bad_data_is_turned_away():
+    data = snapshot(replay.Shot(5, 2, 3, 1000, [], 100.0, 720.0, 200.0, 150.0, 420)).pack()
+    assert snapshots.unpack(b"") is None
+    assert snapshots.unpack(b"XXXX" + data[4:]) is None
+    assert snapshots.unpack(data[:4] + bytes([snapshots.VERSION + 1]) + data[5:]) is None
+    for length in (snapshots.HEADER.size + snapshots.STATE.size + 3, len(data) - 1): # Cut short in the latched orders, and in the shot
+        assert snapshots.unpack(data[:length]) is None
+    unknown = snapshot()
+    unknown.level = 99
+    assert snapshots.unpack(unknown.pack()) is None
+
+def test_writer_saves_and_removes():
+    writer = snapshots.SnapshotWriter(delay=0.05)
+    path = snapshots.path("ann marie")
+    data = snapshot().pack()
+    writer.save(path, data)
+    assert writer.read(path) == data # Before it has been written
+    writer.flush()
+    with open(path, "rb") as file:
+        assert file.read() == data
+    assert not os.path.exists(path + ".tmp")
+    writer.remove(path)
+    writer.flush()
+    assert writer.read(path) is None and not os.path.exists(path)
+
+def test_writer_tries_again_after_a_failed_write(monkeypatch):
+    writer = snapshots.SnapshotWriter(delay=0.05)
+    (first, second) = (snapshots.path("ann"), snapshots.path("bob"))
+    (older, newer) = (snapshot().pack(), snapshot(replay.Shot(5, 2, 3, 1000, [], 100.0, 720.0, 200.0, 150.0, 420)).pack())
+    write_all = snapshots.write_all
+    def full_disk(batch): # Fails once, with a newer save of the first file coming in while it does
+        monkeypatch.setattr(snapshots, "write_all", write_all)
+        writer.save(first, newer)
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(snapshots, "write_all", full_disk)
+    writer.save(first, older)
+    writer.save(second, older)
+    writer.flush() # Gives up waiting once a write has failed
+    assert not os.path.exists(first) and not os.path.exists(second)
+    assert (writer.read(first), writer.read(second)) == (newer, older) # Still waiting, and the newer save wins
+    writer.flush()
+    for (path, data) in ((first, newer), (second, older)):
+        with open(path, "rb") as file:
+            assert file.read() == data